@@ -98,7 +98,7 @@ test = Tester().test
 
 # import standard submodules and important classes/functions
 from . import tracer
-from .tracer import CGraph, Function
+from .tracer import CGraph, Function, tracing, jit
 
 from . import utpm
 from .utpm import UTPM, UTP
@@ -44,6 +44,7 @@ class Ring(object):
     Warning:
     Since this class is only of little value it may be deprecated in the future.
     """
+    __slots__ = ()
     data = NotImplementedError()
     
     def totype(self, x):
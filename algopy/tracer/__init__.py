@@ -1,3 +1,4 @@
 from . import tracer
+from . import sparsity
 from .tracer import *
 
@@ -0,0 +1,566 @@
+"""
+Sparsity pattern detection and coloring of sparse derivative matrices.
+
+The sparsity pattern of the Jacobian of a traced function is obtained by
+propagating index sets through the computational graph: the value of each
+function node is associated with a boolean matrix S with one row for each
+entry of the value and one column for each entry of the independent
+variable, i.e., S[i,j] is True if the i-th entry of the value may depend on
+the j-th entry of the independent variable. For functions whose dependency
+structure is not known, it is conservatively assumed that every output entry
+depends on every input entry.
+
+Structurally orthogonal columns of the Jacobian, i.e., columns that do not
+have a nonzero in the same row, are grouped by a greedy distance-1 coloring
+of the column intersection graph. All columns of the same color are then
+computed at once by a forward sweep with one direction per color.
+
+The sparsity pattern of the Hessian of a scalar function is obtained in the
+same pass by accumulating the nonlinear interactions of the index sets.
+Symmetric Hessians are compressed by a star coloring, s.t. each entry can be
+read directly from the result of a forward-over-reverse sweep with one
+direction per color.
+
+"""
+
+import numpy
+import scipy.sparse
+
+from algopy.tracer.tracer import Function, FusedFunction, is_set, VIEW_FUNCS
+
+# names of the elementwise functions, i.e., the i-th entry of the output
+# only depends on the (broadcast) i-th entries of the arguments
+ELEMENTWISE_FUNCS = (
+    'add', 'sub', 'mul', 'truediv', 'div', 'pow', 'neg', 'negative',
+    '__add__', '__sub__', '__mul__', '__truediv__', '__div__', '__pow__',
+    '__neg__', '__radd__', '__rsub__', '__rmul__', '__rtruediv__',
+    'exp', 'expm1', 'log', 'log1p', 'log10', 'sin', 'cos', 'tan', 'sqrt',
+    'square', 'absolute', 'reciprocal', 'sign', 'sinh', 'cosh', 'tanh',
+    'arcsin', 'arccos', 'arctan', 'erf', 'real', 'imag', 'conjugate',
+    'dpm_hyp1f1', 'dpm_hyp2f0', 'hyp0f1', 'hyp1f1', 'hyp2f0', 'hyperu',
+    'psi', 'polygamma', 'gammaln', 'botched_clip', 'minimum', 'maximum',
+)
+
+# names of the functions whose output does not depend on the values of their
+# Function arguments (e.g. zeros(shape, dtype=x) only uses the type of x)
+CONSTANT_FUNCS = ('zeros', 'ones', 'zeros_like', 'ones_like')
+
+
+def shape_of(x):
+    """
+    returns the shape of the value x of a function node without the
+    Taylor dimensions D and P, or a tuple of shapes if x is a tuple
+    """
+    if isinstance(x, tuple):
+        return tuple([shape_of(xi) for xi in x])
+    return tuple(numpy.shape(x)) if not hasattr(x, 'data') else tuple(x.shape)
+
+
+def empty_pattern(size, N):
+    return scipy.sparse.csr_matrix((size, N), dtype=bool)
+
+
+def dense_pattern(size, row):
+    """
+    returns the pattern of a value with size entries that all depend on
+    the entries of the 1 x N pattern row
+    """
+    row = scipy.sparse.csr_matrix(row, dtype=bool)
+    return scipy.sparse.csr_matrix(numpy.ones((size, 1), dtype=bool)) * row
+
+
+def union_rows(S):
+    """
+    returns the 1 x N pattern of all entries of S
+    """
+    return scipy.sparse.csr_matrix(S.sum(axis=0) > 0)
+
+
+def select_rows(S, idx):
+    """
+    returns the pattern of the entries S[idx], i.e., the rows idx of S
+    """
+    idx = numpy.asarray(idx, dtype=int).ravel()
+    return scipy.sparse.csr_matrix(S[idx, :], dtype=bool)
+
+
+def aggregate_rows(S, out_idx, out_size):
+    """
+    returns the out_size x N pattern whose row k is the union of all rows
+    i of S with out_idx[i] == k
+    """
+    out_idx = numpy.asarray(out_idx, dtype=int).ravel()
+    R = scipy.sparse.csr_matrix(
+            (numpy.ones(out_idx.size, dtype=bool),
+             (out_idx, numpy.arange(out_idx.size))),
+            shape=(out_size, out_idx.size))
+    return scipy.sparse.csr_matrix(R * S, dtype=bool)
+
+
+def broadcast_pattern(S, shape, out_shape):
+    """
+    returns the pattern of the value with the given shape (and pattern S)
+    broadcast to out_shape
+    """
+    if tuple(shape) == tuple(out_shape):
+        return S
+    idx = numpy.arange(S.shape[0]).reshape(shape)
+    return select_rows(S, numpy.broadcast_to(idx, out_shape))
+
+
+def dot_indices(A, B):
+    """
+    returns (out_idx, a_idx, b_idx, size) s.t. the entry out_idx[r] of
+    dot(A, B) contains the product of the entries a_idx[r] of A and b_idx[r]
+    of B, where A and B are one- or two-dimensional
+    """
+    shpA = shape_of(getattr(A, 'x', A))
+    shpB = shape_of(getattr(B, 'x', B))
+    m = shpA[0] if len(shpA) == 2 else 1
+    n = shpB[1] if len(shpB) == 2 else 1
+    K = shpA[-1]
+
+    i, j, k = numpy.meshgrid(numpy.arange(m), numpy.arange(n),
+                             numpy.arange(K), indexing='ij')
+    return (i*n + j).ravel(), (i*K + k).ravel(), (k*n + j).ravel(), m*n
+
+
+class PatternPropagation:
+    """
+    propagates the index sets of the entries of the function node values of
+    a CGraph from the independent variable to the dependent variables
+
+    The values of all function nodes (e.g. from a pushforward at some point
+    x) are only used to determine shapes.
+    """
+
+    def __init__(self, cg):
+        if len(cg.independentFunctionList) != 1:
+            err_str = 'len(self.independentFunctionList) must be 1 but provided %d' % \
+                       len(cg.independentFunctionList)
+            raise ValueError(err_str)
+
+        self.cg = cg
+        self.patterns = {}
+        self.views = {}
+
+    def run(self):
+        independent = self.cg.independentFunctionList[0]
+        self.N = int(numpy.prod(shape_of(independent.x)))
+
+        for f in self.cg.functionList:
+            if f is independent:
+                S = scipy.sparse.identity(self.N, dtype=bool, format='csr')
+            elif f.func == Function.Id:
+                S = empty_pattern(int(numpy.prod(shape_of(f.x))), self.N)
+            elif is_set(f.setitem):
+                self.setitem(f)
+                S = None
+            else:
+                S = self.propagate(f)
+            self.patterns[id(f)] = S
+
+            if f.func.__name__ in VIEW_FUNCS and isinstance(f.args[0], Function):
+                self.views.setdefault(id(self.root(f)), []).append(f)
+
+        return self
+
+    def pattern(self, f):
+        return self.patterns[id(f)]
+
+    def root(self, f):
+        """
+        returns the function node whose value f is a view of
+        """
+        while f.func.__name__ in VIEW_FUNCS and isinstance(f.args[0], Function):
+            f = f.args[0]
+        return f
+
+    def arguments(self, f):
+        """
+        returns a list of (pattern, shape) of all Function arguments of f
+        """
+        return [(self.patterns[id(a)], shape_of(a.x)) for a in f.args
+                if isinstance(a, Function)]
+
+    def conservative(self, f):
+        """
+        pattern of a function whose dependency structure is unknown
+        """
+        row = empty_pattern(1, self.N)
+        for S, shape in self.arguments(f):
+            if isinstance(S, tuple):
+                for Si in S:
+                    row = row + union_rows(Si)
+            else:
+                row = row + union_rows(S)
+
+        shape = shape_of(f.x)
+        if isinstance(f.x, tuple):
+            return tuple([dense_pattern(int(numpy.prod(s)), row) for s in shape])
+        return dense_pattern(int(numpy.prod(shape)), row)
+
+    def propagate(self, f):
+        name = f.func.__name__
+        out_shape = shape_of(f.x)
+
+        if name in CONSTANT_FUNCS:
+            return empty_pattern(int(numpy.prod(out_shape)), self.N)
+
+        elif isinstance(f.func, FusedFunction) or name in ELEMENTWISE_FUNCS:
+            S = empty_pattern(int(numpy.prod(out_shape)), self.N)
+            for Sa, shape in self.arguments(f):
+                S = S + broadcast_pattern(Sa, shape, out_shape)
+            return S
+
+        elif name in ('getitem', '__getitem__'):
+            x, sl = f.args
+            S = self.patterns[id(x)]
+            if isinstance(S, tuple):
+                return S[sl]
+            idx = numpy.arange(S.shape[0]).reshape(shape_of(x.x))[sl]
+            return select_rows(S, idx)
+
+        elif name == 'reshape':
+            return self.patterns[id(f.args[0])]
+
+        elif name == 'transpose':
+            x = f.args[0]
+            S = self.patterns[id(x)]
+            idx = numpy.arange(S.shape[0]).reshape(shape_of(x.x)).T
+            return select_rows(S, idx)
+
+        elif name == 'trace':
+            x = f.args[0]
+            S = self.patterns[id(x)]
+            idx = numpy.arange(S.shape[0]).reshape(shape_of(x.x))
+            return union_rows(select_rows(S, numpy.diagonal(idx)))
+
+        elif name == 'sum' and isinstance(f.args[0], Function):
+            x, axis = f.args[0], f.args[1]
+            S = self.patterns[id(x)]
+            if axis is None:
+                return union_rows(S)
+            shape = shape_of(x.x)
+            out_idx = numpy.arange(int(numpy.prod(out_shape))).reshape(out_shape)
+            out_idx = numpy.broadcast_to(numpy.expand_dims(out_idx, axis), shape)
+            return aggregate_rows(S, out_idx, int(numpy.prod(out_shape)))
+
+        elif name == 'dot' and all([len(shape_of(getattr(a, 'x', a))) in (1, 2) for a in f.args]):
+            return self.dot(f)
+
+        return self.conservative(f)
+
+    def dot(self, f):
+        """
+        pattern of dot(A, B): the entry (i,j) of the output depends on the
+        row i of A and the column j of B
+        """
+        A, B = f.args
+        out_idx, a_idx, b_idx, size = dot_indices(A, B)
+
+        S = empty_pattern(size, self.N)
+        for a, idx in [(A, a_idx), (B, b_idx)]:
+            if isinstance(a, Function):
+                Sa = select_rows(self.patterns[id(a)], idx)
+                S = S + aggregate_rows(Sa, out_idx, size)
+        return S
+
+    def setitem(self, f):
+        """
+        updates the pattern of the buffer f.args[0] that is modified by
+        f.args[0][sl] = rhs
+        """
+        buf, sl, rhs = f.args
+        S = self.patterns[id(buf)]
+        shape = shape_of(buf.x)
+        idx = numpy.arange(S.shape[0]).reshape(shape)[sl]
+
+        if isinstance(rhs, Function):
+            Srhs = broadcast_pattern(self.patterns[id(rhs)],
+                                     shape_of(rhs.x), numpy.shape(idx))
+        else:
+            Srhs = empty_pattern(numpy.size(idx), self.N)
+
+        idx = numpy.ravel(idx)
+        keep = numpy.ones(S.shape[0], dtype=bool)
+        keep[idx] = False
+        S = scipy.sparse.diags(keep.astype(numpy.int8)) * S
+        self.patterns[id(buf)] = scipy.sparse.csr_matrix(
+            S + aggregate_rows(Srhs, idx, S.shape[0]), dtype=bool)
+
+        # values that share memory with the buffer are conservatively
+        # assumed to depend on everything that has been written into it
+        row = union_rows(Srhs)
+        root = self.root(buf)
+        for g in [root] + self.views.get(id(root), []):
+            if g is not buf and self.patterns[id(g)] is not None:
+                Sg = self.patterns[id(g)]
+                self.patterns[id(g)] = Sg + dense_pattern(Sg.shape[0], row)
+
+
+def jacobian_pattern(cg):
+    """
+    returns the sparsity pattern of the Jacobian of the dependent variable
+    cg.dependentFunctionList[0] w.r.t. the independent variable
+    cg.independentFunctionList[0] as boolean scipy.sparse.csr_matrix
+
+    The function nodes of cg must have been evaluated, e.g. by cg.pushforward.
+    """
+    if len(cg.dependentFunctionList) != 1:
+        err_str = 'len(self.dependentFunctionList) must be 1 but provided %d' % \
+                   len(cg.dependentFunctionList)
+        raise ValueError(err_str)
+
+    propagation = PatternPropagation(cg).run()
+    S = propagation.pattern(cg.dependentFunctionList[0])
+    S = scipy.sparse.csr_matrix(S, dtype=bool)
+    S.eliminate_zeros()
+    S.sort_indices()
+    return S
+
+
+# names of the functions that are linear in all their Function arguments
+LINEAR_FUNCS = (
+    'add', 'sub', 'neg', 'negative', '__add__', '__sub__', '__neg__',
+    '__radd__', '__rsub__', 'sum', 'trace', 'transpose', 'reshape',
+    'getitem', '__getitem__', 'real', 'imag', 'conjugate',
+)
+
+
+def interaction(Su, Sw):
+    """
+    returns the N x N pattern of the second derivatives of the products
+    u_r * w_r, where the rows r of Su and Sw are the patterns of u_r and w_r
+    """
+    Su = Su.astype(numpy.int8)
+    Sw = Sw.astype(numpy.int8)
+    H = Su.T * Sw
+    return scipy.sparse.csr_matrix(H + H.T, dtype=bool)
+
+
+class HessianPatternPropagation(PatternPropagation):
+    """
+    propagates the index sets like PatternPropagation and additionally
+    accumulates the nonlinear interactions of the entries of the independent
+    variable, i.e., the pattern H of the Hessian
+
+    For each nonlinear function node, the second derivatives w.r.t. its
+    arguments are nonzero, e.g. H[j,k] may be nonzero for all j in the index
+    set of u and k in the index set of w if the node computes u*w.
+    """
+
+    def run(self):
+        N = int(numpy.prod(shape_of(self.cg.independentFunctionList[0].x)))
+        self.H = empty_pattern(N, N)
+        return PatternPropagation.run(self)
+
+    def propagate(self, f):
+        name = f.func.__name__
+        out_shape = shape_of(f.x)
+        args = [(a, self.patterns[id(a)], shape_of(a.x)) for a in f.args
+                if isinstance(a, Function)]
+
+        if name in LINEAR_FUNCS or name in CONSTANT_FUNCS:
+            pass
+
+        elif name in ('mul', '__mul__', '__rmul__'):
+            if len(args) == 2:
+                Su, Sw = [broadcast_pattern(S, shape, out_shape) for a, S, shape in args]
+                self.H = self.H + interaction(Su, Sw)
+
+        elif name in ('truediv', 'div', '__truediv__', '__div__'):
+            if isinstance(f.args[1], Function):
+                Ss = [broadcast_pattern(S, shape, out_shape) for a, S, shape in args]
+                self.H = self.H + interaction(Ss[-1], Ss[-1])
+                if len(Ss) == 2:
+                    self.H = self.H + interaction(Ss[0], Ss[-1])
+
+        elif name == 'dot' and all([len(shape_of(getattr(a, 'x', a))) in (1, 2) for a in f.args]):
+            if len(args) == 2:
+                A, B = f.args
+                out_idx, a_idx, b_idx, size = dot_indices(A, B)
+                self.H = self.H + interaction(select_rows(self.patterns[id(A)], a_idx),
+                                              select_rows(self.patterns[id(B)], b_idx))
+
+        elif isinstance(f.func, FusedFunction) or name in ELEMENTWISE_FUNCS:
+            S = empty_pattern(int(numpy.prod(out_shape)), self.N)
+            for a, Sa, shape in args:
+                S = S + broadcast_pattern(Sa, shape, out_shape)
+            self.H = self.H + interaction(S, S)
+
+        else:
+            row = empty_pattern(1, self.N)
+            for a, S, shape in args:
+                for Si in (S if isinstance(S, tuple) else (S,)):
+                    row = row + union_rows(Si)
+            self.H = self.H + interaction(row, row)
+
+        return PatternPropagation.propagate(self, f)
+
+
+def hessian_pattern(cg):
+    """
+    returns the sparsity pattern of the Hessian of the scalar dependent
+    variable cg.dependentFunctionList[0] w.r.t. the independent variable
+    cg.independentFunctionList[0] as boolean scipy.sparse.csr_matrix
+
+    The function nodes of cg must have been evaluated, e.g. by cg.pushforward.
+    """
+    propagation = HessianPatternPropagation(cg).run()
+    H = scipy.sparse.csr_matrix(propagation.H, dtype=bool)
+    H.eliminate_zeros()
+    H.sort_indices()
+    return H
+
+
+def color_columns(pattern):
+    """
+    computes a distance-1 coloring of the column intersection graph of the
+    sparsity pattern, i.e., two columns that have a nonzero in the same row
+    get different colors
+
+    The columns are colored greedily in their natural order.
+
+    Parameters
+    ----------
+    pattern: scipy.sparse matrix
+        sparsity pattern of an M x N matrix
+
+    Returns
+    -------
+    colors: array
+        colors[j] is the color of the j-th column, the colors are 0,1,...
+    """
+    S = scipy.sparse.csr_matrix(pattern, dtype=bool).astype(numpy.int8)
+    C = scipy.sparse.csr_matrix(S.T * S)
+    N = C.shape[0]
+
+    colors = -numpy.ones(N, dtype=int)
+    for j in range(N):
+        neighbors = C.indices[C.indptr[j]:C.indptr[j+1]]
+        forbidden = set(colors[neighbors])
+        c = 0
+        while c in forbidden:
+            c += 1
+        colors[j] = c
+    return colors
+
+
+def seed_matrix(colors):
+    """
+    returns the N x p seed matrix S with S[j, colors[j]] = 1
+    """
+    N = colors.size
+    S = numpy.zeros((N, numpy.max(colors) + 1 if N > 0 else 0))
+    S[numpy.arange(N), colors] = 1.
+    return S
+
+
+def recover_jacobian(B, pattern, colors):
+    """
+    recovers the Jacobian J from the compressed Jacobian B = J S, where
+    S is the seed matrix of the column coloring colors
+
+    Returns
+    -------
+    J: scipy.sparse.csr_matrix
+    """
+    pattern = scipy.sparse.csr_matrix(pattern, dtype=bool)
+    pattern.sort_indices()
+    rows = numpy.repeat(numpy.arange(pattern.shape[0]), numpy.diff(pattern.indptr))
+    data = B[rows, colors[pattern.indices]]
+    return scipy.sparse.csr_matrix((data, pattern.indices.copy(), pattern.indptr.copy()),
+                                   shape=pattern.shape)
+
+
+def star_color(pattern):
+    """
+    computes a star coloring of the adjacency graph of the symmetric
+    sparsity pattern, i.e., a distance-1 coloring s.t. every path on four
+    vertices uses at least three colors
+
+    The vertices are colored greedily in their natural order, where a color
+    is forbidden for vertex v if it is used by a neighbor of v, by a vertex
+    at distance two whose intermediate vertex is not colored yet, or by a
+    vertex x at distance two whose path v-w-x would be extended to a
+    two-colored path on four vertices.
+
+    Reference: Gebremedhin, Manne, Pothen, "What color is your Jacobian?
+    Graph coloring for computing derivatives", SIAM Review 47(4), 2005.
+
+    Parameters
+    ----------
+    pattern: scipy.sparse matrix
+        symmetric sparsity pattern of an N x N matrix
+
+    Returns
+    -------
+    colors: array
+        colors[j] is the color of the j-th column, the colors are 0,1,...
+    """
+    G = scipy.sparse.csr_matrix(pattern, dtype=bool)
+    G = scipy.sparse.csr_matrix(scipy.sparse.triu(G, 1) + scipy.sparse.tril(G, -1))
+    G = scipy.sparse.csr_matrix(G + G.T, dtype=bool)
+    G.sort_indices()
+    N = G.shape[0]
+
+    def neighbors(v):
+        return G.indices[G.indptr[v]:G.indptr[v+1]]
+
+    colors = -numpy.ones(N, dtype=int)
+    for v in range(N):
+        forbidden = set()
+        for w in neighbors(v):
+            if colors[w] != -1:
+                forbidden.add(colors[w])
+            for x in neighbors(w):
+                if x == v or colors[x] == -1:
+                    continue
+                if colors[w] == -1:
+                    forbidden.add(colors[x])
+                else:
+                    for y in neighbors(x):
+                        if y != w and colors[y] == colors[w]:
+                            forbidden.add(colors[x])
+                            break
+        c = 0
+        while c in forbidden:
+            c += 1
+        colors[v] = c
+    return colors
+
+
+def recover_hessian(B, pattern, colors):
+    """
+    recovers the symmetric matrix H from the compressed matrix B = H S,
+    where S is the seed matrix of the star coloring colors
+
+    The entry H[i,j] is read from B[i, colors[j]] if j is the only column
+    in the row i of the pattern with color colors[j], otherwise from
+    B[j, colors[i]]. A star coloring guarantees that one of both is the case.
+
+    Returns
+    -------
+    H: scipy.sparse.csr_matrix
+    """
+    pattern = scipy.sparse.csr_matrix(pattern, dtype=bool)
+    pattern = scipy.sparse.csr_matrix(pattern + pattern.T, dtype=bool)
+    pattern.sort_indices()
+    N = pattern.shape[0]
+    p = B.shape[1]
+
+    rows = numpy.repeat(numpy.arange(N), numpy.diff(pattern.indptr))
+    cols = pattern.indices
+
+    # count[i, c] is the number of columns of color c in row i
+    count = numpy.zeros((N, p), dtype=int)
+    numpy.add.at(count, (rows, colors[cols]), 1)
+
+    direct = count[rows, colors[cols]] == 1
+    if not numpy.all(direct | (count[cols, colors[rows]] == 1)):
+        raise ValueError('colors is not a star coloring of the pattern')
+
+    data = numpy.where(direct, B[rows, colors[cols]], B[cols, colors[rows]])
+    return scipy.sparse.csr_matrix((data, cols.copy(), pattern.indptr.copy()),
+                                   shape=pattern.shape)
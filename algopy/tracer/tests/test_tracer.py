@@ -277,6 +277,22 @@ class Test_Function_on_UTPM(TestCase):
 
         assert_array_almost_equal(x.xbar.data, - y.xbar.data)
 
+    def test_pullback_registry(self):
+        cg = CGraph()
+        x = Function(UTPM(numpy.ones((1,1,1))))
+        y = algopy.exp(x)
+        cg.trace_off()
+        cg.independentFunctionList = [x]
+        cg.dependentFunctionList = [y]
+
+        ybar = y.x.zeros_like()
+        ybar[0] = 1.
+        cg.pullback([ybar])
+
+        assert_array_almost_equal(numpy.exp(1.), x.xbar.data[0,0])
+        assert (UTPM, algopy.exp) in Function.pullback_registry
+        assert Function.get_pullback(UTPM, algopy.exp) == UTPM.pb_exp
+
 class Test_Mixed_Function_Operations(TestCase):
     def test_scalar(self):
         D,P,N = 2,3,4
@@ -2364,6 +2380,13 @@ class Test_UserFriendlyDrivers(TestCase):
         res6 = cg.hess_vec(x,v)
         assert_array_almost_equal(numpy.dot(res5, v), res6)
 
+        # forward/reverse mode Hessian-matrix, all directions at once and chunked
+        V = numpy.random.rand(3, 5)
+        assert_array_almost_equal(numpy.dot(res5, V), cg.hess_mat(x, V))
+        assert_array_almost_equal(numpy.dot(res5, V), cg.hess_mat(x, V, chunk_size=2))
+        assert_raises(ValueError, cg.hess_mat, x, V, chunk_size=0)
+        assert_raises(ValueError, cg.hess_mat, x, V, chunk_size=-1)
+
         # reverese mode Jacobian
         res7 = cg2.jacobian(x)
         assert_array_almost_equal(numpy.array( [[4*x[0], 0, 0],
@@ -2466,6 +2489,855 @@ class Test_UserFriendlyDrivers(TestCase):
         assert_almost_equal(aJ.data, aJ2.data)
 
 
+class Test_CGraph_adjoint_workspace(TestCase):
+
+    def test_repeated_gradient_reuses_adjoints(self):
+        def f(x):
+            y = algopy.zeros(2, dtype=x)
+            y[0] = x[0]*x[1]
+            y[1] = algopy.exp(x[1])
+            return algopy.sum(y*x)
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.array([1.,2.]))
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x1 = numpy.array([3.,5.])
+        x2 = numpy.array([7.,11.])
+        g1 = cg.gradient(x1)
+        xbars = [node.xbar for node in cg.functionList]
+        g2 = cg.gradient(x2)
+
+        # the adjoint buffers of nodes that own their data are reused
+        for node, xbar in zip(cg.functionList, xbars):
+            if isinstance(node.x, UTPM) and node.x.owndata:
+                assert node.xbar is xbar
+
+        # the previously returned gradient is not overwritten
+        assert_array_almost_equal(UTPM.extract_jacobian(f(UTPM.init_jacobian(x1))), g1)
+        assert_array_almost_equal(UTPM.extract_jacobian(f(UTPM.init_jacobian(x2))), g2)
+
+        # a different number of directions requires new adjoint buffers
+        H = cg.hessian(x1)
+        assert_array_almost_equal(UTPM.extract_jacobian(f(UTPM.init_jacobian(x1))), g1)
+        assert_array_almost_equal(H, H.T)
+
+
+class Test_CGraph_compile(TestCase):
+
+    def test_compiled_drivers(self):
+        A = numpy.random.rand(3,3)
+
+        def f(x):
+            y = algopy.exp(x) * algopy.sin(x[0])
+            z = algopy.zeros(3, dtype=x)
+            z[0] = y[1]
+            z[1] = algopy.sum(algopy.dot(A, y))
+            z[2] = x[2]**2
+            return algopy.sum(z * z)
+
+        x = numpy.array([1.,2.,3.])
+        cg = algopy.CGraph()
+        fx = algopy.Function(x)
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.array([.5, .3, .1])
+        v = numpy.array([1., 2., 3.])
+        g1 = cg.gradient(x)
+        H1 = cg.hessian(x)
+        Hv1 = cg.hess_vec(x, v)
+
+        cg.compile()
+        for i in range(2):
+            assert_array_almost_equal(g1, cg.gradient(x))
+            assert_array_almost_equal(H1, cg.hessian(x))
+            assert_array_almost_equal(Hv1, cg.hess_vec(x, v))
+
+        assert_array_almost_equal(f(x), cg.function([x])[0])
+        g2 = UTPM.extract_jacobian(f(UTPM.init_jacobian(x)))
+        assert_array_almost_equal(g2, cg.gradient(x))
+
+    def test_tape(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.array([1.,2.]))
+        fy = algopy.sum(algopy.exp(fx) * 3.)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+        cg.compile()
+        g = cg.gradient(numpy.array([1.,2.]))
+
+        assert not hasattr(fx, '__dict__')
+        tape = cg._plan
+        assert_array_equal([tape.ops[k].__name__ for k in tape.opcode],
+                           ['Id', 'exp', 'Id', 'mul', 'sum'])
+        assert_array_equal(tape.arg_idx[tape.arg_ptr[3]:tape.arg_ptr[4]], [1, 2])
+        for nf, node in enumerate(cg.functionList):
+            assert tape.values[nf] is node.x
+            if isinstance(node.x, UTPM):
+                assert tape.adjoints[nf] is node.xbar
+        assert_array_almost_equal(3*numpy.exp([1.,2.]), g)
+
+    def test_plan_is_discarded_when_tracing_continues(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(3.)
+        fy = fx * fx
+        cg.compile()
+        fz = algopy.sin(fy)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fz]
+        assert_almost_equal(numpy.sin(4.), cg.function([2.])[0])
+        cg.compile()
+        assert_almost_equal(numpy.sin(9.), cg.function([3.])[0])
+        assert_almost_equal(numpy.cos(9.)*6., cg.gradient(3.))
+
+
+class Test_CGraph_liveness(TestCase):
+
+    def test_gradient_and_hessian_with_released_values(self):
+        A = numpy.random.rand(4,4)
+
+        def f(x):
+            y = algopy.sin(x) + x
+            z = algopy.exp(algopy.dot(A, y)) - x
+            w = algopy.zeros(2, dtype=x)
+            w[0] = z[1]
+            w[1] = algopy.sum(algopy.log(z*z))
+            return algopy.sum(w * w) + algopy.sum(z)
+
+        x = numpy.array([1.,2.,3.,4.])
+        cg = algopy.CGraph()
+        fx = algopy.Function(x)
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.array([.5, .3, .1, .2])
+        g1 = cg.gradient(x)
+        H1 = cg.hessian(x)
+
+        cg.analyze_liveness()
+        for compile in [False, True]:
+            if compile:
+                cg.compile()
+            assert_array_almost_equal(g1, cg.gradient(x))
+            assert_array_almost_equal(H1, cg.hessian(x))
+            assert_array_almost_equal(f(x), cg.function([x])[0])
+
+        # e.g. the value of sin(x) + x is not needed by the reverse sweep
+        cg.gradient(x)
+        released = [node for node in cg.functionList
+                    if isinstance(node.x, UTPM) and node.x.data.strides == (0,)*node.x.data.ndim]
+        assert len(released) > 0
+        assert 'number of released values     : %d'%len(released) in cg.memory_report()
+
+        cg.analyze_liveness(release=False)
+        cg.function([x])
+        assert 'number of released values     : 0' in cg.memory_report()
+
+
+class Test_CGraph_checkpointing(TestCase):
+
+    def test_time_stepping_loop(self):
+        def f(x, cg=None):
+            y = x
+            for n in range(20):
+                y = y + 0.1*algopy.sin(y)*algopy.exp(-y*y)
+                if cg is not None:
+                    cg.mark_checkpoint()
+            z = algopy.zeros(3, dtype=x)
+            z[0] = y[1]
+            z[1] = y[0]*y[2]
+            z[2] = algopy.sum(y)
+            return algopy.sum(z*z)
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = f(fx, cg)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.array([.3, .5, .7])
+        g = UTPM.extract_jacobian(f(UTPM.init_jacobian(x)))
+        H = cg.hessian(x)
+
+        for snaps in [0, 1, 3, 30]:
+            for nsegments in [None, 7]:
+                cg.checkpointing_on(snaps, nsegments)
+                for i in range(2):
+                    assert_array_almost_equal(g, cg.gradient(x))
+                    assert_array_almost_equal(H, cg.hessian(x))
+
+        cg.checkpointing_on(2)
+        cg.gradient(x)
+        assert 'number of stored checkpoints  : 2' in cg.memory_report()
+
+        cg.checkpointing_off()
+        assert_array_almost_equal(g, cg.gradient(x))
+        assert 'number of released values     : 0' in cg.memory_report()
+
+
+class Test_CGraph_optimize(TestCase):
+
+    def test_cse_constant_folding_and_dead_nodes(self):
+        A = numpy.random.rand(4,3)
+        c = numpy.random.rand(2,2)
+
+        def f(x, C):
+            X = algopy.dot(A, algopy.diag(x))
+            y = algopy.sum(algopy.dot(X.T, X)) + algopy.trace(algopy.dot(X.T, X))
+            k = algopy.sum(algopy.exp(C) * 2.)
+            unused = algopy.sin(x) * x
+            z = algopy.zeros(2, dtype=x)
+            z[0] = y
+            z[1] = x[0]
+            return algopy.sum(z * z) * k + algopy.sum(z)
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = f(fx, algopy.Function(c))
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.array([.3, .5, .7])
+        H = cg.hessian(x)
+        N = len(cg.functionList)
+        report = cg.optimize()
+
+        # dot(X.T, X) and X.T are computed only once
+        assert 'common-subexpression elimination : removed 2 nodes' in report
+        # exp(C), exp(C)*2. and sum(exp(C)*2.) are constants
+        assert 'constant folding                 : folded 3 nodes' in report
+        assert 'number of function nodes         : %d -> %d'%(N, len(cg.functionList)) in report
+        assert len(cg.functionList) < N
+        assert [f.ID for f in cg.functionList] == list(range(len(cg.functionList)))
+
+        assert_array_almost_equal(H, cg.hessian(x))
+        for x in [numpy.array([.3, .5, .7]), numpy.array([1.3, .2, .1])]:
+            assert_array_almost_equal(f(x, c), cg.function([x])[0])
+            g = UTPM.extract_jacobian(f(UTPM.init_jacobian(x), c))
+            assert_array_almost_equal(g, cg.gradient(x))
+
+
+class Test_CGraph_fuse(TestCase):
+
+    def test_elementwise_chains(self):
+        def f(x):
+            a = algopy.sqrt(algopy.exp(-x))
+            b = algopy.log1p(algopy.square(a)) * x
+            return algopy.sum(b) + algopy.sum(algopy.reciprocal(algopy.log(a + 3.)))
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.array([.3, .5, .7])
+        H = cg.hessian(x)
+        report = cg.fuse()
+
+        # a is used twice, i.e., it is the end of the first chain
+        names = [node.func.__name__ for node in cg.functionList]
+        assert 'fused_neg_exp_sqrt' in names
+        assert 'fused_square_log1p' in names
+        assert 'fused_log_reciprocal' in names
+        assert 'fused chains             : 3' in report
+
+        assert_array_almost_equal(H, cg.hessian(x))
+        assert_array_almost_equal(f(x), cg.function([x])[0])
+        g = UTPM.extract_jacobian(f(UTPM.init_jacobian(x)))
+        assert_array_almost_equal(g, cg.gradient(x))
+
+        # fused functions are not stored in the class-global registry
+        assert not [key for key in Function.pullback_registry
+                    if isinstance(key[1], FusedFunction)]
+
+
+class Test_tracing_contexts(TestCase):
+
+    def test_nested_contexts(self):
+        with algopy.CGraph() as outer:
+            x = algopy.Function(2.)
+            with algopy.tracing() as inner:
+                z = algopy.Function(3.)
+                w = algopy.exp(z)
+            y = x * x
+
+        assert Function.cgraph is None
+        assert [f.func.__name__ for f in outer.functionList] == ['Id', 'mul']
+        assert [f.func.__name__ for f in inner.functionList] == ['Id', 'exp']
+
+        inner.independentFunctionList = [z]
+        inner.dependentFunctionList = [w]
+        assert_almost_equal(numpy.exp(1.), inner.gradient(1.))
+
+    def test_concurrent_tracing_in_threads(self):
+        from multiprocessing.pool import ThreadPool
+
+        def trace(k):
+            with algopy.tracing() as cg:
+                x = algopy.Function(1.)
+                y = x
+                for i in range(100):
+                    y = algopy.sin(y) * (k + 1.)
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            return cg
+
+        pool = ThreadPool(4)
+        cgs = pool.map(trace, range(8))
+        pool.close()
+
+        for k, cg in enumerate(cgs):
+            assert [f.ID for f in cg.functionList] == list(range(len(cg.functionList)))
+            assert len(cg.functionList) == 301
+
+            def f(x):
+                for i in range(100):
+                    x = numpy.sin(x) * (k + 1.)
+                return x
+            assert_almost_equal(f(.3), cg.function([.3])[0])
+
+
+class Test_CGraph_save_load(TestCase):
+
+    def test_save_load(self):
+        A = numpy.random.rand(3,3)
+
+        def f(x):
+            z = algopy.zeros(3, dtype=x)
+            z[0] = x[1]
+            z[1:] = algopy.dot(A, x)[:2]
+            w = algopy.log1p(algopy.exp(-z))
+            return algopy.sum(w * x) + algopy.sum(algopy.square(z)**2) + x[0]*2
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+        cg.fuse()
+
+        x = numpy.array([.3, .5, .7])
+        g = cg.gradient(x)
+        H = cg.hessian(x)
+
+        fname = os.path.join(Settings.output_dir, 'test_save_load.cgraph')
+        cg.save(fname)
+        cg2 = algopy.CGraph.load(fname)
+
+        assert Function.cgraph is None
+        assert len(cg2.functionList) == len(cg.functionList)
+        # the constant A is mapped into memory
+        assert [node for node in cg2.functionList if isinstance(node.x, numpy.memmap)]
+
+        assert_array_almost_equal(f(x), cg2.function([x])[0])
+        assert_array_almost_equal(g, cg2.gradient(x))
+        assert_array_almost_equal(H, cg2.hessian(x))
+
+
+class Test_CGraph_batch(TestCase):
+
+    def test_gradient_batch(self):
+        A = numpy.random.rand(3,3)
+
+        def f(x):
+            z = algopy.zeros(3, dtype=x)
+            z[0] = x[1]
+            z[1:] = algopy.dot(A, x)[:2]
+            return algopy.sum(algopy.log1p(algopy.exp(-z)) * x) + x[0]*algopy.sin(x[2])
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = f(fx)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        X = numpy.random.rand(7,3)
+        G = cg.gradient_batch(X)
+        assert_array_almost_equal([cg.gradient(x) for x in X], G)
+
+        Y, = cg.function_batch(X)
+        assert_array_almost_equal([f(x) for x in X], Y)
+
+    def test_gradient_batch_list(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(2))
+        fz = algopy.Function(3.)
+        fy = algopy.sum(fx * fx) * fz
+        cg.trace_off()
+        cg.independentFunctionList = [fx, fz]
+        cg.dependentFunctionList = [fy]
+
+        X = numpy.random.rand(5,2)
+        Z = numpy.random.rand(5)
+        Gx, Gz = cg.gradient_batch([X, Z])
+        assert_array_almost_equal(2*X*Z[:,None], Gx)
+        assert_array_almost_equal(numpy.sum(X*X, axis=1), Gz)
+
+
+class Test_CGraph_jacobian_mode(TestCase):
+
+    def test_forward_reverse_auto(self):
+        for N, M in [(2, 30), (30, 2), (1, 1)]:
+            A = numpy.random.rand(M, N)
+
+            cg = algopy.CGraph()
+            fx = algopy.Function(numpy.ones(N))
+            fy = algopy.exp(algopy.sum(A * algopy.sin(fx), axis=1))
+            cg.trace_off()
+            cg.independentFunctionList = [fx]
+            cg.dependentFunctionList = [fy]
+
+            x = numpy.random.rand(N)
+            J = numpy.exp(numpy.sum(A*numpy.sin(x), axis=1))[:,None] * A * numpy.cos(x)
+            assert_array_almost_equal(J, cg.jacobian(x, mode='forward'))
+            assert_array_almost_equal(J, cg.jacobian(x, mode='reverse'))
+            assert_array_almost_equal(J, cg.jacobian(x, mode='auto'))
+            assert cg.jacobian_mode(x) in ('forward', 'reverse')
+            assert_raises(ValueError, cg.jacobian, x, mode='sideways')
+
+    def test_calibration(self):
+        for N, M, mode in [(2, 30, 'forward'), (30, 2, 'reverse'), (6, 6, 'forward'),
+                           (10, 20, None)]:
+            cg = algopy.CGraph()
+            fx = algopy.Function(numpy.ones(N))
+            fy = algopy.exp(algopy.sum(numpy.random.rand(M, N) * algopy.sin(fx), axis=1))
+            cg.trace_off()
+            cg.independentFunctionList = [fx]
+            cg.dependentFunctionList = [fy]
+
+            x = numpy.random.rand(N)
+            if mode is None:
+                # both modes are measured and the measurements are cached
+                mode = cg.jacobian_mode(x)
+                assert_equal([x.shape], list(cg._jacobian_costs.keys()))
+            else:
+                # the mode with fewer directions is taken without measurements
+                assert_equal(mode, cg.jacobian_mode(x))
+                assert cg._jacobian_costs is None
+            assert_equal(mode, cg.jacobian_mode(x))
+
+    def test_chunked_reverse(self):
+        N, M = 4, 11
+        A = numpy.random.rand(M, N)
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fy = algopy.exp(algopy.sum(A * algopy.sin(fx), axis=1))
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.random.rand(N)
+        J = cg.jacobian(x)
+        assert_array_almost_equal(J, cg.jacobian(x, chunk_size=3))
+        assert_array_almost_equal(J, cg.jacobian(x, n_jobs=3))
+        assert_array_almost_equal(J, cg.jacobian(x, chunk_size=2, n_jobs=4))
+
+        # setitem is processed serially
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fy = algopy.zeros(M, dtype=fx)
+        fy[:N] = fx*fx
+        fy[N:] = algopy.sum(A[N:] * algopy.sin(fx), axis=1)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        J = cg.jacobian(x)
+        assert_array_almost_equal(J, cg.jacobian(x, chunk_size=3, n_jobs=2))
+
+
+class Test_CGraph_gradient_out(TestCase):
+
+    def test_single_independent(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = algopy.sum(fx*algopy.sin(fx))
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        g = numpy.zeros(3)
+        for n in range(3):
+            x = numpy.random.rand(3)
+            assert cg.gradient(x, out=g) is g
+            assert_array_almost_equal(numpy.sin(x) + x*numpy.cos(x), g)
+
+        # the returned gradient does not share memory with the CGraph
+        g1 = cg.gradient(x)
+        g2 = cg.gradient(2*x)
+        assert_array_almost_equal(numpy.sin(x) + x*numpy.cos(x), g1)
+        assert not numpy.may_share_memory(g1, g2)
+
+        # x is copied, i.e., it may be modified by the caller
+        cg.gradient(x)
+        x0 = x.copy()
+        x[...] = 0.
+        assert_array_almost_equal(x0, fx.x.data[0,0])
+
+    def test_multiple_independents(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = algopy.Function(2.)
+        fz = algopy.sum(fx*fx)*fy
+        cg.trace_off()
+        cg.independentFunctionList = [fx, fy]
+        cg.dependentFunctionList = [fz]
+
+        x = numpy.random.rand(3)
+        y = numpy.array(3.)
+        g = [numpy.zeros(3), numpy.zeros(())]
+        assert cg.gradient([x, y], out=g) is g
+        assert_array_almost_equal(2*x*y, g[0])
+        assert_array_almost_equal(numpy.sum(x*x), g[1])
+
+        g = numpy.zeros(4)
+        cg.gradient([x, y], out=g)
+        assert_array_almost_equal(numpy.hstack([2*x*y, numpy.sum(x*x)]), g)
+
+        g = cg.gradient([x, y])
+        assert_array_almost_equal(2*x*y, g[0])
+
+    def test_complex_scalar(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(3.)
+        fy = fx*fx
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        assert_almost_equal(14., cg.gradient(7.))
+        assert_almost_equal(2+4j, cg.gradient(1+2j))
+        assert_almost_equal(14., cg.gradient(7.))
+
+    def test_scipy_optimize(self):
+        import scipy.optimize
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(2))
+        fy = algopy.sum((fx - numpy.array([1., 2.]))**2)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        g = numpy.zeros(2)
+        x = scipy.optimize.fmin_l_bfgs_b(lambda x: cg.function([x])[0], numpy.zeros(2),
+                                         fprime=lambda x: cg.gradient(x, out=g))[0]
+        assert_array_almost_equal([1., 2.], x, decimal=4)
+
+
+class Test_CGraph_guards(TestCase):
+
+    def trace(self, x):
+        cg = algopy.CGraph()
+        fx = algopy.Function(x)
+        if fx[0] < 1.:
+            fy = algopy.sum(fx*fx)
+        else:
+            fy = algopy.sum(algopy.sin(fx))
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+        return cg
+
+    def test_guard_flips(self):
+        cg = self.trace(numpy.array([0.5, 2.]))
+        assert_equal(1, len(cg.guardList))
+
+        assert_array_almost_equal([0.6, 4.], cg.gradient(numpy.array([0.3, 2.])))
+        assert_raises(GuardError, cg.gradient, numpy.array([3., 2.]))
+        assert_raises(GuardError, cg.function, [numpy.array([3., 2.])])
+
+    def test_reflected_comparison(self):
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.array([0.5, 2.]))
+        fy = fx*fx if 1. > fx[1] else fx
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        cg.function([numpy.array([0.5, 3.])])
+        assert_raises(GuardError, cg.function, [numpy.array([0.5, 0.])])
+
+    def test_optimize_compile_save_load(self):
+        cg = self.trace(numpy.array([0.5, 2.]))
+        cg.optimize()
+        cg.compile()
+        assert_array_almost_equal([0.6, 4.], cg.gradient(numpy.array([0.3, 2.])))
+        assert_raises(GuardError, cg.gradient, numpy.array([3., 2.]))
+
+        path = os.path.join(Settings.output_dir, 'test_guards.cgraph')
+        cg.save(path)
+        cg2 = algopy.CGraph.load(path)
+        assert_equal(1, len(cg2.guardList))
+        assert_array_almost_equal([0.6, 4.], cg2.gradient(numpy.array([0.3, 2.])))
+        assert_raises(GuardError, cg2.gradient, numpy.array([3., 2.]))
+
+    def test_gradient_batch(self):
+        cg = self.trace(numpy.array([0.5, 2.]))
+        X = numpy.array([[0.3, 2.], [0.2, 1.]])
+        assert_array_almost_equal(2*X, cg.gradient_batch(X))
+
+        # one point of the batch takes the other branch
+        X = numpy.array([[0.3, 2.], [3., 2.], [0.2, 1.]])
+        assert_raises(GuardError, cg.gradient_batch, X)
+
+        cg = self.trace(numpy.array([2., 2.]))
+        X = numpy.array([[3., 2.], [0.5, 2.]])
+        assert_raises(GuardError, cg.gradient_batch, X)
+        assert_array_almost_equal(numpy.cos(X[:1]), cg.gradient_batch(X[:1]))
+
+    def test_liveness_checkpointing(self):
+        cg = self.trace(numpy.array([0.5, 2.]))
+        cg.analyze_liveness()
+        assert_raises(GuardError, cg.gradient, numpy.array([3., 2.]))
+
+        cg = self.trace(numpy.array([0.5, 2.]))
+        cg.checkpointing_on(1, nsegments=2)
+        assert_array_almost_equal([0.6, 4.], cg.gradient(numpy.array([0.3, 2.])))
+        assert_raises(GuardError, cg.gradient, numpy.array([3., 2.]))
+
+
+class Test_CGraph_profiling(TestCase):
+
+    def test_report_and_chrome_trace(self):
+        import json
+
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(3))
+        fy = algopy.sum(algopy.exp(fx) * algopy.sin(fx))
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        cg.gradient(numpy.ones(3))
+        profiler = cg.profiling_on()
+        cg.gradient(numpy.ones(3))
+        cg.compile()
+        cg.gradient(numpy.ones(3))
+        assert cg.profiling_off() is profiler
+
+        # nothing is recorded when profiling is turned off
+        cg.gradient(numpy.ones(3))
+
+        N = len(cg.functionList)
+        assert_equal(4*N, len(profiler.events))
+
+        summary = profiler.summary()
+        assert_equal(set(['Id', 'exp', 'sin', 'mul', 'sum']), set([op[0] for op in summary]))
+        assert_equal([2]*N, [op[1] for op in summary])
+        assert_equal(sorted([-op[2] - op[3] for op in summary]), [-op[2] - op[3] for op in summary])
+        assert_equal(N, len(profiler.hot_nodes()))
+        assert 'exp' in profiler.report()
+
+        path = os.path.join(Settings.output_dir, 'test_profiling.json')
+        profiler.save_chrome_trace(path)
+        with open(path) as f:
+            trace = json.load(f)
+        assert_equal(4*N, len(trace['traceEvents']))
+        assert_equal(set(['pushforward', 'pullback']),
+                     set([event['cat'] for event in trace['traceEvents']]))
+
+
+class Test_jit(TestCase):
+
+    def test_cache(self):
+        @algopy.jit(maxsize=2)
+        def f(x):
+            return algopy.sum(algopy.sin(x) * x)
+
+        x = numpy.random.rand(3)
+        assert_almost_equal(numpy.sum(numpy.sin(x)*x), f(x))
+        assert_array_almost_equal(numpy.sin(x) + x*numpy.cos(x), f.gradient(x))
+        assert_array_almost_equal(numpy.diag(2*numpy.cos(x) - x*numpy.sin(x)), f.hessian(x))
+        assert_equal((2, 1, 0, 2, 1), tuple(f.cache_info()))
+
+        # new shapes are traced, the least recently used CGraph is discarded
+        f.gradient(numpy.ones(4))
+        f.gradient(numpy.ones(5))
+        assert_equal((2, 3, 0, 2, 2), tuple(f.cache_info()))
+        f.gradient(x)
+        assert_equal((2, 4, 0, 2, 2), tuple(f.cache_info()))
+
+        f.cache_clear()
+        assert_equal((0, 0, 0, 2, 0), tuple(f.cache_info()))
+
+    def test_static_argnums(self):
+        @algopy.jit(static_argnums=(1,))
+        def f(x, n):
+            return x**n
+
+        x = numpy.array([1., 2.])
+        assert_array_almost_equal(numpy.diag(2*x), f.jacobian(x, 2))
+        assert_array_almost_equal(numpy.diag(3*x**2), f.jacobian(x, 3))
+        assert_array_almost_equal(numpy.diag(3*x**2), f.jacobian(x, 3))
+        assert_equal((1, 2), tuple(f.cache_info())[:2])
+
+    def test_retrace(self):
+        @algopy.jit
+        def f(x):
+            if x[0] < 1.:
+                return algopy.sum(x*x)
+            return algopy.sum(algopy.sin(x))
+
+        assert_array_almost_equal([1., 1.], f.gradient(numpy.array([0.5, 0.5])))
+        assert_array_almost_equal(numpy.cos([2., 2.]), f.gradient(numpy.array([2., 2.])))
+        assert_equal(1, f.cache_info().retraces)
+
+    def test_concurrent_calls(self):
+        import threading
+
+        @algopy.jit
+        def f(x):
+            return algopy.sum(algopy.sin(x) * x)
+
+        xs = [numpy.random.rand(50) for n in range(8)]
+        errors = []
+
+        def work(x):
+            for i in range(50):
+                g = f.gradient(x)
+                errors.append(numpy.max(numpy.abs(g - numpy.sin(x) - x*numpy.cos(x))))
+
+        threads = [threading.Thread(target=work, args=(x,)) for x in xs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert_equal(400, len(errors))
+        assert_almost_equal(0., max(errors))
+        assert_equal(1, f.cache_info().misses)
+
+    def test_retrace_respects_maxsize(self):
+        @algopy.jit(maxsize=2)
+        def f(x):
+            if x[0] < 1.:
+                return algopy.sum(x*x)
+            return algopy.sum(algopy.sin(x))
+
+        f.gradient(numpy.array([0.5, 0.5]))
+        f.gradient(numpy.ones(3))
+        # the re-traced CGraph becomes the most recently used one
+        f.gradient(numpy.array([2., 2.]))
+        f.gradient(numpy.ones(4))
+        assert_array_almost_equal(numpy.cos([2., 2.]), f.gradient(numpy.array([2., 2.])))
+        assert_equal((2, 3, 1, 2, 2), tuple(f.cache_info()))
+
+
+class Test_CGraph_sparse_jacobian(TestCase):
+
+    def test_banded(self):
+        N = 50
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fy = fx[1:-1]*fx[2:] + algopy.sin(fx[:-2])
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.random.rand(N)
+        S = cg.jacobian_sparsity(x)
+        assert_array_equal(numpy.eye(N-2, N, 0) + numpy.eye(N-2, N, 1) +
+                           numpy.eye(N-2, N, 2), S.toarray())
+
+        colors = algopy.tracer.sparsity.color_columns(S)
+        assert_equal(3, numpy.max(colors) + 1)
+
+        J = cg.sparse_jacobian(x)
+        assert_array_almost_equal(cg.jacobian(x), J.toarray())
+        assert_array_almost_equal(cg.jacobian(2*x), cg.sparse_jacobian(2*x, S).toarray())
+
+    def test_setitem_sum_dot(self):
+        N = 12
+        A = numpy.random.rand(3, 4)
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fz = algopy.zeros(N, dtype=fx)
+        fz[0] = fx[0]**2
+        fz[1:] = fx[1:]*fx[:-1]
+        fy = algopy.sum(fz.reshape((3,4)), axis=1) * algopy.sum(A * fx[4:8], axis=1)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.random.rand(N)
+        S = cg.jacobian_sparsity(x)
+        J = cg.jacobian(x)
+        assert_array_equal(J != 0, S.toarray())
+        assert_array_almost_equal(J, cg.sparse_jacobian(x).toarray())
+
+
+class Test_CGraph_sparse_hessian(TestCase):
+
+    def test_banded(self):
+        N = 50
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fy = algopy.sum(100*(fx[1:] - fx[:-1]**2)**2 + (1 - fx[:-1])**2)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.random.rand(N)
+        S = cg.hessian_sparsity(x)
+        assert_array_equal(numpy.eye(N, N, -1) + numpy.eye(N) + numpy.eye(N, N, 1),
+                           S.toarray())
+
+        colors = algopy.tracer.sparsity.star_color(S)
+        assert_equal(3, numpy.max(colors) + 1)
+
+        H = cg.sparse_hessian(x)
+        assert_array_almost_equal(cg.hessian(x), H.toarray())
+        assert_array_almost_equal(cg.hessian(2*x), cg.sparse_hessian(2*x, S).toarray())
+
+    def test_block_sparse(self):
+        N = 20
+        A = numpy.random.rand(4, 4)
+        cg = algopy.CGraph()
+        fx = algopy.Function(numpy.ones(N))
+        fz = algopy.zeros(N, dtype=fx)
+        fz[17:] = fx[17:]*fx[16:-1]
+        fB = fx[:8].reshape((2,4))
+        fy = algopy.sum(algopy.exp(fB[0]*fB[1])) + algopy.dot(fx[8:12], fx[12:16]) \
+             + algopy.sum(A*fx[16:]) + algopy.sum(fz[12:]**2)
+        cg.trace_off()
+        cg.independentFunctionList = [fx]
+        cg.dependentFunctionList = [fy]
+
+        x = numpy.random.rand(N)
+        S = cg.hessian_sparsity(x).toarray()
+        H = cg.hessian(x)
+        # the pattern is conservative, products that are not used are included
+        assert numpy.all(S[H != 0])
+        assert_array_equal(H[:16,:16] != 0, S[:16,:16])
+        assert_array_almost_equal(H, cg.sparse_hessian(x).toarray())
+
+    def test_star_coloring(self):
+        # a path on four vertices needs three colors
+        S = numpy.eye(4) + numpy.eye(4, 4, 1) + numpy.eye(4, 4, -1)
+        colors = algopy.tracer.sparsity.star_color(S)
+        assert_equal(3, numpy.max(colors) + 1)
+        assert_raises(ValueError, algopy.tracer.sparsity.recover_hessian,
+                      numpy.zeros((4, 2)), S, numpy.array([0, 1, 0, 1]))
+
+
 class Test_CGraph_Plotting(TestCase):
     def test_simple(self):
         cg = CGraph()
@@ -1,14 +1,38 @@
 import traceback
+import collections
+import functools
 import time
 import copy
+import threading
+import json
+import struct
+import importlib
+from multiprocessing.pool import ThreadPool
 
 import numpy
 import algopy
 import operator
+from numpy.lib.stride_tricks import as_strided
 from algopy.base_type import Ring
 
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 class PlotError(Exception): pass
 
+# raised by CGraph.pushforward when a recorded comparison (see Guard) flips
+class GuardError(Exception): pass
+
+# wall clock used by the Profiler
+timer = getattr(time, 'perf_counter', time.time)
+
 class NotSet:
     def __init__(self, descr=None):
         if descr is None:
@@ -20,6 +44,613 @@ class NotSet:
 def is_set(o):
     return not isinstance(o, NotSet)
 
+# default value of Function.xbar and Function.setitem
+not_set = NotSet()
+
+def is_reusable_xbar(x, xbar):
+    """
+    checks whether xbar can hold the bar value of x, i.e., whether
+    xbar is a UTPM instance (resp. a tuple of UTPM instances) with
+    the same shape and dtype as x
+    """
+    if isinstance(x, algopy.UTPM):
+        return isinstance(xbar, algopy.UTPM) and \
+               xbar.data.shape == x.data.shape and \
+               xbar.data.dtype == x.data.dtype
+
+    elif isinstance(x, tuple):
+        if not isinstance(xbar, tuple) or len(xbar) != len(x):
+            return False
+
+        for xi, xbari in zip(x, xbar):
+            if isinstance(xi, algopy.UTPM):
+                if not is_reusable_xbar(xi, xbari):
+                    return False
+            elif xbari is not None:
+                return False
+        return True
+
+    return False
+
+def bind_kernel(func, args):
+    """
+    returns the callable that func(*args) eventually dispatches to
+
+    The generic functions in algopy.globalfuncs (e.g. algopy.exp) look up
+    the class of their arguments on every call. Given the actual arguments,
+    this function performs that look up once, s.t. the returned callable
+    (e.g. UTPM.exp) can be called directly on arguments of the same types.
+    All other callables are returned unchanged.
+    """
+    name = getattr(func, '__name__', None)
+    if getattr(func, '__module__', None) != 'algopy.globalfuncs' or \
+       name not in algopy.globalfuncs.numpy_function_names:
+        return func
+
+    for a in args:
+        if hasattr(a.__class__, name):
+            return getattr(a.__class__, name)
+
+    return getattr(numpy, name)
+
+# The CGraph that records the function nodes (i.e. the one that is currently
+# tracing) is stored per thread and, if contextvars is available (Python >= 3.7),
+# per context, i.e., per asyncio task.
+if contextvars is not None:
+    _active_cgraph = contextvars.ContextVar('algopy_active_cgraph', default=None)
+
+    def get_active_cgraph():
+        """ returns the CGraph that is tracing in the current context (or None)"""
+        return _active_cgraph.get()
+
+    def set_active_cgraph(cg):
+        """ sets the CGraph that is tracing in the current context"""
+        _active_cgraph.set(cg)
+
+else:
+    _tracing_state = threading.local()
+
+    def get_active_cgraph():
+        """ returns the CGraph that is tracing in the current thread (or None)"""
+        return getattr(_tracing_state, 'cgraph', None)
+
+    def set_active_cgraph(cg):
+        """ sets the CGraph that is tracing in the current thread"""
+        _tracing_state.cgraph = cg
+
+def tracing():
+    """
+    Returns a new CGraph that records all operations on Function instances
+    in the current thread (resp. asyncio task).
+
+    Tracing in other threads or tasks is not affected, i.e., several threads
+    can trace different computational graphs at the same time.
+
+    Example:
+
+        with algopy.tracing() as cg:
+            x = algopy.Function(3.)
+            y = algopy.sin(x) * x
+
+        cg.independentFunctionList = [x]
+        cg.dependentFunctionList = [y]
+        print(cg.gradient(7.))
+
+    """
+    return CGraph()
+
+# PULLBACK_READS maps the name of a traced function to the values that
+# its pullback function pb_func(ybar, *args, y, out=...) reads:
+#
+#   'args'  the values of the Function arguments
+#   'out'   the value of the Function itself
+#
+# Functions that are not listed are assumed to read all values.
+PULLBACK_READS = {
+    'Id': (), 'add': (), 'sub': (), 'neg': (), 'negative': (),
+    'sum': (), 'trace': (), 'transpose': (), 'reshape': (),
+    'getitem': (), 'setitem': (),
+    'mul': ('args',), 'dot': ('args',), 'square': ('args',),
+    'log': ('args',), 'log1p': ('args',), 'sin': ('args',),
+    'cos': ('args',), 'reciprocal': ('args',), 'absolute': ('args',),
+    'exp': ('out',), 'sqrt': ('out',), 'inv': ('out',),
+}
+
+# names of the functions whose output may be a view of their first argument
+VIEW_FUNCS = ('getitem', '__getitem__', 'reshape', 'transpose')
+
+def binomial(n, k):
+    """
+    returns the binomial coefficient n over k
+    """
+    retval = 1
+    for i in range(min(k, n - k)):
+        retval = retval * (n - i) // (i + 1)
+    return retval
+
+def constant_key(c):
+    """
+    returns a hashable key of the constant argument c of a function node
+
+    Scalars, strings, slices and tuples thereof are compared by value,
+    all other objects (e.g. arrays) by identity.
+    """
+    if c is None or isinstance(c, (str, type)) or numpy.isscalar(c):
+        return (type(c), c)
+
+    elif isinstance(c, slice):
+        return (slice, c.start, c.stop, c.step)
+
+    elif isinstance(c, (tuple, list)):
+        return (type(c),) + tuple([constant_key(ci) for ci in c])
+
+    elif isinstance(c, Function):
+        return (Function, id(c))
+
+    return ('id', id(c))
+
+def placeholder_like(x):
+    """
+    returns a UTPM instance with the same shape and dtype as x that does not
+    hold memory proportional to its size
+
+    The placeholder is a read-only view with zero strides on a single zero.
+    It is used to release the value of a function node that is not needed
+    by the reverse sweep, while the shape information is retained.
+    """
+    data = numpy.zeros(1, dtype=x.data.dtype)
+    data = as_strided(data, shape=x.data.shape, strides=(0,)*x.data.ndim)
+    data.flags.writeable = False
+    return x.__class__(data)
+
+def nbytes_of(x):
+    """
+    returns the number of bytes of memory owned by the value x of a function node
+    """
+    if isinstance(x, tuple):
+        return sum([nbytes_of(xi) for xi in x])
+
+    if isinstance(x, algopy.UTPM):
+        return x.data.nbytes if x.owndata else 0
+
+    if isinstance(x, numpy.ndarray) and x.flags['OWNDATA']:
+        return x.nbytes
+
+    return 0
+
+# FUSABLE_FUNCS maps the name of an elementwise unary function to the names
+# of the UTPM algorithms that compute it and its pullback
+FUSABLE_FUNCS = {
+    'neg': ('_negative', '_pb_negative'),
+    'negative': ('_negative', '_pb_negative'),
+    'exp': ('_exp', '_pb_exp'),
+    'expm1': ('_expm1', '_pb_expm1'),
+    'log': ('_log', '_pb_log'),
+    'log1p': ('_log1p', '_pb_log1p'),
+    'sqrt': ('_sqrt', '_pb_sqrt'),
+    'square': ('_square', '_pb_square'),
+    'reciprocal': ('_reciprocal', '_pb_reciprocal'),
+}
+
+class FusedFunction:
+    """
+    The composition y = funcs[-1](...funcs[1](funcs[0](x))) of elementwise
+    unary functions, e.g. y = log1p(exp(neg(x))), as a single function.
+
+    For UTPM instances, the algorithms of the functions (e.g. UTPM._exp)
+    are called directly on the Taylor coefficients. The intermediate
+    values are written into two temporary buffers that are reused along
+    the chain, i.e. no UTPM instances are created for them.
+
+    The pullback recomputes the intermediate values and applies the
+    pullback algorithms (e.g. UTPM._pb_exp) in reverse order.
+    """
+
+    def __init__(self, funcs):
+        self.funcs = funcs
+        self.__name__ = 'fused_' + '_'.join([f.__name__ for f in funcs])
+        self.names = [FUSABLE_FUNCS[f.__name__] for f in funcs]
+
+    def __call__(self, x):
+        if not isinstance(x, algopy.UTPM):
+            for f in self.funcs:
+                x = f(x)
+            return x
+
+        cls = x.__class__
+        x_data = x.data
+        tmp = [numpy.empty_like(x_data), numpy.empty_like(x_data)]
+        for k, (name, pb_name) in enumerate(self.names[:-1]):
+            x_data = getattr(cls, name)(x_data, out = tmp[k % 2])
+
+        y_data = numpy.empty_like(x_data)
+        getattr(cls, self.names[-1][0])(x_data, out = y_data)
+        return cls(y_data)
+
+    def pullback(self, ybar, x, y, out = None):
+        """
+        computes bar y dy = bar x dx of the composition in UTP arithmetic
+        """
+        if out is None:
+            xbar = x.zeros_like()
+
+        else:
+            xbar, = out
+
+        cls = x.__class__
+        values = [x.data]
+        for name, pb_name in self.names[:-1]:
+            values.append(getattr(cls, name)(values[-1], out = numpy.empty_like(x.data)))
+        values.append(y.data)
+
+        vbar_data = ybar.data
+        for k in range(len(self.names) - 1, -1, -1):
+            if k == 0:
+                tmp = xbar.data
+            else:
+                tmp = numpy.zeros_like(x.data)
+            getattr(cls, self.names[k][1])(vbar_data, values[k], values[k+1], out = tmp)
+            vbar_data = tmp
+
+        return xbar
+
+class Tape:
+    """
+    Struct-of-arrays representation of the function nodes of a CGraph,
+    generated by CGraph.compile.
+
+    The function node at position nf of cg.functionList is represented by
+
+        * ops[opcode[nf]]                       the function
+        * arg_idx[arg_ptr[nf]:arg_ptr[nf+1]]    the arguments
+        * kwargs[nf]                            the keyword arguments
+        * values[nf]                            the value (replay cache)
+        * adjoints[nf]                          the bar value workspace
+
+    Arguments that are function nodes are referred to by their position
+    nf >= 0, constant arguments by negative positions, i.e.,
+    values[arg_idx[k]] is the k-th argument in both cases, since the
+    constants are stored in reverse order at the end of values.
+
+    values and adjoints are caches, not the store of the function nodes.
+    f.x and f.xbar of the Function instances in cg.functionList remain the
+    values and bar values of the CGraph. values is only updated by the
+    replay of the plan (CGraph._replay), not by profiled or checkpointed
+    sweeps. adjoints[nf] is the bar value that the reverse sweeps reuse.
+    It is None for nodes whose bar value is not reusable, e.g. a view of
+    the bar value of an argument.
+    """
+
+    def __init__(self, functionList):
+        index = {}
+        for nf, f in enumerate(functionList):
+            index[id(f)] = nf
+
+        self.ops = []
+        opcodes = {}
+        opcode = []
+        arg_ptr = [0]
+        arg_idx = []
+        consts = []
+        for f in functionList:
+            if f.func not in opcodes:
+                opcodes[f.func] = len(self.ops)
+                self.ops.append(f.func)
+            opcode.append(opcodes[f.func])
+
+            for a in f.args:
+                if isinstance(a, Function):
+                    arg_idx.append(index[id(a)])
+                else:
+                    consts.append(a)
+                    arg_idx.append(-len(consts))
+            arg_ptr.append(len(arg_idx))
+
+        N = len(functionList)
+        self.opcode = numpy.asarray(opcode, dtype=numpy.int32)
+        self.arg_ptr = numpy.asarray(arg_ptr, dtype=numpy.intp)
+        self.arg_idx = numpy.asarray(arg_idx, dtype=numpy.intp)
+        self.kwargs = [f.kwargs for f in functionList]
+        self.values = [f.x for f in functionList] + consts[::-1]
+        self.adjoints = [None]*N
+
+        # the value of an identity node is set by pushforward or
+        # is a constant, i.e., there is nothing to be computed
+        Id = opcodes.get(Function.Id, -1)
+        self.steps = numpy.nonzero(self.opcode != Id)[0]
+        self.inputs = numpy.nonzero(self.opcode == Id)[0].tolist()
+
+    def nbytes(self):
+        """
+        returns the number of bytes of the arrays that store the topology
+        """
+        return self.opcode.nbytes + self.arg_ptr.nbytes + self.arg_idx.nbytes + \
+               self.steps.nbytes
+
+# binary format of CGraph.save:
+#
+#   magic (8 bytes) | header length (uint64) | JSON header | arrays
+#
+# the arrays are stored in C order and aligned to ARRAY_ALIGNMENT bytes,
+# s.t. CGraph.load can map them into memory
+CGRAPH_MAGIC = b'ALGOPYCG'
+CGRAPH_FORMAT_VERSION = 1
+ARRAY_ALIGNMENT = 64
+
+# names of the comparison operators that are recorded as guards
+COMPARISONS = {'lt': operator.lt, 'le': operator.le,
+               'gt': operator.gt, 'ge': operator.ge}
+
+class Guard:
+    """
+    Outcome of the comparison op(lhs, rhs) of function values at trace time.
+
+    The traced function may have taken a different branch if the comparison
+    has a different outcome for other inputs. Therefore, the computational
+    graph is only valid as long as all its guards hold.
+
+    The guard is checked by CGraph.pushforward right after the function node
+    at position `position` has been evaluated, i.e., the last function node
+    that had been recorded when the comparison was made.
+    """
+
+    __slots__ = ('op', 'lhs', 'rhs', 'outcome', 'position')
+
+    def __init__(self, op, lhs, rhs, outcome, position):
+        self.op = op
+        self.lhs = lhs
+        self.rhs = rhs
+        self.outcome = outcome
+        self.position = position
+
+    def evaluate(self):
+        lhs = self.lhs.x if isinstance(self.lhs, Function) else self.lhs
+        rhs = self.rhs.x if isinstance(self.rhs, Function) else self.rhs
+        return self.op(lhs, rhs)
+
+    def holds(self):
+        lhs = self.lhs.x if isinstance(self.lhs, Function) else self.lhs
+        rhs = self.rhs.x if isinstance(self.rhs, Function) else self.rhs
+        if not isinstance(lhs, algopy.UTPM) and not isinstance(rhs, algopy.UTPM):
+            return numpy.array_equal(self.op(lhs, rhs), self.outcome)
+
+        # the comparison of UTPM instances reduces over all directions P, but
+        # e.g. in CGraph.gradient_batch each direction is another point,
+        # hence the outcome has to be the same for each direction
+        lhs = lhs.data[0] if isinstance(lhs, algopy.UTPM) else lhs
+        rhs = rhs.data[0] if isinstance(rhs, algopy.UTPM) else rhs
+        outcome = numpy.asarray(self.op(lhs, rhs))
+        if numpy.ndim(self.outcome) == 0:
+            outcome = outcome.reshape((outcome.shape[0], -1)).all(axis=1)
+        return bool(numpy.all(outcome == self.outcome))
+
+    def __str__(self):
+        operand = lambda a: 'node %d'%a.ID if isinstance(a, Function) else repr(a)
+        return '%s(%s, %s) == %s'%(self.op.__name__, operand(self.lhs),
+                                    operand(self.rhs), self.outcome)
+
+def value_layout(x):
+    """
+    returns (D, P, shape) of the value x of a function node, where D and P
+    are None if x is not a UTPM instance
+    """
+    if isinstance(x, tuple):
+        return [value_layout(xi) for xi in x]
+    if isinstance(x, algopy.UTPM):
+        return (x.data.shape[0], x.data.shape[1], tuple(x.shape))
+    return (None, None, tuple(numpy.shape(x)))
+
+class Profiler:
+    """
+    Records the cost of each function node that is evaluated by
+    CGraph.pushforward or CGraph.pullback (see CGraph.profiling_on).
+
+    Each event is a tuple
+
+        (phase, nf, name, start, duration, nbytes, layout)
+
+    where phase is 'pushforward' or 'pullback', nf is the position of the
+    function node, name the name of its function, start and duration the
+    wall time in seconds, nbytes the number of bytes owned by the value of the
+    function node and layout its (D, P, shape) (see value_layout).
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, phase, nf, f, start, duration):
+        self.events.append((phase, nf, f.func.__name__, start, duration,
+                            nbytes_of(f.x), value_layout(f.x)))
+
+    def clear(self):
+        self.events = []
+
+    def summary(self):
+        """
+        returns a list of (name, calls, pushforward time, pullback time, nbytes)
+        for each function, ranked by the total time
+        """
+        ops = {}
+        for phase, nf, name, start, duration, nbytes, layout in self.events:
+            op = ops.setdefault(name, [name, 0, 0., 0., 0])
+            if phase == 'pushforward':
+                op[1] += 1
+                op[2] += duration
+                op[4] += nbytes
+            else:
+                op[3] += duration
+
+        return sorted([tuple(op) for op in ops.values()], key=lambda op: -(op[2] + op[3]))
+
+    def hot_nodes(self, n=10):
+        """
+        returns a list of (nf, name, pushforward time, pullback time, layout)
+        of the n function nodes with the largest total time
+        """
+        nodes = {}
+        for phase, nf, name, start, duration, nbytes, layout in self.events:
+            node = nodes.setdefault(nf, [nf, name, 0., 0., layout])
+            node[2 if phase == 'pushforward' else 3] += duration
+
+        return sorted([tuple(node) for node in nodes.values()],
+                      key=lambda node: -(node[2] + node[3]))[:n]
+
+    def report(self, n=10):
+        """
+        returns the per-function summary and the n hottest function nodes
+        as a string
+        """
+        total = sum([event[4] for event in self.events]) or 1.
+
+        retval  = 'function                 calls  pushforward [s]  pullback [s]     %     bytes\n'
+        for name, calls, tf, tr, nbytes in self.summary():
+            retval += '%-22s %7d  %15.6f  %12.6f  %5.1f  %8d\n'%(
+                name[:22], calls, tf, tr, 100.*(tf + tr)/total, nbytes)
+
+        retval += '\nnode  function                 pushforward [s]  pullback [s]  (D, P, shape)\n'
+        for nf, name, tf, tr, layout in self.hot_nodes(n):
+            retval += '%4d  %-22s %15.6f  %12.6f  %s\n'%(nf, name[:22], tf, tr, layout)
+        return retval
+
+    def chrome_trace(self):
+        """
+        returns the events in the Chrome trace event format, i.e., a dict
+        that can be saved as JSON and loaded by chrome://tracing or Perfetto
+        """
+        t0 = min([event[3] for event in self.events] or [0.])
+        trace_events = []
+        for phase, nf, name, start, duration, nbytes, layout in self.events:
+            trace_events.append({'name': name, 'cat': phase, 'ph': 'X',
+                                 'ts': 1e6*(start - t0), 'dur': 1e6*duration,
+                                 'pid': 0, 'tid': 0 if phase == 'pushforward' else 1,
+                                 'args': {'node': nf, 'bytes': nbytes, 'layout': str(layout)}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+def callable_to_name(func):
+    """
+    returns the identifier 'module:qualified name' of func,
+    e.g. 'algopy.globalfuncs:exp' or 'operator:add'
+    """
+    if isinstance(func, FusedFunction):
+        return {'fused': [callable_to_name(f) for f in func.funcs]}
+
+    module = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+
+    if qualname is None:
+        # Python 2: bound classmethods, e.g. Function.Id
+        qualname = func.__name__
+        owner = getattr(func, '__self__', None)
+        if isinstance(owner, type):
+            qualname = owner.__name__ + '.' + qualname
+
+    if module is None:
+        owner = getattr(func, '__self__', None)
+        module = getattr(owner, '__module__', None) or getattr(owner, '__name__', None)
+
+    name = '%s:%s'%(module, qualname)
+    try:
+        if name_to_callable(name) != func:
+            raise ValueError
+    except Exception:
+        raise ValueError('cannot save the function %r, it cannot be imported by its name %s'%(func, name))
+    return name
+
+def name_to_callable(name):
+    """
+    inverse of callable_to_name
+    """
+    if isinstance(name, dict):
+        return FusedFunction([name_to_callable(n) for n in name['fused']])
+
+    module, qualname = name.split(':')
+    retval = importlib.import_module(module)
+    for attr in qualname.split('.'):
+        retval = getattr(retval, attr)
+    return retval
+
+def encode_constant(c, arrays):
+    """
+    returns a JSON compatible representation of the constant c
+
+    Arrays, UTPM instances and numpy scalars are appended to the list arrays
+    and referred to by their position.
+    """
+    if c is None or isinstance(c, (bool, str)) or type(c) in (int, float):
+        return c
+
+    elif isinstance(c, algopy.UTPM):
+        arrays.append(numpy.ascontiguousarray(c.data))
+        return {'utpm': len(arrays) - 1, 'class': callable_to_name(c.__class__)}
+
+    elif isinstance(c, (numpy.ndarray, numpy.generic, complex)) or numpy.isscalar(c):
+        a = numpy.asarray(c)
+        if a.dtype == object:
+            raise ValueError('cannot save arrays of dtype object')
+        arrays.append(numpy.ascontiguousarray(a).reshape(a.shape))
+        return {'array': len(arrays) - 1, 'scalar': a.ndim == 0 and not isinstance(c, numpy.ndarray)}
+
+    elif isinstance(c, tuple):
+        return {'tuple': [encode_constant(ci, arrays) for ci in c]}
+
+    elif isinstance(c, list):
+        return {'list': [encode_constant(ci, arrays) for ci in c]}
+
+    elif isinstance(c, slice):
+        return {'slice': [encode_constant(ci, arrays) for ci in (c.start, c.stop, c.step)]}
+
+    elif c is Ellipsis:
+        return {'ellipsis': None}
+
+    elif isinstance(c, numpy.dtype):
+        return {'dtype': c.str}
+
+    elif isinstance(c, type):
+        return {'type': callable_to_name(c)}
+
+    elif isinstance(c, dict):
+        return {'dict': [[k, encode_constant(v, arrays)] for k, v in c.items()]}
+
+    elif isinstance(c, NotSet):
+        return {'notset': None}
+
+    raise ValueError('cannot save the constant %r of type %s'%(c, type(c)))
+
+def decode_constant(c, arrays):
+    """
+    inverse of encode_constant
+    """
+    if not isinstance(c, dict):
+        return c
+
+    key, val = [(k, v) for k, v in c.items() if k not in ('class', 'scalar')][0]
+    if key == 'utpm':
+        return name_to_callable(c['class'])(arrays[val])
+    elif key == 'array':
+        return arrays[val][()] if c['scalar'] else arrays[val]
+    elif key == 'tuple':
+        return tuple([decode_constant(ci, arrays) for ci in val])
+    elif key == 'list':
+        return [decode_constant(ci, arrays) for ci in val]
+    elif key == 'slice':
+        return slice(*[decode_constant(ci, arrays) for ci in val])
+    elif key == 'ellipsis':
+        return Ellipsis
+    elif key == 'dtype':
+        return numpy.dtype(val)
+    elif key == 'type':
+        return name_to_callable(val)
+    elif key == 'dict':
+        return dict([(k, decode_constant(v, arrays)) for k, v in val])
+    elif key == 'notset':
+        return not_set
+
+    raise ValueError('unknown constant %r'%c)
+
 class CGraph:
     """
     The CGraph (short for Computational Graph) represents a computational
@@ -53,6 +684,20 @@ class CGraph:
         self.functionList = []
         self.dependentFunctionList = []
         self.independentFunctionList = []
+        self.guardList = []
+        self._guards_at = None
+        self._plan = None
+        self._adjoints = None
+        self._release_after = None
+        self._released = {}
+        self._checkpoint_marks = []
+        self._segments = None
+        self._snapshots = {}
+        self._jacobian_costs = None
+        self._gradient_workspace = None
+        self._profiler = None
+        self._enclosing = Function.cgraph
+        self._outer = []
         Function.cgraph = self
 
     def trace_on(self):
@@ -63,9 +708,72 @@ class CGraph:
         Function.cgraph = None
         return self
 
+    def __enter__(self):
+        # when the CGraph has been created right before, e.g. in
+        # `with algopy.CGraph() as cg:`, the CGraph that was tracing
+        # before its creation is restored by __exit__
+        outer = Function.cgraph
+        if outer is self:
+            outer = self._enclosing
+        self._outer.append(outer)
+        Function.cgraph = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        Function.cgraph = self._outer.pop()
+        return False
+
     def append(self, func):
         self.functionCount += 1
         self.functionList.append(func)
+        self._plan = None
+        self._release_after = None
+        self._segments = None
+        self._jacobian_costs = None
+
+    def add_guard(self, guard):
+        """
+        records a comparison of function values (see Guard)
+        """
+        self.guardList.append(guard)
+        self._guards_at = None
+
+    def _guard_positions(self):
+        """
+        returns a dict that maps the position nf of a function node to the
+        guards that are checked after the node has been evaluated
+        """
+        if self._guards_at is None:
+            self._guards_at = {}
+            for guard in self.guardList:
+                self._guards_at.setdefault(guard.position, []).append(guard)
+        return self._guards_at
+
+    def _check_guards(self, guards):
+        for guard in guards:
+            if not guard.holds():
+                raise GuardError('the comparison %s recorded during tracing does not hold, '
+                                 'the computational graph has to be traced again'%guard)
+
+    def _guard_operands(self):
+        """
+        returns the list of function nodes that are compared by guards
+        """
+        return [a for guard in self.guardList for a in (guard.lhs, guard.rhs)
+                if isinstance(a, Function)]
+
+    def mark_checkpoint(self):
+        """
+        marks the current position of the tracer as a boundary of a
+        segment of the computational graph, e.g., at the end of each
+        iteration of a time-stepping loop
+
+        The segments are used by CGraph.checkpointing_on.
+        """
+        n = len(self.functionList)
+        if n not in self._checkpoint_marks:
+            self._checkpoint_marks.append(n)
+        return self
 
     def __str__(self):
         retval = '\n\n'
@@ -98,21 +806,809 @@ class CGraph:
 
         At first, the arguments of the global functions are read into the independent functions.
         Then the computational graph is walked and at each function node
+
+        If the CGraph has been compiled (see CGraph.compile), the precomputed
+        execution plan is replayed instead.
+
+        If CGraph.analyze_liveness has been called, the values that are not
+        needed by the reverse sweep are released right after their last use.
+
+        If CGraph.checkpointing_on has been called, only the checkpoints
+        are stored (see CGraph.checkpointing_on).
+
+        If CGraph.profiling_on has been called, the function nodes are
+        evaluated one by one (also if the CGraph has been compiled) and the
+        cost of each node is recorded (see Profiler).
         """
         # populate independent arguments with new values
         for nf,f in enumerate(self.independentFunctionList):
             f.args[0].x = x_list[nf]
 
+        self._released = {}
+
+        if self._segments is not None:
+            return self._checkpointed_pushforward()
+
+        if self._plan is not None and self._profiler is None:
+            return self._replay(x_list)
+
+        release_after = self._release_after
+        guards = self._guard_positions()
+        evaluate = self._evaluate if self._profiler is None else self._profiled_evaluate
+
         # traverse the computational tree
         for nf,f in enumerate(self.functionList):
+            evaluate(nf)
+
+            if nf in guards:
+                self._check_guards(guards[nf])
+
+            if release_after is not None:
+                for nr in release_after[nf]:
+                    self._release(nr)
+
+    def _evaluate(self, nf):
+        """
+        computes the value of the function node self.functionList[nf]
+        """
+        f = self.functionList[nf]
+        try:
+            f.__class__.pushforward(f.func, f.args, Fout = f)
+        except Exception as e:
+            err_str = 'pushforward of node %d failed (%s)'%(nf,f.func.__name__)
+            err_str += 'reported error is:\n%s'%e
+            err_str += 'traceback:\n%s'%traceback.format_exc()
+
+            raise Exception(err_str)
+
+    def _profiled_evaluate(self, nf):
+        """
+        computes the value of the function node self.functionList[nf] and
+        records the elapsed time in the profiler
+        """
+        start = timer()
+        self._evaluate(nf)
+        self._profiler.record('pushforward', nf, self.functionList[nf], start, timer() - start)
+
+    def profiling_on(self, profiler=None):
+        """
+        Turns on profiling of CGraph.pushforward and CGraph.pullback, i.e.,
+        the wall time, the number of bytes of the value and the shape of
+        the value of each evaluated function node are recorded.
+
+        Returns the Profiler that records the function nodes.
+
+        Example:
+
+            profiler = cg.profiling_on()
+            for i in range(10):
+                cg.gradient(x)
+            cg.profiling_off()
+
+            print(profiler.report())
+            profiler.save_chrome_trace('gradient.json')
+
+        """
+        if profiler is None:
+            profiler = Profiler()
+        self._profiler = profiler
+        return profiler
+
+    def profiling_off(self):
+        """
+        Turns off profiling and returns the Profiler (or None).
+        """
+        profiler = self._profiler
+        self._profiler = None
+        return profiler
+
+    def compile(self):
+        """
+        Turns the recorded computational graph into a flat execution plan
+        that is used by all subsequent calls of CGraph.pushforward.
+
+        The plan is a Tape, i.e., a struct-of-arrays representation that
+        stores for each function node an opcode, the positions of its
+        arguments and its value and bar value, s.t. no isinstance checks
+        have to be performed when the plan is replayed. Additionally, the
+        UTPM kernel of each node (e.g. UTPM.exp instead of the generic
+        algopy.exp) is bound on the first replay for a given combination
+        of input types and reused afterwards.
+
+        The plan is discarded as soon as a new function node is appended,
+        i.e., when tracing is continued.
+
+        Example:
+
+            cg = algopy.CGraph()
+            x = algopy.Function([1.,2.])
+            y = algopy.sum(algopy.exp(x))
+            cg.trace_off()
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            cg.compile()
+
+            for i in range(1000):
+                g = cg.gradient(numpy.random.rand(2))
+
+        """
+
+        self._plan = Tape(self.functionList)
+        self._adjoints = self._plan.adjoints
+        self._kernels = {}
+        return self
+
+    def _replay(self, x_list):
+        """
+        replays the execution plan generated by CGraph.compile
+        """
+
+        tape = self._plan
+        fl = self.functionList
+        values = tape.values
+        guards = self._guard_positions()
+        for nf in tape.inputs:
+            values[nf] = fl[nf].x
+            if nf in guards:
+                self._check_guards(guards[nf])
+
+        ops = tape.ops
+        opcode = tape.opcode.tolist()
+        ptr = tape.arg_ptr.tolist()
+        idx = tape.arg_idx.tolist()
+        release_after = self._release_after
+        key = tuple(x.__class__ for x in x_list)
+        kernels = self._kernels.get(key)
+        bind = kernels is None
+        if bind:
+            kernels = []
+
+        nf = 0
+        try:
+            for nk, nf in enumerate(tape.steps.tolist()):
+                args = [values[i] for i in idx[ptr[nf]:ptr[nf+1]]]
+
+                if bind:
+                    kernels.append(bind_kernel(ops[opcode[nf]], args))
+
+                out = kernels[nk](*args, **tape.kwargs[nf])
+                values[nf] = out
+                fl[nf].x = out
+
+                if nf in guards:
+                    self._check_guards(guards[nf])
+
+                if release_after is not None:
+                    for nr in release_after[nf]:
+                        self._release(nr)
+                        values[nr] = fl[nr].x
+
+        except GuardError:
+            raise
+
+        except Exception as e:
+            f = fl[nf]
+            err_str = 'pushforward of node %d failed (%s)'%(nf,f.func.__name__)
+            err_str += 'reported error is:\n%s'%e
+            err_str += 'traceback:\n%s'%traceback.format_exc()
+
+            raise Exception(err_str)
+
+        if bind:
+            self._kernels[key] = kernels
+
+    def optimize(self):
+        """
+        Simplifies the computational graph by the following passes:
+
+            1) common-subexpression elimination, i.e., function nodes that
+               apply the same function to the same arguments (and keyword
+               arguments) are computed only once
+            2) constant folding, i.e., function nodes that do not depend
+               on an independent function are replaced by constants
+            3) dead-node elimination, i.e., function nodes that are not
+               needed to compute the dependent functions are removed
+
+        Function nodes that modify buffers by setitem, the buffers themselves
+        and function nodes that read from these buffers are not
+        eliminated or folded.
+
+        The independent and dependent functions must be set before.
+
+        Returns a report with the number of function nodes before and after
+        the optimization.
+
+        Example:
+
+            cg = algopy.CGraph()
+            X = algopy.Function(numpy.random.rand(3,2))
+            y = algopy.sum(algopy.dot(X.T, X)) + algopy.trace(algopy.dot(X.T, X))
+            cg.trace_off()
+            cg.independentFunctionList = [X]
+            cg.dependentFunctionList = [y]
+            print(cg.optimize())
+
+        """
+
+        if len(self.dependentFunctionList) == 0:
+            raise Exception('You forgot to specify which variables are dependent!\n'\
+                            ' e.g. with cg.dependentFunctionList = [F1,F2]')
+
+        fl = self.functionList
+        N = len(fl)
+        index = {}
+        for nf, f in enumerate(fl):
+            index[id(f)] = nf
+
+        mutable = self._mutable(index)
+
+        def fixed(nf):
+            f = fl[nf]
+            return f.func == Function.Id or is_set(f.setitem) or nf in mutable or \
+                [a for a in f.args if isinstance(a, Function) and index[id(a)] in mutable]
+
+        # STEP 1: common-subexpression elimination
+        replace = {}
+        seen = {}
+        for nf, f in enumerate(fl):
+            f.args = [replace.get(id(a), a) if isinstance(a, Function) else a for a in f.args]
+            if fixed(nf):
+                continue
+
             try:
-                f.__class__.pushforward(f.func, f.args, Fout = f)
-            except Exception as e:
-                err_str = 'pushforward of node %d failed (%s)'%(nf,f.func.__name__)
-                err_str += 'reported error is:\n%s'%e
-                err_str += 'traceback:\n%s'%traceback.format_exc()
+                key = (f.func, tuple([('F', index[id(a)]) if isinstance(a, Function) \
+                                      else constant_key(a) for a in f.args]),
+                       tuple(sorted([(k, constant_key(v)) for k, v in f.kwargs.items()])))
+                g = seen.setdefault(key, f)
+            except TypeError:
+                continue
+
+            if g is not f:
+                replace[id(f)] = g
+
+        self.dependentFunctionList = [replace.get(id(f), f) for f in self.dependentFunctionList]
+        for guard in self.guardList:
+            guard.lhs = replace.get(id(guard.lhs), guard.lhs)
+            guard.rhs = replace.get(id(guard.rhs), guard.rhs)
+        Ncse = len(replace)
+
+        # STEP 2: constant folding
+        variable = set([index[id(f)] for f in self.independentFunctionList])
+        Nfolded = 0
+        for nf, f in enumerate(fl):
+            if id(f) in replace:
+                continue
+
+            if nf in mutable or is_set(f.setitem) or \
+               [a for a in f.args if isinstance(a, Function) and index[id(a)] in variable]:
+                variable.add(nf)
+
+            elif not fixed(nf) and f.x is not None and nf not in self._released:
+                f.func = Function.Id
+                f.args = [f]
+                f.kwargs = {}
+                Nfolded += 1
+
+        # STEP 3: dead-node elimination
+        live = set([index[id(f)] for f in self.independentFunctionList + \
+                    self.dependentFunctionList + self._guard_operands()])
+        for nf, f in enumerate(fl):
+            if is_set(f.setitem):
+                live.add(nf)
+
+        for nf in range(N - 1, -1, -1):
+            if nf in live:
+                for a in fl[nf].args:
+                    if isinstance(a, Function):
+                        live.add(index[id(a)])
+
+        kept = [nf for nf in range(N) if nf in live and id(fl[nf]) not in replace]
+        Ndead = N - Ncse - len(kept)
+
+        self._renumber(kept)
+
+        retval  = 'common-subexpression elimination : removed %d nodes\n'%Ncse
+        retval += 'constant folding                 : folded %d nodes\n'%Nfolded
+        retval += 'dead-node elimination            : removed %d nodes\n'%Ndead
+        retval += 'number of function nodes         : %d -> %d\n'%(N, self.functionCount)
+        return retval
 
-                raise Exception(err_str)
+    def fuse(self):
+        """
+        Collapses chains of elementwise unary functions, e.g.
+
+            y = log1p(exp(-x))
+
+        into a single function node (see FusedFunction). The values of
+        the inner function nodes are then neither stored in the computational
+        graph nor allocated separately during CGraph.pushforward.
+
+        A function node is an inner node of a chain if it is the only
+        argument of the next function of the chain, it is not used by any
+        other function node and it is not a dependent or independent function.
+        The supported functions are listed in FUSABLE_FUNCS.
+
+        Returns a report with the number of function nodes before and after
+        the fusion.
+
+        Example:
+
+            cg = algopy.CGraph()
+            x = algopy.Function(numpy.ones(3))
+            y = algopy.sum(algopy.log1p(algopy.exp(-x)))
+            cg.trace_off()
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            print(cg.fuse())
+
+        """
+
+        fl = self.functionList
+        N = len(fl)
+        index, last_use = self._dataflow()
+        mutable = self._mutable(index)
+
+        fixed = set([index[id(f)] for f in self.independentFunctionList + \
+                                            self.dependentFunctionList + \
+                                            self._guard_operands()])
+
+        def fusable(nf):
+            f = fl[nf]
+            return f.func.__name__ in FUSABLE_FUNCS and len(f.args) == 1 and \
+                isinstance(f.args[0], Function) and len(f.kwargs) == 0 and \
+                not is_set(f.setitem) and nf not in mutable and \
+                index[id(f.args[0])] not in mutable
+
+        fused = set()
+        Nchains = 0
+        for nf in range(N):
+            if not fusable(nf) or nf in fixed or len(self._consumers[nf]) != 1:
+                continue
+
+            # nf is the inner node of a chain if its consumer is fusable
+            nc = index[id(self._consumers[nf][0])]
+            if not fusable(nc):
+                continue
+
+            # only the last node of each chain is transformed
+            chain = [nf]
+            while nc not in fixed and len(self._consumers[nc]) == 1 and \
+                  fusable(index[id(self._consumers[nc][0])]):
+                chain.append(nc)
+                nc = index[id(self._consumers[nc][0])]
+
+            if chain[0] in fused:
+                continue
+
+            funcs = [fl[n].func for n in chain] + [fl[nc].func]
+            fl[nc].func = FusedFunction(funcs)
+            fl[nc].args = fl[chain[0]].args
+            fused.update(chain)
+            Nchains += 1
+
+        self._renumber([nf for nf in range(N) if nf not in fused])
+
+        retval  = 'fused chains             : %d\n'%Nchains
+        retval += 'number of function nodes : %d -> %d\n'%(N, self.functionCount)
+        return retval
+
+    def _renumber(self, kept):
+        """
+        keeps only the function nodes self.functionList[nf] for nf in kept,
+        renumbers them and discards all data that depends on the numbering
+        """
+        fl = self.functionList
+        self.functionList = [fl[nf] for nf in kept]
+        for nf, f in enumerate(self.functionList):
+            f.ID = nf
+        self.functionCount = len(self.functionList)
+        self._checkpoint_marks = sorted(set([len([nf for nf in kept if nf < m]) \
+                                             for m in self._checkpoint_marks]))
+
+        # a guard is checked after the last kept node that precedes it
+        for guard in self.guardList:
+            guard.position = max(len([nf for nf in kept if nf <= guard.position]) - 1, 0)
+        self._guards_at = None
+
+        self._plan = None
+        self._adjoints = None
+        self._release_after = None
+        self._released = {}
+        self._segments = None
+        self._snapshots = {}
+        self._jacobian_costs = None
+
+    def analyze_liveness(self, release=True):
+        """
+        Determines which values of the function nodes are needed by the
+        reverse sweep and releases all other values as early as possible.
+
+        E.g. the pullback of z = x + y needs neither the value of x nor
+        the value of y, whereas the pullback of z = x * y needs both.
+        See PULLBACK_READS for the values read by each pullback function.
+
+        A value is released after its last use in the forward sweep if
+
+            * it is not the value of an independent or dependent function
+            * it is not read by the pullback of the node itself or of any
+              node that uses it as argument
+            * it is not modified by setitem
+            * it is a UTPM instance that is not a view of the value of an
+              argument and no other value is a view of it
+
+        A released value is replaced by a placeholder with the same shape
+        and dtype (see placeholder_like). The values of the current
+        computational graph are released immediately and during all
+        subsequent calls of CGraph.pushforward.
+
+        Use CGraph.memory_report to show how much memory has been released.
+
+        Parameters
+        ----------
+
+        release: bool
+            if False, values are kept again by subsequent calls of
+            CGraph.pushforward
+
+        Example:
+
+            cg = algopy.CGraph()
+            x = algopy.Function([1.,2.])
+            y = algopy.sum(algopy.sin(x) + x)
+            cg.trace_off()
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            cg.analyze_liveness()
+
+            g = cg.gradient([3.,4.])
+            print(cg.memory_report())
+
+        """
+
+        if not release:
+            self._release_after = None
+            return self
+
+        index, last_use = self._dataflow()
+
+        N = len(self.functionList)
+        needed = [False]*N
+
+        for f in self.independentFunctionList + self.dependentFunctionList:
+            needed[index[id(f)]] = True
+
+        for nf, f in enumerate(self.functionList):
+            reads = PULLBACK_READS.get(f.func.__name__, ('args', 'out'))
+            if f.func == Function.Id or 'out' in reads:
+                needed[nf] = True
+
+            for na, a in enumerate(f.args):
+                if isinstance(a, Function) and \
+                   ('args' in reads or (is_set(f.setitem) and na == 0)):
+                    needed[index[id(a)]] = True
+
+        release_after = [[] for nf in range(N)]
+        for nf in range(N):
+            if not needed[nf]:
+                release_after[last_use[nf]].append(nf)
+
+        self._release_after = release_after
+        self._segments = None
+
+        for nf in range(N):
+            for nr in release_after[nf]:
+                self._release(nr)
+
+        return self
+
+    def _dataflow(self):
+        """
+        returns (index, last_use), where index maps id(f) to the position
+        of f in self.functionList and last_use[nf] is the position of the
+        last function node that uses self.functionList[nf] as argument
+        (resp. nf if there is no such node)
+
+        Also stores for each function node the list of function nodes that
+        use it as argument in self._consumers.
+        """
+
+        index = {}
+        for nf, f in enumerate(self.functionList):
+            index[id(f)] = nf
+
+        N = len(self.functionList)
+        last_use = list(range(N))
+        consumers = [[] for nf in range(N)]
+
+        for nf, f in enumerate(self.functionList):
+            for a in f.args:
+                if isinstance(a, Function):
+                    ns = index[id(a)]
+                    last_use[ns] = nf
+                    consumers[ns].append(f)
+
+        for guard in self.guardList:
+            for a in (guard.lhs, guard.rhs):
+                if isinstance(a, Function):
+                    ns = index[id(a)]
+                    last_use[ns] = max(last_use[ns], guard.position)
+
+        self._consumers = consumers
+        return index, last_use
+
+    def checkpointing_on(self, snaps, nsegments=None):
+        """
+        Turns on checkpointing, i.e., the reverse mode of AD with a memory
+        budget of `snaps` checkpoints.
+
+        The computational graph is split into segments, either at the
+        positions marked by CGraph.mark_checkpoint during tracing or, if no
+        positions have been marked or nsegments is given, into nsegments
+        segments with (almost) the same number of function nodes.
+
+        CGraph.pushforward then keeps only the values at no more than
+        `snaps` segment boundaries (the checkpoints) and the values that can
+        not be recomputed. All other values are released after their last use.
+        CGraph.pullback recomputes the segments from the checkpoints following
+        a binomial (revolve) schedule, i.e., with snaps checkpoints and
+        nsegments segments each segment is recomputed at most t times,
+        where t is the smallest integer with binomial(snaps + t, t) >= nsegments.
+
+        Values that are modified by setitem, values that are views and values
+        that are computed from those are never released.
+
+        Parameters
+        ----------
+
+        snaps: int
+            the maximal number of checkpoints that are stored at the same time
+
+        nsegments: int
+            number of segments of the computational graph,
+            default: the marked positions or int(sqrt(len(cg.functionList)))
+
+        Example:
+
+            cg = algopy.CGraph()
+            x = algopy.Function(numpy.ones(3))
+            y = x
+            for n in range(100):
+                y = y + 0.01*algopy.sin(y)
+                cg.mark_checkpoint()
+            y = algopy.sum(y)
+            cg.trace_off()
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            cg.checkpointing_on(snaps = 5)
+            g = cg.gradient(numpy.zeros(3))
+
+        """
+
+        if snaps < 0:
+            raise ValueError('snaps must be a non-negative integer')
+
+        N = len(self.functionList)
+        if nsegments is None and len(self._checkpoint_marks) > 0:
+            bounds = self._checkpoint_marks
+        else:
+            if nsegments is None:
+                nsegments = int(numpy.sqrt(N))
+            nsegments = max(1, min(nsegments, N))
+            bounds = [k*N//nsegments for k in range(nsegments)]
+        segments = sorted(set([0, N] + [b for b in bounds if 0 < b < N]))
+
+        index, last_use = self._dataflow()
+        mutable = self._mutable(index)
+
+        # values that can be recomputed
+        kept = set(mutable)
+        for f in self.independentFunctionList + self.dependentFunctionList:
+            kept.add(index[id(f)])
+
+        releasable = []
+        for nf, f in enumerate(self.functionList):
+            if nf in kept or f.func == Function.Id or is_set(f.setitem):
+                continue
+            if [a for a in f.args if isinstance(a, Function) and index[id(a)] in mutable]:
+                continue
+            releasable.append(nf)
+
+        release_after = [[] for nf in range(N)]
+        for nf in releasable:
+            release_after[last_use[nf]].append(nf)
+
+        # values that are live at the segment boundaries
+        live = []
+        for b in segments[:-1]:
+            live.append([nf for nf in releasable if nf < b and last_use[nf] >= b])
+
+        self._release_after = release_after
+        self._segments = segments
+        self._live = live
+        self._snaps = snaps
+        self._snapshots = {}
+        return self
+
+    def _mutable(self, index):
+        """
+        returns the set of positions of the function nodes whose values
+        are modified by setitem, i.e., mutable buffers and views on them
+        """
+        mutable = set()
+        for f in self.functionList:
+            if is_set(f.setitem):
+                mutable.add(index[id(f.args[0])])
+
+        changed = True
+        while changed:
+            changed = False
+            for nf, f in enumerate(self.functionList):
+                if f.func.__name__ in VIEW_FUNCS and isinstance(f.args[0], Function):
+                    ns = index[id(f.args[0])]
+                    if (nf in mutable) != (ns in mutable):
+                        mutable.update((nf, ns))
+                        changed = True
+
+        return mutable
+
+    def checkpointing_off(self):
+        """
+        Turns off checkpointing, i.e., all values are kept again by subsequent
+        calls of CGraph.pushforward.
+        """
+        self._release_after = None
+        self._segments = None
+        self._snapshots = {}
+        return self
+
+    def _split(self, a, b, snaps):
+        """
+        returns the segment boundary at which the next checkpoint is stored
+        when the segments a,...,b-1 are reversed with snaps checkpoints
+        """
+        l = b - a
+        t = 0
+        while binomial(snaps + t, snaps) < l:
+            t += 1
+        return a + max(1, l - binomial(snaps - 1 + t, snaps - 1))
+
+    def _advance(self, a, b, recompute_all=False):
+        """
+        computes the segments a,...,b-1, given the values at the boundary a
+        """
+        release_after = self._release_after
+        guards = self._guard_positions() if recompute_all else {}
+        evaluate = self._evaluate if self._profiler is None else self._profiled_evaluate
+        for nf in range(self._segments[a], self._segments[b]):
+            if recompute_all or nf in self._released:
+                evaluate(nf)
+            if nf in guards:
+                self._check_guards(guards[nf])
+            for nr in release_after[nf]:
+                self._release(nr)
+
+    def _store(self, k):
+        """
+        stores the checkpoint at the segment boundary k
+        """
+        self._snapshots[k] = [(nf, self.functionList[nf].x) for nf in self._live[k]]
+
+    def _restore(self, k):
+        """
+        restores the values at the segment boundary k from its checkpoint
+        """
+        for nf, x in self._snapshots[k]:
+            self.functionList[nf].x = x
+
+    def _checkpointed_pushforward(self):
+        """
+        pushforward that stores the checkpoints that are used first by
+        CGraph._reverse
+        """
+        S = len(self._segments) - 1
+        self._snapshots = {0: []}
+
+        a, snaps = 0, self._snaps
+        bounds = []
+        while snaps > 0 and S - a > 1:
+            a = self._split(a, S, snaps)
+            snaps -= 1
+            bounds.append(a)
+
+        a = 0
+        for b in bounds + [S]:
+            self._advance(a, b, recompute_all=True)
+            if b < S:
+                self._store(b)
+            a = b
+
+    def _reverse(self, a, b, snaps):
+        """
+        reverse sweep over the segments a,...,b-1 with snaps checkpoints,
+        given the checkpoint at the segment boundary a
+        """
+        while b - a > 1:
+            if snaps > 0:
+                m = self._split(a, b, snaps)
+                new = m not in self._snapshots
+                if new:
+                    self._restore(a)
+                    self._advance(a, m)
+                    self._store(m)
+                self._reverse(m, b, snaps - 1)
+                if new:
+                    del self._snapshots[m]
+
+            else:
+                m = b - 1
+                self._restore(a)
+                self._advance(a, m)
+                self._reverse_segment(m)
+
+            b = m
+
+        self._restore(a)
+        self._reverse_segment(a)
+
+    def _reverse_segment(self, k):
+        """
+        recomputes the segment k, given the values at its boundary,
+        and applies the pullback of its function nodes
+        """
+        start, end = self._segments[k], self._segments[k+1]
+        for nf in range(start, end):
+            if nf in self._released:
+                self._evaluate(nf)
+
+        self._pullback_range(start, end)
+
+        for nf in list(range(start, end)) + self._live[k]:
+            if nf in self._released:
+                self._release(nf)
+
+    def _release(self, nf):
+        """
+        replaces the value of the function node self.functionList[nf]
+        by a placeholder, if it is a UTPM instance that is neither a view of
+        the value of an argument nor viewed by the value of another node
+        """
+
+        f = self.functionList[nf]
+        if not isinstance(f.x, algopy.UTPM) or not f.x.data.flags.writeable:
+            return
+
+        data = f.x.data
+        for a in f.args:
+            if isinstance(a, Function) and isinstance(a.x, algopy.UTPM) and \
+               numpy.may_share_memory(a.x.data, data):
+                return
+
+        for c in self._consumers[nf]:
+            if isinstance(c.x, algopy.UTPM) and numpy.may_share_memory(c.x.data, data):
+                return
+
+        self._released[nf] = data.nbytes
+        f.x = placeholder_like(f.x)
+
+    def memory_report(self):
+        """
+        returns a string that reports the memory held by the values of the
+        function nodes and the memory released by CGraph.analyze_liveness
+        resp. CGraph.checkpointing_on
+        """
+
+        nbytes = [nbytes_of(f.x) for f in self.functionList]
+
+        retval  = 'number of function nodes      : %d\n'%len(self.functionList)
+        retval += 'number of released values     : %d\n'%len(self._released)
+        retval += 'bytes held by the values      : %d\n'%sum(nbytes)
+        retval += 'bytes released                : %d\n'%sum(self._released.values())
+        if self._segments is not None:
+            nbytes = [nbytes_of(x) for snap in self._snapshots.values() for nf, x in snap]
+            retval += 'number of segments            : %d\n'%(len(self._segments) - 1)
+            retval += 'number of stored checkpoints  : %d\n'%(len(self._snapshots) - 1)
+            retval += 'bytes held by the checkpoints : %d\n'%sum(nbytes)
+        return retval
 
     def pullback(self, xbar_list):
         """
@@ -134,9 +1630,7 @@ class CGraph:
                             ' e.g. with cg.dependentFunctionList = [F1,F2]')
 
         # initial all xbar to zero
-        for f in self.functionList:
-            # print 'f=',f.func.__name__
-            f.xbar_from_x()
+        self._init_adjoints()
 
         # print 'before pullback',self
 
@@ -153,12 +1647,28 @@ class CGraph:
 
                 raise Exception(err_str)
 
-        # print self
-        for i,f in enumerate(self.functionList[::-1]):
+        if self._segments is not None:
+            self._reverse(0, len(self._segments) - 1, self._snaps)
+        else:
+            self._pullback_range(0, len(self.functionList))
+
+    def _pullback_range(self, start, end):
+        """
+        applies the pullback of the function nodes self.functionList[start:end]
+        in reverse order
+        """
+        profiler = self._profiler
+        for nf in range(end - 1, start - 1, -1):
+            f = self.functionList[nf]
             try:
-                f.__class__.pullback(f)
+                if profiler is None:
+                    f.__class__.pullback(f)
+                else:
+                    t = timer()
+                    f.__class__.pullback(f)
+                    profiler.record('pullback', nf, f, t, timer() - t)
             except Exception as e:
-                err_str = '\npullback of node %d failed\n\n'%(len(self.functionList) - i - 1)
+                err_str = '\npullback of node %d failed\n\n'%nf
                 err_str +='tried to evaluate the pullback of %s(*args) with\n'%(f.func.__name__)
                 for narg, arg in enumerate(f.args):
                     if hasattr(arg, 'x'):
@@ -174,6 +1684,190 @@ class CGraph:
                 raise Exception(err_str)
             # print self
 
+    def _init_adjoints(self):
+        """
+        sets the bar values f.xbar of all function nodes f to zero
+
+        The bar values allocated during the first reverse sweep are kept
+        in an adjoint workspace that is owned by this CGraph instance.
+        In subsequent reverse sweeps they are zeroed in place, as long as
+        the shape and dtype of the corresponding value f.x has not changed.
+        I.e., repeated calls of CGraph.pullback at new points do not
+        allocate memory proportional to the size of the graph.
+
+        Bar values of nodes whose value is a view of another value
+        (e.g. the result of getitem) are views of the corresponding bar value
+        and are therefore recomputed by Function.xbar_from_x.
+        Bar values of nodes whose value has been released (see
+        CGraph.analyze_liveness) are allocated from the placeholder.
+        """
+
+        if self._adjoints is None or len(self._adjoints) != len(self.functionList):
+            self._adjoints = [None]*len(self.functionList)
+
+        ws = self._adjoints
+        for nf, f in enumerate(self.functionList):
+            xbar = ws[nf]
+            if xbar is not None and is_reusable_xbar(f.x, xbar):
+                if isinstance(xbar, tuple):
+                    for xbari in xbar:
+                        if xbari is not None:
+                            xbari.data[...] = 0.
+                else:
+                    xbar.data[...] = 0.
+                f.xbar = xbar
+
+            elif nf in self._released:
+                f.xbar = f.x.zeros_like()
+                ws[nf] = f.xbar
+
+            else:
+                f.xbar_from_x()
+                if is_reusable_xbar(f.x, f.xbar) and (isinstance(f.x, tuple) or \
+                                 f.x.owndata == True or f.func == Function.Id):
+                    ws[nf] = f.xbar
+                else:
+                    ws[nf] = None
+
+    def save(self, path):
+        """
+        Saves the computational graph to the file `path`.
+
+        The file contains the topology of the computational graph, the
+        functions (by their name, e.g. algopy.globalfuncs:exp), the constant
+        and keyword arguments, the values of the independent and constant
+        function nodes and the values of the dependent function nodes.
+        All arrays are stored in binary form, s.t. CGraph.load can map them
+        into memory instead of reading them.
+
+        The values of all other function nodes are not saved, i.e., they are
+        computed by the next call of CGraph.pushforward.
+
+        Example:
+
+            cg.save('model.cgraph')
+
+            # e.g. in another process
+            cg = algopy.CGraph.load('model.cgraph')
+            g = cg.gradient(x)
+
+        """
+
+        index = {}
+        for nf, f in enumerate(self.functionList):
+            index[id(f)] = nf
+
+        dependent = set([index[id(f)] for f in self.dependentFunctionList])
+        arrays = []
+        nodes = []
+        for nf, f in enumerate(self.functionList):
+            node = {'func': callable_to_name(f.func),
+                    'args': [{'node': index[id(a)]} if isinstance(a, Function) \
+                             else encode_constant(a, arrays) for a in f.args],
+                    'kwargs': encode_constant(dict(f.kwargs), arrays)}
+
+            if f.func == Function.Id or nf in dependent:
+                node['x'] = encode_constant(f.x, arrays)
+
+            if is_set(f.setitem):
+                node['setitem'] = encode_constant(tuple(f.setitem), arrays)
+
+            nodes.append(node)
+
+        guards = []
+        for guard in self.guardList:
+            guards.append({'op': guard.op.__name__,
+                           'operands': [{'node': index[id(a)]} if isinstance(a, Function) \
+                                        else encode_constant(a, arrays) for a in (guard.lhs, guard.rhs)],
+                           'outcome': encode_constant(guard.outcome, arrays),
+                           'position': guard.position})
+
+        offset = 0
+        array_headers = []
+        for a in arrays:
+            array_headers.append({'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset})
+            offset += -(-a.nbytes//ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        header = {'version': CGRAPH_FORMAT_VERSION,
+                  'nodes': nodes,
+                  'arrays': array_headers,
+                  'independent': [index[id(f)] for f in self.independentFunctionList],
+                  'dependent': [index[id(f)] for f in self.dependentFunctionList],
+                  'checkpoint_marks': self._checkpoint_marks,
+                  'guards': guards}
+        header = json.dumps(header).encode('utf-8')
+
+        start = len(CGRAPH_MAGIC) + 8 + len(header)
+        padding = -start % ARRAY_ALIGNMENT
+
+        with open(path, 'wb') as f:
+            f.write(CGRAPH_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            f.write(b'\0' * padding)
+            for a in arrays:
+                f.write(a.tobytes())
+                f.write(b'\0' * (-a.nbytes % ARRAY_ALIGNMENT))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a computational graph that has been saved by CGraph.save.
+
+        The arrays are mapped into memory (copy-on-write), i.e., large
+        constant arrays are neither read nor copied until they are used.
+        The CGraph that is tracing is not changed.
+        """
+
+        with open(path, 'rb') as f:
+            if f.read(len(CGRAPH_MAGIC)) != CGRAPH_MAGIC:
+                raise ValueError('%s is not a file saved by CGraph.save'%path)
+            nheader, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(nheader).decode('utf-8'))
+
+        if header['version'] != CGRAPH_FORMAT_VERSION:
+            raise ValueError('unsupported version %s of %s'%(header['version'], path))
+
+        start = len(CGRAPH_MAGIC) + 8 + nheader
+        start += -start % ARRAY_ALIGNMENT
+
+        arrays = []
+        for a in header['arrays']:
+            shape = tuple(a['shape'])
+            if numpy.prod(shape, dtype=int) == 0:
+                arrays.append(numpy.zeros(shape, dtype=a['dtype']))
+            else:
+                arrays.append(numpy.memmap(path, dtype=a['dtype'], mode='c',
+                                           offset=start + a['offset'], shape=shape))
+
+        outer = Function.cgraph
+        cg = cls()
+        Function.cgraph = outer
+
+        functionList = [Function() for node in header['nodes']]
+        for nf, (f, node) in enumerate(zip(functionList, header['nodes'])):
+            f.ID = nf
+            f.func = name_to_callable(node['func'])
+            f.args = [functionList[a['node']] if isinstance(a, dict) and 'node' in a \
+                      else decode_constant(a, arrays) for a in node['args']]
+            f.kwargs = decode_constant(node['kwargs'], arrays)
+            f.x = decode_constant(node.get('x'), arrays)
+            if 'setitem' in node:
+                f.setitem = decode_constant(node['setitem'], arrays)
+
+        cg.functionList = functionList
+        cg.functionCount = len(functionList)
+        cg.independentFunctionList = [functionList[nf] for nf in header['independent']]
+        cg.dependentFunctionList = [functionList[nf] for nf in header['dependent']]
+        cg._checkpoint_marks = header['checkpoint_marks']
+
+        for guard in header.get('guards', []):
+            lhs, rhs = [functionList[a['node']] if isinstance(a, dict) and 'node' in a \
+                        else decode_constant(a, arrays) for a in guard['operands']]
+            cg.add_guard(Guard(COMPARISONS[guard['op']], lhs, rhs,
+                               decode_constant(guard['outcome'], arrays), guard['position']))
+        return cg
+
     def function(self, x_list):
         """ computes the function of a function y = f(x_list), where y is a scalar
         and x_list is a list or tuple of input arguments.
@@ -183,90 +1877,251 @@ class CGraph:
         to the normal function evaluation in Python.
         """
 
-        self.pushforward(x_list)
-        return [x.x for x in self.dependentFunctionList]
+        self.pushforward(x_list)
+        return [x.x for x in self.dependentFunctionList]
+
+
+
+    def gradient(self, x, out=None):
+        """ computes the gradient of a function f: R^N --> R
+
+        g = gradient(self, x_list, out=None)
+
+        The values of all independent variables are copied into one flat
+        parameter buffer that is allocated at the first call and reused as
+        long as the shapes of the independent variables do not change.
+        I.e., the arrays x (and out) may be modified by the caller (e.g. by
+        scipy.optimize) after the call without affecting the CGraph.
+        Only this buffer and the seed of the reverse sweep are reused, the
+        values of the function nodes are still allocated by the pushforward.
+
+        Parameters
+        ----------
+
+        x: array_like or list of array_like
+
+        out: array_like or list of array_like or None
+            if provided, the gradient is written into out and out is
+            returned. If x is a list, out may also be a flat array with
+            sum([xi.size for xi in x]) entries.
+
+
+        Example 1
+        ---------
+
+        import algopy
+
+        def f(x):
+            return x**2
+
+        cg = algopy.CGraph()
+        x = algopy.Function(3.)
+        y = f(x)
+        cg.trace_off()
+        cg.independentFunctionList = [x]
+        cg.dependentFunctionList = [y]
+        print cg.gradient(7.)
+
+
+        Example 2
+        ---------
+
+        import algopy
+
+        def f(x):
+            return x[0]*x[1]
+
+        cg = algopy.CGraph()
+        x = algopy.Function([3., 7.])
+        y = f(x)
+        cg.trace_off()
+        cg.independentFunctionList = [x]
+        cg.dependentFunctionList = [y]
+        print cg.gradient([1.,2.])
+
+
+        Example 3
+        ---------
+
+        g = numpy.zeros(2)
+        scipy.optimize.fmin_l_bfgs_b(lambda x: cg.function([x])[0],
+                                     [1.,2.],
+                                     fprime=lambda x: cg.gradient(x, out=g))
+        """
+
+        if self.dependentFunctionList[0].ndim != 0:
+            raise Exception('you are trying to compute the gradient of a non-scalar valued function')
+
+        if isinstance(x, list):
+            if isinstance(x[0], numpy.ndarray) or isinstance(x[0], list):
+                x_list = x
+            else:
+                x_list = [numpy.asarray(x)]
+        else:
+            x_list = [x]
+
+        utpm_x_list, views, ybar = self._gradient_buffers(x_list)
+
+        for view, xi in zip(views, x_list):
+            view[...] = xi
+
+        self.pushforward(utpm_x_list)
+        self.pullback([ybar])
+
+        xbar_list = [f.xbar.data[0,0] for f in self.independentFunctionList]
+
+        if out is None:
+            if isinstance(x, list):
+                return [xbar.copy() for xbar in xbar_list]
+            else:
+                return xbar_list[0].copy()
+
+        if isinstance(out, list):
+            for outi, xbar in zip(out, xbar_list):
+                outi[...] = xbar
+
+        elif isinstance(x, list):
+            start = 0
+            for xbar in xbar_list:
+                out[start:start + xbar.size] = xbar.reshape(-1)
+                start += xbar.size
+
+        else:
+            out[...] = xbar_list[0]
+
+        return out
+
+    def _gradient_buffers(self, x_list):
+        """
+        returns (utpm_x_list, views, ybar), the UTPM instances that are used as
+        independent variables by CGraph.gradient, the views of their Taylor
+        coefficients of degree zero into the flat parameter buffer, and the
+        bar value of the dependent variable
+        """
+        shapes = tuple([numpy.shape(xi) for xi in x_list])
+        dtype = numpy.result_type(float, *[numpy.asarray(xi) for xi in x_list])
+        key = (shapes, dtype)
+
+        ws = self._gradient_workspace
+        if ws is not None and ws[0] == key:
+            return ws[1:]
+
+        sizes = [int(numpy.prod(shp)) for shp in shapes]
+        buf = numpy.zeros((1,1,sum(sizes)), dtype=dtype)
+
+        utpm_x_list = []
+        start = 0
+        for shp, size in zip(shapes, sizes):
+            utpm_x_list.append(algopy.UTPM(buf[:,:,start:start + size].reshape((1,1) + shp)))
+            start += size
+
+        views = [xi.data[0,0,...] for xi in utpm_x_list]
+
+        ybar = algopy.UTPM(numpy.ones((1,1), dtype=dtype))
+
+        self._gradient_workspace = (key, utpm_x_list, views, ybar)
+        return utpm_x_list, views, ybar
+
+    def _batch_pushforward(self, X):
+        """
+        pushforward of the points X[0], X[1], ... at once, where the points
+        are stored along the direction axis P of the UTPM instances (D=1)
+        """
+
+        if isinstance(X, list):
+            X_list = [numpy.asarray(Xi) for Xi in X]
+        else:
+            X_list = [numpy.asarray(X)]
 
+        B = X_list[0].shape[0]
+        utpm_x_list = []
+        for Xi in X_list:
+            if Xi.shape[0] != B:
+                raise ValueError('all arguments must have the same number of points')
+            utpm_x_list.append(algopy.UTPM(Xi.reshape((1,) + Xi.shape)))
 
+        self.pushforward(utpm_x_list)
 
-    def gradient(self, x):
-        """ computes the gradient of a function f: R^N --> R
+    def function_batch(self, X):
+        """ evaluates the function at B points in one pushforward
 
-        g = gradient(self, x_list)
+        Y = function_batch(self, X)
 
         Parameters
         ----------
 
-        x: array_like or list of array_like
+        X: array_like with shape (B, ...) or list of array_like with shape (B, ...)
+            the B points, e.g. X.shape = (B, N) for a function f: R^N --> R^M
 
+        Returns
+        -------
 
-        Example 1
-        ---------
+        list of arrays with shape (B, ...), one for each dependent function
 
-        import algopy
+        The points are stored along the direction axis P of the UTPM instances,
+        i.e., each function node is evaluated once for all points.
+        """
 
-        def f(x):
-            return x**2
+        self._batch_pushforward(X)
+        return [f.x.data[0].copy() for f in self.dependentFunctionList]
 
-        cg = algopy.CGraph()
-        x = algopy.Function(3.)
-        y = f(x)
-        cg.trace_off()
-        cg.independentFunctionList = [x]
-        cg.dependentFunctionList = [y]
-        print cg.gradient(7.)
+    def gradient_batch(self, X):
+        """ computes the gradient of a function f: R^N --> R at B points
+        in one pushforward and one pullback
 
+        G = gradient_batch(self, X)
 
-        Example 2
-        ---------
+        Parameters
+        ----------
 
-        import algopy
+        X: array_like with shape (B, N) or list of array_like with shape (B, ...)
 
-        def f(x):
-            return x[0]*x[1]
+        Returns
+        -------
+
+        G: array with shape (B, N) (resp. a list of arrays if X is a list)
+            G[b] is the gradient at X[b]
+
+        The points are stored along the direction axis P of the UTPM instances,
+        i.e., the Python overhead of the sweeps is the same as for one point.
+        A GuardError is raised if the traced function would take another
+        branch at any of the points (see Guard).
+
+        Example:
+
+            import algopy, numpy
+
+            cg = algopy.CGraph()
+            x = algopy.Function(numpy.ones(2))
+            y = algopy.sum(algopy.sin(x) * x)
+            cg.trace_off()
+            cg.independentFunctionList = [x]
+            cg.dependentFunctionList = [y]
+            G = cg.gradient_batch(numpy.random.rand(1000, 2))
 
-        cg = algopy.CGraph()
-        x = algopy.Function([3., 7.])
-        y = f(x)
-        cg.trace_off()
-        cg.independentFunctionList = [x]
-        cg.dependentFunctionList = [y]
-        print cg.gradient([1.,2.])
         """
 
         if self.dependentFunctionList[0].ndim != 0:
             raise Exception('you are trying to compute the gradient of a non-scalar valued function')
 
-        if isinstance(x, list):
-            if isinstance(x[0], numpy.ndarray) or isinstance(x[0], list):
-                x_list = x
-            else:
-                x_list = [numpy.asarray(x)]
-        else:
-            x_list = [x]
-
-        utpm_x_list = []
-        for xi in x_list:
-            element = numpy.asarray(xi).reshape((1,1) + numpy.shape(xi))
-            utpm_x_list.append(algopy.UTPM(element))
-
-        self.pushforward(utpm_x_list)
+        self._batch_pushforward(X)
 
-        ybar =  self.dependentFunctionList[0].x.zeros_like()
+        ybar = self.dependentFunctionList[0].x.zeros_like()
         ybar.data[0,:] = 1.
         self.pullback([ybar])
 
-        if isinstance(x, list):
-            return [x.xbar.data[0,0] for x in self.independentFunctionList]
+        if isinstance(X, list):
+            return [f.xbar.data[0].copy() for f in self.independentFunctionList]
         else:
-            return self.independentFunctionList[0].xbar.data[0,0]
+            return self.independentFunctionList[0].xbar.data[0].copy()
 
-    def jacobian(self, x):
-        """ computes the Jacobian of a function F:R^N --> R^M in the reverse mode
+    def jacobian(self, x, mode='reverse', chunk_size=None, n_jobs=1):
+        """ computes the Jacobian of a function F:R^N --> R^M
 
-        J = self.jacobian(x)
+        J = self.jacobian(x, mode='reverse', chunk_size=None, n_jobs=1)
 
         If x is a UTPM instance, the Taylor series of the entries of the Jacobian
-        are computed.
+        are computed in the reverse mode.
 
         Parameters
         ----------
@@ -274,6 +2129,26 @@ class CGraph:
         x: array_like or UTPM instance
             x.ndim = 1
 
+        mode: str
+            'forward': one pushforward with N directions
+            'reverse': one pushforward and one pullback with M directions
+            'auto': the mode that is expected to be faster, based on
+                    N, M and the costs of both modes measured by a short
+                    calibration the first time the Jacobian at a point of
+                    this shape is computed (see CGraph.jacobian_mode)
+
+        chunk_size: int or None
+            only used in the reverse mode: if provided, the M adjoint
+            directions are split into chunks of at most chunk_size
+            directions, s.t. the memory is bounded by the chunk size.
+            Each chunk needs its own pushforward with P = chunk_size.
+
+        n_jobs: int
+            only used in the reverse mode: the number of threads that
+            process the chunks in parallel, each on its own copy of the
+            computational graph. The chunks are processed serially if the
+            computational graph modifies buffers by setitem.
+
         Returns
         -------
         J: array_like or UTPM instance
@@ -338,7 +2213,7 @@ class CGraph:
 
             self.pullback([ybar])
 
-            return algopy.UTPM(self.independentFunctionList[0].xbar.data.reshape((D, P, M) + shp))
+            return algopy.UTPM(self.independentFunctionList[0].xbar.data.reshape((D, P, M) + shp).copy())
 
 
         else:
@@ -347,6 +2222,18 @@ class CGraph:
             if x.ndim != 1:
                 raise ValueError("x.ndim must be 1 but provided %d"%x.ndim)
 
+            if mode == 'auto':
+                mode = self.jacobian_mode(x)
+
+            if mode == 'forward':
+                return self._forward_jacobian(x)
+
+            elif mode != 'reverse':
+                raise ValueError("mode must be 'auto', 'forward' or 'reverse' but provided %r"%mode)
+
+            if chunk_size is not None or n_jobs > 1:
+                return self._chunked_jacobian(x, chunk_size, n_jobs)
+
             M = self.dependentFunctionList[0].size
 
             tmp = numpy.zeros((1,M) + numpy.shape(x))
@@ -359,7 +2246,259 @@ class CGraph:
             ybar.data[0,:,:] = numpy.eye(M)
             self.pullback([ybar])
 
-            return self.independentFunctionList[0].xbar.data[0,:]
+            return self.independentFunctionList[0].xbar.data[0,:].copy()
+
+    def _chunked_jacobian(self, x, chunk_size, n_jobs):
+        """
+        computes the Jacobian at x in the reverse mode, where the M adjoint
+        directions are processed in chunks of at most chunk_size directions
+        by n_jobs threads
+        """
+        M = self.dependentFunctionList[0].size
+        if chunk_size is None:
+            chunk_size = -(-M // n_jobs)
+        starts = list(range(0, M, chunk_size))
+        n_jobs = min(n_jobs, len(starts))
+
+        # the pullback of setitem restores values in place, i.e., it could
+        # modify constants that are shared by the copies
+        if [f for f in self.functionList if is_set(f.setitem)]:
+            n_jobs = 1
+
+        cgraphs = queue.Queue()
+        cgraphs.put(self)
+        for n in range(n_jobs - 1):
+            cgraphs.put(self._clone())
+
+        J = numpy.zeros((M,) + x.shape)
+
+        def reverse(start):
+            cg = cgraphs.get()
+            try:
+                P = min(chunk_size, M - start)
+                tmp = numpy.zeros((1,P) + x.shape)
+                tmp[0,...] = x
+                cg.pushforward([algopy.UTPM(tmp)])
+
+                ybar = cg.dependentFunctionList[0].x.zeros_like()
+                ybar.data[0].reshape((P, M))[:, start:start+P] = numpy.eye(P)
+                cg.pullback([ybar])
+                J[start:start+P] = cg.independentFunctionList[0].xbar.data[0]
+            finally:
+                cgraphs.put(cg)
+
+        if n_jobs == 1:
+            for start in starts:
+                reverse(start)
+        else:
+            pool = ThreadPool(n_jobs)
+            try:
+                pool.map(reverse, starts)
+            finally:
+                pool.close()
+                pool.join()
+
+        return J
+
+    def _clone(self):
+        """
+        returns a copy of the computational graph with new function nodes,
+        s.t. it can be evaluated concurrently with this CGraph
+
+        The functions, constant arguments and values of the identity nodes
+        are shared, all other values are computed by the next pushforward.
+        """
+        index = {}
+        for nf, f in enumerate(self.functionList):
+            index[id(f)] = nf
+
+        outer = Function.cgraph
+        cg = self.__class__()
+        Function.cgraph = outer
+
+        functionList = [Function() for f in self.functionList]
+        node = lambda a: functionList[index[id(a)]] if isinstance(a, Function) else a
+        for nf, (g, f) in enumerate(zip(functionList, self.functionList)):
+            g.ID = nf
+            g.func = f.func
+            g.args = [node(a) for a in f.args]
+            g.kwargs = f.kwargs
+            g.x = f.x
+            g.setitem = f.setitem
+
+        cg.functionList = functionList
+        cg.functionCount = len(functionList)
+        cg.independentFunctionList = [node(f) for f in self.independentFunctionList]
+        cg.dependentFunctionList = [node(f) for f in self.dependentFunctionList]
+        for guard in self.guardList:
+            cg.add_guard(Guard(guard.op, node(guard.lhs), node(guard.rhs),
+                               guard.outcome, guard.position))
+        return cg
+
+    def _forward_jacobian(self, x):
+        """
+        computes the Jacobian at x by one pushforward with N = x.size directions
+        """
+        N = x.size
+        tmp = numpy.zeros((2,N) + x.shape)
+        tmp[0,...] = x
+        tmp[1,...] = numpy.eye(N)
+        self.pushforward([algopy.UTPM(tmp)])
+
+        y = self.dependentFunctionList[0].x
+        return y.data[1].reshape((N, -1)).T.copy()
+
+    # calibration of CGraph.jacobian_mode
+    jacobian_mode_repeats = 3
+    jacobian_mode_min_directions = 4
+
+    def jacobian_mode(self, x):
+        """
+        returns 'forward' or 'reverse', the mode in which CGraph.jacobian
+        is expected to compute the Jacobian at x faster
+
+        The runtime of each mode is modeled as t(P) = t0 + t1*P, where P is
+        the number of directions, i.e., P = N in the forward mode and P = M
+        in the reverse mode. The coefficients t0 and t1 are measured by
+        evaluating both modes with P = 1 and P = min(N, 8) (resp. min(M, 8))
+        directions, taking the minimum of `jacobian_mode_repeats` runs.
+        The measurements are cached for each shape of x.
+
+        No measurements are made if N == M or if N or M is at most
+        `jacobian_mode_min_directions`: then the mode with fewer directions
+        is returned (the forward mode if N == M, since it needs no pullback).
+        """
+
+        x = numpy.asarray(x)
+        N = x.size
+        M = self.dependentFunctionList[0].size
+
+        if N == M or min(N, M) <= self.jacobian_mode_min_directions:
+            if N <= M:
+                return 'forward'
+            return 'reverse'
+
+        if self._jacobian_costs is None:
+            self._jacobian_costs = {}
+
+        costs = self._jacobian_costs.get(x.shape)
+        if costs is None:
+            costs = {}
+
+            def measure(sweep, P):
+                retval = None
+                for r in range(self.jacobian_mode_repeats):
+                    start_time = timer()
+                    sweep(P)
+                    t = timer() - start_time
+                    retval = t if retval is None else min(retval, t)
+                return retval
+
+            def forward(P):
+                tmp = numpy.zeros((2,P) + x.shape)
+                tmp[0,...] = x
+                tmp[1,...].reshape((P, N))[:, :P] = numpy.eye(P)
+                self.pushforward([algopy.UTPM(tmp)])
+
+            def reverse(P):
+                tmp = numpy.zeros((1,P) + x.shape)
+                tmp[0,...] = x
+                self.pushforward([algopy.UTPM(tmp)])
+                ybar = self.dependentFunctionList[0].x.zeros_like()
+                ybar.data[0].reshape((P, M))[:, :P] = numpy.eye(P)
+                self.pullback([ybar])
+
+            for mode, sweep, Pmax in [('forward', forward, N), ('reverse', reverse, M)]:
+                P = min(Pmax, 8)
+                sweep(1)
+                t1 = measure(sweep, 1)
+                tP = measure(sweep, P)
+                slope = max(tP - t1, 0.)/max(P - 1, 1)
+                costs[mode] = (t1 - slope, slope)
+
+            self._jacobian_costs[x.shape] = costs
+
+        t_forward = costs['forward'][0] + costs['forward'][1]*N
+        t_reverse = costs['reverse'][0] + costs['reverse'][1]*M
+
+        if t_forward < t_reverse:
+            return 'forward'
+        return 'reverse'
+
+    def jacobian_sparsity(self, x):
+        """ computes the sparsity pattern of the Jacobian of F:R^N --> R^M
+
+        S = self.jacobian_sparsity(x)
+
+        The pattern is obtained by propagating index sets through the
+        computational graph (see algopy.tracer.sparsity). It is conservative,
+        i.e., S may contain entries that are zero for all x, but all entries
+        that are nonzero for some x are contained in S.
+
+        Parameters
+        ----------
+        x: array_like
+            x.ndim == 1, the values are only used to determine the shapes
+            of the intermediate values
+
+        Returns
+        -------
+        S: scipy.sparse.csr_matrix
+            M x N boolean matrix
+        """
+        from algopy.tracer import sparsity
+
+        x = numpy.asarray(x)
+        if x.ndim != 1:
+            raise ValueError("x.ndim must be 1 but provided %d"%x.ndim)
+
+        self.pushforward([algopy.UTPM(x.reshape((1,1) + x.shape))])
+        return sparsity.jacobian_pattern(self)
+
+    def sparse_jacobian(self, x, pattern=None):
+        """ computes the Jacobian of F:R^N --> R^M as sparse matrix
+
+        J = self.sparse_jacobian(x, pattern=None)
+
+        The columns of the Jacobian are colored s.t. columns of the same
+        color do not have a nonzero in the same row. The compressed
+        Jacobian J S, where S is the N x p seed matrix of the p colors,
+        is computed by one pushforward with P = p directions and J is
+        recovered from it.
+
+        Parameters
+        ----------
+        x: array_like
+            x.ndim == 1
+
+        pattern: scipy.sparse matrix or None
+            the sparsity pattern of the Jacobian, computed by
+            CGraph.jacobian_sparsity if not provided. It can be reused
+            for all x.
+
+        Returns
+        -------
+        J: scipy.sparse.csr_matrix
+            the M x N Jacobian evaluated at x
+        """
+        from algopy.tracer import sparsity
+
+        x = numpy.asarray(x)
+        if pattern is None:
+            pattern = self.jacobian_sparsity(x)
+
+        colors = sparsity.color_columns(pattern)
+        S = sparsity.seed_matrix(colors)
+        p = S.shape[1]
+
+        tmp = numpy.zeros((2,p) + x.shape)
+        tmp[0,...] = x
+        tmp[1,...] = S.T
+        self.pushforward([algopy.UTPM(tmp)])
+
+        y = self.dependentFunctionList[0].x
+        B = y.data[1].reshape((p, -1)).T
+        return sparsity.recover_jacobian(B, pattern, colors)
 
     def jac_vec(self, x, v):
         """ computes the Jacobian-vector product J*v of a function
@@ -445,7 +2584,7 @@ class CGraph:
         ybar.data[0,0,:] = w
         self.pullback([ybar])
 
-        return self.independentFunctionList[0].xbar.data[0,0,...]
+        return self.independentFunctionList[0].xbar.data[0,0,...].copy()
 
     def hessian(self, x):
         """ computes the Hessian
@@ -475,7 +2614,7 @@ class CGraph:
         ybar.data[0,:] = 1.
         self.pullback([ybar])
 
-        return self.independentFunctionList[0].xbar.data[1,:]
+        return self.independentFunctionList[0].xbar.data[1,:].copy()
 
     def hess_vec(self, x, v):
         """ computes the Hessian vector product  dot(H,v)
@@ -518,7 +2657,71 @@ class CGraph:
         ybar.data[0,:] = 1.
         self.pullback([ybar])
 
-        return self.independentFunctionList[0].xbar.data[1,0]
+        return self.independentFunctionList[0].xbar.data[1,0].copy()
+
+    def hess_mat(self, x, V, chunk_size=None):
+        """ computes the Hessian matrix product  dot(H,V)
+
+        HV = self.hess_mat(x, V, chunk_size=None)
+
+        In contrast to K calls of CGraph.hess_vec, the K columns of V are
+        propagated together as P = K directions of one pushforward and one
+        pullback. The memory is proportional to P, i.e., it can be bounded
+        by processing at most chunk_size columns of V per sweep.
+
+        Parameters
+        ----------
+        x: array_like
+            x.ndim == 1
+
+        V: array_like
+            V.ndim == 2 and V.shape[0] == x.size
+
+        chunk_size: int or None
+            the maximal number of columns of V that are propagated at once,
+            all K columns if None
+
+        Returns
+        -------
+        HV: array
+            two-dimensional array of shape (x.size, K) containing the Hessian
+            matrix product
+
+        """
+
+        x = numpy.asarray(x)
+        V = numpy.asarray(V)
+
+        if x.ndim != 1:
+            raise ValueError("x.ndim must be 1 but provided %d"%x.ndim)
+
+        if V.ndim != 2:
+            raise ValueError("V.ndim must be 2 but provided %d"%V.ndim)
+
+        if V.shape[0] != x.size:
+            raise ValueError("V.shape[0] must be x.size, but provided x.shape=%s and V.shape=%s"%(x.shape, V.shape))
+
+        N, K = V.shape
+        if chunk_size is None:
+            chunk_size = max(K, 1)
+        elif chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1 but provided %d"%chunk_size)
+
+        HV = numpy.zeros((N, K))
+        for start in range(0, K, chunk_size):
+            P = min(chunk_size, K - start)
+            xtmp = numpy.zeros((2,P) + x.shape)
+            xtmp[0,...] = x
+            xtmp[1,...] = V[:, start:start+P].T
+
+            self.pushforward([algopy.UTPM(xtmp)])
+            ybar =  self.dependentFunctionList[0].x.zeros_like()
+            ybar.data[0,:] = 1.
+            self.pullback([ybar])
+
+            HV[:, start:start+P] = self.independentFunctionList[0].xbar.data[1].T
+
+        return HV
 
     def vec_hess(self, w, x):
         """ computes  the hessian of dot(w, F(x)), where F:R^N ---> R^M
@@ -555,7 +2758,7 @@ class CGraph:
         ybar = self.dependentFunctionList[0].x.zeros_like()
         ybar.data[0,:] = w
         self.pullback([ybar])
-        return self.independentFunctionList[0].xbar.data[1,:]
+        return self.independentFunctionList[0].xbar.data[1,:].copy()
 
     def vec_hess_vec(self, w, x, v):
         """ computes  d^2(w F) v, where  F:R^N ---> R^M
@@ -609,7 +2812,73 @@ class CGraph:
         ybar.data[0,0,...] = w
         self.pullback([ybar])
 
-        return self.independentFunctionList[0].xbar.data[1,0,:]
+        return self.independentFunctionList[0].xbar.data[1,0,:].copy()
+
+    def hessian_sparsity(self, x):
+        """ computes the sparsity pattern of the Hessian of f:R^N --> R
+
+        S = self.hessian_sparsity(x)
+
+        The pattern is obtained by propagating index sets through the
+        computational graph and accumulating the nonlinear interactions
+        of the entries of x (see algopy.tracer.sparsity). It is conservative,
+        i.e., S may contain entries that are zero for all x.
+
+        Parameters
+        ----------
+        x: array_like
+            x.ndim == 1, the values are only used to determine the shapes
+            of the intermediate values
+
+        Returns
+        -------
+        S: scipy.sparse.csr_matrix
+            N x N symmetric boolean matrix
+        """
+        from algopy.tracer import sparsity
+
+        x = numpy.asarray(x)
+        if x.ndim != 1:
+            raise ValueError("x.ndim must be 1 but provided %d"%x.ndim)
+
+        self.pushforward([algopy.UTPM(x.reshape((1,1) + x.shape))])
+        return sparsity.hessian_pattern(self)
+
+    def sparse_hessian(self, x, pattern=None):
+        """ computes the Hessian of f:R^N --> R as sparse matrix
+
+        H = self.sparse_hessian(x, pattern=None)
+
+        The columns of the Hessian are star colored and the compressed
+        Hessian H S, where S is the N x p seed matrix of the p colors, is
+        computed by one forward-over-reverse sweep with P = p directions
+        (see CGraph.hess_mat). All entries of H are
+        read directly from H S.
+
+        Parameters
+        ----------
+        x: array_like
+            x.ndim == 1
+
+        pattern: scipy.sparse matrix or None
+            the sparsity pattern of the Hessian, computed by
+            CGraph.hessian_sparsity if not provided. It can be reused
+            for all x.
+
+        Returns
+        -------
+        H: scipy.sparse.csr_matrix
+            the N x N Hessian evaluated at x
+        """
+        from algopy.tracer import sparsity
+
+        x = numpy.asarray(x)
+        if pattern is None:
+            pattern = self.hessian_sparsity(x)
+
+        colors = sparsity.star_color(pattern)
+        B = self.hess_mat(x, sparsity.seed_matrix(colors))
+        return sparsity.recover_hessian(B, pattern, colors)
 
     def plot(self, filename='computational_graph.png', method='dot',
             orientation='TB'):
@@ -692,17 +2961,36 @@ class CGraph:
         g.render(filename, format=extension)
 
 
-class Function(Ring):
+class FunctionType(type):
+    """
+    metaclass of Function
+
+    Function.cgraph refers to the CGraph that is tracing in the current
+    thread (resp. context), see get_active_cgraph and set_active_cgraph.
+    """
+
+    def get_cgraph(cls):
+        return get_active_cgraph()
+
+    def set_cgraph(cls, cg):
+        set_active_cgraph(cg)
+
+    cgraph = property(get_cgraph, set_cgraph)
+
+class Function(FunctionType('FunctionBase', (Ring,), {'__slots__': ()})):
 
     __array_priority__ = 2
 
-    xbar = NotSet()
-    setitem = NotSet()
+    # function nodes have no __dict__, s.t. computational graphs with
+    # many nodes require less memory
+    __slots__ = ('x', 'xbar', 'args', 'kwargs', 'func', 'ID', 'setitem')
 
     def __init__(self, x = None):
         """
         Creates a new function node that is a variable.
         """
+        self.xbar = not_set
+        self.setitem = not_set
 
         if type(x) != type(None):
             # create a Function node with value x referring to itself, i.e.
@@ -714,7 +3002,6 @@ class Function(Ring):
     def dtype(self):
         return self.x.dtype
 
-    cgraph = None
     @classmethod
     def get_ID(cls):
         """
@@ -775,9 +3062,10 @@ class Function(Ring):
         f.args = fargs
         f.kwargs = fkwargs
         f.func = func
-        if cls.cgraph is not None:
-            f.ID = cls.get_ID()
-            cls.cgraph.append(f)
+        cg = cls.cgraph
+        if cg is not None:
+            f.ID = cg.functionCount
+            cg.append(f)
         return f
 
     @classmethod
@@ -824,6 +3112,36 @@ class Function(Ring):
 
         return Fout
 
+    pullback_registry = {}
+    @classmethod
+    def get_pullback(cls, xcls, func):
+        """
+        returns the pullback function of func for outputs of the class xcls
+
+        e.g. get_pullback(UTPM, algopy.exp) returns UTPM.pb_exp
+
+        Rationale:
+            The pullback function is looked up only once per
+            (output class, func) combination and then stored in
+            Function.pullback_registry, s.t. the reverse sweeps
+            of CGraph.pullback do not have to construct and evaluate
+            the name of the pullback function for each node.
+
+            A FusedFunction carries its own pullback and is not stored,
+            since CGraph.fuse and CGraph.load create new ones on each call.
+        """
+
+        key = (xcls, func)
+        try:
+            return cls.pullback_registry[key]
+
+        except KeyError:
+            if isinstance(func, FusedFunction):
+                return func.pullback
+            pb = getattr(xcls, 'pb_' + func.__name__)
+            cls.pullback_registry[key] = pb
+            return pb
+
     @classmethod
     def pullback(cls, F):
         """
@@ -853,8 +3171,6 @@ class Function(Ring):
         Thus, pullback(F) computes F.args[i].xbar
         """
 
-        func_name = F.func.__name__
-
         # STEP 1: extract arguments
         args = []
         argsbar = []
@@ -869,11 +3185,11 @@ class Function(Ring):
         if isinstance(F.x,tuple):
             # case if the function F has several outputs, e.g. (y1,y2) = F(x)
             args = list(F.xbar) + args + list(F.x)
-            f = eval('__import__("algopy.utpm").utpm.'+F.x[0].__class__.__name__+'.pb_'+func_name)
+            f = cls.get_pullback(F.x[0].__class__, F.func)
 
         elif type(F.x) == type(None):
             # case if the function F has no output, e.g. None = F(x)
-            f = eval('__import__("algopy.utpm").utpm.'+F.args[0].x.__class__.__name__+'.pb_'+func_name)
+            f = cls.get_pullback(F.args[0].x.__class__, F.func)
 
         elif numpy.isscalar(F.x) or isinstance(F.x, numpy.ndarray):
             return lambda x: None
@@ -889,10 +3205,9 @@ class Function(Ring):
             # print F.xbar
 
             # get the pullback function
+            f = cls.get_pullback(F.x.__class__, F.func)
 
-            f = eval('__import__("algopy.utpm").utpm.'+F.x.__class__.__name__+'.pb_'+func_name)
-
-        elif func_name == '__getitem__' or func_name == 'getitem':
+        elif F.func.__name__ == '__getitem__' or F.func.__name__ == 'getitem':
             return  lambda x: None
             # raise NotImplementedError('should implement that')
 
@@ -904,7 +3219,6 @@ class Function(Ring):
         kwargs = {'out': list(argsbar)}
         kwargs.update(F.kwargs)
 
-        # print 'func_name = ',func_name
         # print 'calling pullback function f=',f
         # print 'argsbar=',argsbar
         # print 'args = ',args
@@ -1334,14 +3648,216 @@ class Function(Ring):
     def extract_UTPM_jacobian(self):
         return Function.pushforward(algopy.extract_jacobian, [self])
 
+    def compare(self, op, other):
+        """
+        returns op(self.x, other.x) and records the outcome as Guard in the
+        CGraph that is tracing, s.t. CGraph.pushforward can detect when the
+        traced function would take a different branch
+        """
+        outcome = op(self.x, other.x if isinstance(other, Function) else other)
+
+        # only comparisons of function nodes of the tracing CGraph are recorded
+        cg = Function.cgraph
+        if cg is None:
+            return outcome
+
+        for a in (self, other):
+            nf = getattr(a, 'ID', None)
+            if isinstance(a, Function) and \
+               (nf is None or nf >= len(cg.functionList) or cg.functionList[nf] is not a):
+                return outcome
+
+        cg.add_guard(Guard(op, self, other, outcome, len(cg.functionList) - 1))
+        return outcome
+
     def __lt__(self, other):
-        return self.x.__lt__(other.x)
+        return self.compare(operator.lt, other)
 
     def __le__(self, other):
-        return self.x.__le__(other.x)
+        return self.compare(operator.le, other)
 
     def __ge__(self, other):
-        return self.x.__ge__(other.x)
+        return self.compare(operator.ge, other)
 
     def __gt__(self, other):
-        return self.x.__gt__(other.x)
+        return self.compare(operator.gt, other)
+
+
+# statistics of the tape cache of a JitFunction, cf. functools.lru_cache
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'retraces', 'maxsize', 'currsize'])
+
+class JitFunction:
+    """
+    Wraps a Python function s.t. it is traced into a CGraph the first time
+    it is called with a new signature and the compiled CGraph is used by
+    all subsequent calls with the same signature (see algopy.jit).
+
+    The signature consists of the shapes and dtypes of the array arguments
+    and the values of the static arguments (which must be hashable).
+    The array arguments are the independent variables of the CGraph.
+
+    At most maxsize CGraphs are cached, the least recently used one is
+    discarded first. A CGraph whose guards do not hold (see Guard), i.e.,
+    for which the function would take another branch, is traced again.
+    """
+
+    def __init__(self, func, maxsize=16, static_argnums=()):
+        self.func = func
+        self.maxsize = maxsize
+        self.static_argnums = tuple(static_argnums)
+        self.hits = 0
+        self.misses = 0
+        self.retraces = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.RLock()
+        functools.update_wrapper(self, func)
+
+    def _signature(self, args, kwargs):
+        key = []
+        for na, a in enumerate(args):
+            if na in self.static_argnums:
+                key.append(('static', a))
+            else:
+                a = numpy.asarray(a)
+                key.append((a.shape, a.dtype.str))
+        key.append(tuple(sorted(kwargs.items())))
+        return tuple(key)
+
+    def _trace(self, args, kwargs):
+        with CGraph() as cg:
+            fargs = [a if na in self.static_argnums else Function(1.*numpy.asarray(a)) \
+                     for na, a in enumerate(args)]
+            fy = self.func(*fargs, **kwargs)
+
+        cg.independentFunctionList = [fa for na, fa in enumerate(fargs) \
+                                      if na not in self.static_argnums]
+        cg.dependentFunctionList = [fy]
+        return cg.compile()
+
+    def _entry(self, args, kwargs, retrace=False):
+        """
+        returns the cache entry [cg, idle] of the signature of (args, kwargs),
+        where cg is the compiled CGraph and idle a list of copies of cg that
+        are currently not evaluated by any thread.
+
+        The entry is traced if it is not cached or if retrace is True.
+        It becomes the most recently used one and the least recently used
+        entries are discarded s.t. at most maxsize entries are cached.
+        Must be called with self._lock held.
+        """
+        key = self._signature(args, kwargs)
+        entry = self._cache.pop(key, None)
+        if retrace:
+            self.retraces += 1
+            entry = None
+        elif entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        if entry is None:
+            entry = [self._trace(args, kwargs), []]
+
+        self._cache[key] = entry
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return entry
+
+    def cgraph(self, *args, **kwargs):
+        """
+        returns the compiled CGraph of the signature of (args, kwargs)
+
+        The CGraph is shared by all callers, i.e., it must not be evaluated
+        by several threads at the same time. The methods of JitFunction
+        evaluate copies of it instead.
+        """
+        with self._lock:
+            return self._entry(args, kwargs)[0]
+
+    def _apply(self, driver, args, kwargs):
+        """
+        applies driver(cg, x_list) to the CGraph of the signature of (args, kwargs)
+        and traces the function again if a guard does not hold
+
+        Each call evaluates a copy of the cached CGraph that no other thread
+        uses at the same time. The copies are kept in the cache entry and
+        reused by later calls.
+        """
+        x_list = [numpy.asarray(a) for na, a in enumerate(args) \
+                  if na not in self.static_argnums]
+
+        retrace = False
+        while True:
+            with self._lock:
+                entry = self._entry(args, kwargs, retrace=retrace)
+                cg = entry[1].pop() if entry[1] else entry[0]._clone().compile()
+            try:
+                return driver(cg, x_list)
+            except GuardError:
+                if retrace:
+                    raise
+                retrace = True
+            finally:
+                with self._lock:
+                    entry[1].append(cg)
+
+    def __call__(self, *args, **kwargs):
+        return self._apply(lambda cg, x_list: cg.function(x_list)[0], args, kwargs)
+
+    def gradient(self, *args, **kwargs):
+        """
+        gradient w.r.t. the array arguments (a list if there are several)
+        """
+        def driver(cg, x_list):
+            return cg.gradient(x_list if len(x_list) > 1 else x_list[0])
+        return self._apply(driver, args, kwargs)
+
+    def jacobian(self, *args, **kwargs):
+        """
+        Jacobian w.r.t. the only array argument
+        """
+        return self._apply(lambda cg, x_list: cg.jacobian(x_list[0]), args, kwargs)
+
+    def hessian(self, *args, **kwargs):
+        """
+        Hessian w.r.t. the only array argument
+        """
+        return self._apply(lambda cg, x_list: cg.hessian(x_list[0]), args, kwargs)
+
+    def cache_info(self):
+        """
+        returns the number of cache hits, misses, re-traces due to guards
+        that did not hold, the maximal and the current number of cached CGraphs
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.retraces, self.maxsize, len(self._cache))
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.retraces = 0
+
+def jit(func=None, maxsize=16, static_argnums=()):
+    """
+    Decorator that caches the traced and compiled computational graph of
+    a function for each signature of its arguments (see JitFunction).
+
+    Example:
+
+        @algopy.jit
+        def f(x):
+            return algopy.sum(algopy.sin(x) * x)
+
+        f(numpy.ones(3))            # traces f
+        f.gradient(numpy.ones(3))   # uses the cached CGraph
+        f.hessian(numpy.ones(4))    # traces f for the new shape
+        print(f.cache_info())
+
+        @algopy.jit(maxsize=4, static_argnums=(1,))
+        def g(x, n):
+            return algopy.sum(x**n)
+
+    """
+    if func is None:
+        return lambda func: JitFunction(func, maxsize=maxsize, static_argnums=static_argnums)
+    return JitFunction(func, maxsize=maxsize, static_argnums=static_argnums)
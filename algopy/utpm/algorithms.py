@@ -16,6 +16,8 @@ the function implementations by C or Fortran functions.
 
 import math
 import functools
+import threading
+import weakref
 
 import numpy
 from numpy.lib.stride_tricks import as_strided, broadcast_arrays
@@ -31,7 +33,17 @@ try:
 except ImportError:
     pytpcore = None
 
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
 from algopy import nthderiv
+from .._npversion import NumpyVersion
+
+# numpy.matmul and the linalg functions broadcast over stacks of matrices
+# since numpy 1.10; older versions loop over the leading (D,P) axes
+_batched_linalg = NumpyVersion(numpy.version.version) >= '1.10.0'
 
 
 def _plus_const(x_data, c, out=None):
@@ -48,6 +60,72 @@ def _plus_const(x_data, c, out=None):
     y_data[0] += c
     return y_data
 
+def _dot_shape(x_shp, y_shp):
+    """
+    shape of numpy.dot(x, y) for arrays of shape x_shp and y_shp
+    """
+    if len(y_shp) < 2:
+        return tuple(x_shp[:-1])
+    return tuple(x_shp[:-1]) + tuple(y_shp[:-2]) + tuple(y_shp[-1:])
+
+def _stacked_dot(x, y, xn, yn):
+    """
+    numpy.dot of the trailing xn- and yn-dimensional slices of x and y,
+    broadcast over all leading axes (xn, yn in (1, 2)).
+    """
+    if xn == 1:
+        x = x[..., None, :]
+    if yn == 1:
+        y = y[..., None]
+    z = numpy.matmul(x, y)
+    if yn == 1:
+        z = z[..., 0]
+    if xn == 1:
+        z = z[..., 0, :] if yn == 2 else z[..., 0]
+    return z
+
+def _taylor_dot(x_data, y_data, out=None):
+    """
+    Sum over the leading (degree) axis of the elementwise product x*y.
+
+    This is the inner sum of the Taylor recurrences, e.g.
+    sum_{k=0}^{d-1} z_k y_{d-k} = _taylor_dot(z_data[:d], y_data[d:0:-1]),
+    computed by einsum without allocating the product x*y.
+    An empty degree axis gives zeros.
+    """
+    if out is None:
+        return numpy.einsum('i...,i...->...', x_data, y_data)
+    return numpy.einsum('i...,i...->...', x_data, y_data, out=out)
+
+def _taylor_convolve(x_data, y_data, out=None):
+    """
+    Truncated Cauchy product of two arrays of Taylor coefficients,
+
+        z_d = sum_{k=0}^d x_k y_{d-k},    d = 0,...,D-1,
+
+    computed for all degrees at once.
+
+    y_data is zero padded to length 2D-1 and viewed as the lower triangular
+    Toeplitz matrix T[d,k] = y_{d-k} (no copy), so that z = T x is a single
+    einsum over the degree axis.
+    """
+    D = x_data.shape[0]
+    y_pad = numpy.zeros((2*D - 1,) + y_data.shape[1:],
+            dtype=numpy.result_type(x_data, y_data))
+    y_pad[D-1:] = y_data
+    s = y_pad.strides
+    toeplitz = as_strided(y_pad[D-1:], shape=(D, D) + y_data.shape[1:],
+            strides=(s[0], -s[0]) + s[1:])
+
+    # einsum is not careful about aliasing
+    if out is None or numpy.may_share_memory(out, x_data):
+        z_data = numpy.einsum('ij...,j...->i...', toeplitz, x_data)
+        if out is None:
+            return z_data
+        out[...] = z_data
+        return out
+    return numpy.einsum('ij...,j...->i...', toeplitz, x_data, out=out)
+
 def _eval_slow_generic(f, x_data, out=None):
     """
     This is related to summations associated with the name 'Faa di Bruno.'
@@ -100,12 +178,12 @@ def _black_f_white_fprime(f, fprime_data, x_data, out=None):
     # Do the direct computation efficiently (e.g. using C implemention of erf).
     y_data[0] = f(x_data[0])
 
-    # Compute the truncated series coefficients using discrete convolution.
-    #FIXME: one of these two loops can be vectorized
-    for d in range(1, D):
-        for c in range(d):
-            y_data[d] += fprime_data[d-1-c] * x_data[c+1] * (c+1)
-        y_data[d] /= d
+    # Compute the truncated series coefficients using discrete convolution,
+    # d y_d = sum_{c=0}^{d-1} fprime_{d-1-c} (c+1) x_{c+1}.
+    if D > 1:
+        degrees = numpy.arange(1, D).reshape((D-1,) + (1,)*(x_data.ndim-1))
+        y_data[1:] = _taylor_convolve(fprime_data[:D-1], x_data[1:] * degrees)
+        y_data[1:] /= degrees
 
     return y_data
 
@@ -182,6 +260,9 @@ def vdot(x,y, z = None):
     if x_shp[-1] != y_shp[-2]:
         raise ValueError('got x.shape = %s and y.shape = %s'%(str(x_shp),str(y_shp)))
 
+    if _batched_linalg and numpy.ndim(x) in (3, 4):
+        return numpy.matmul(x, y)
+
     if numpy.ndim(x) == 3:
         P,N,M  = x_shp
         P,M,K  = y_shp
@@ -258,6 +339,287 @@ def broadcast_arrays_shape(x_shp,y_shp):
 
     return z_shp
 
+def _matrix_taylor_sum(A_data, y_data, d):
+    """
+    computes sum_{k=1}^d dot(A_data[k], y_data[d-k]) for all directions p
+    """
+    if _batched_linalg:
+        return numpy.matmul(A_data[1:d+1], y_data[d-1::-1]).sum(axis=0)
+
+    P = A_data.shape[1]
+    retval = numpy.zeros(y_data.shape[1:],
+            dtype=numpy.promote_types(A_data.dtype, y_data.dtype))
+    for p in range(P):
+        for k in range(1, d+1):
+            retval[p] += numpy.dot(A_data[k,p], y_data[d-k,p])
+    return retval
+
+
+# The MemoryPool instances entered by `with MemoryPool():` are stored as a
+# stack per thread and, if contextvars is available (Python >= 3.7), per
+# context. RawAlgorithmsMixIn.__zeros__ and __zeros_like__ use the innermost.
+if contextvars is not None:
+    _memory_pools = contextvars.ContextVar('algopy_memory_pools', default=())
+
+    def get_memory_pools():
+        """ returns the stack of MemoryPool instances of the current context"""
+        return _memory_pools.get()
+
+    def set_memory_pools(pools):
+        """ sets the stack of MemoryPool instances of the current context"""
+        _memory_pools.set(pools)
+
+else:
+    _memory_pool_state = threading.local()
+
+    def get_memory_pools():
+        """ returns the stack of MemoryPool instances of the current thread"""
+        return getattr(_memory_pool_state, 'pools', ())
+
+    def set_memory_pools(pools):
+        """ sets the stack of MemoryPool instances of the current thread"""
+        _memory_pool_state.pools = pools
+
+
+class PoolBuffer(object):
+    """
+    Exposes a buffer of a MemoryPool as array of the given shape, dtype and
+    strides. The arrays handed out by the pool have a PoolBuffer as base.
+    """
+
+    def __init__(self, buf, shape, dtype, strides = None):
+        self.buf = buf
+        self.__array_interface__ = {'data': (buf.ctypes.data, False),
+                                    'shape': shape,
+                                    'typestr': dtype.str,
+                                    'strides': strides,
+                                    'version': 3}
+
+def owns_data(data):
+    """
+    returns True if the array data owns its memory, i.e., if it is not a view
+    of another array. Arrays handed out by a MemoryPool own their memory.
+    """
+    return data.flags['OWNDATA'] or isinstance(data.base, PoolBuffer)
+
+
+class MemoryPool(object):
+    """
+    Pool of buffers for the (D,P,...) arrays allocated by
+    RawAlgorithmsMixIn.__zeros__ and __zeros_like__, e.g. by UTPM.zeros_like.
+
+    The pool is only used inside a with statement::
+
+        with MemoryPool() as pool:
+            for x in xs:
+                J = cg.jacobian(x)
+        print(pool.hit_rate)
+
+    Buffers are bucketed in size classes of powers of two bytes. When an
+    array handed out by the pool (and all views of it) has been garbage
+    collected, its buffer returns to the bucket and is reused by the next
+    allocation of the same size class. This saves the allocation and page
+    faulting of large arrays, e.g. in repeated Jacobian evaluations.
+
+    Arrays smaller than min_nbytes are allocated with numpy.zeros since
+    the book keeping is more expensive than malloc for them.
+    On exit the pool drops its buffers.
+
+    The pool is used by the thread (resp. asyncio task) that entered it,
+    allocations in other threads are not affected.
+    Use owns_data instead of the OWNDATA flag to check whether an array
+    handed out by the pool is a view.
+    """
+
+    def __init__(self, min_nbytes = 2**16):
+        self.min_nbytes = min_nbytes
+        self.buckets = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._depth = 0
+
+    @property
+    def hit_rate(self):
+        """ fraction of the pooled allocations that reused a buffer """
+        requests = self.hits + self.misses
+        return float(self.hits)/requests if requests else 0.
+
+    @property
+    def nbytes(self):
+        """ number of bytes of the buffers that are currently in the pool """
+        with self._lock:
+            return sum([size*len(free) for size, free in self.buckets.items()])
+
+    def zeros(self, shp, dtype, order = 'C'):
+        """ returns numpy.zeros(shp, dtype, order) using a pooled buffer """
+        dtype = numpy.dtype(dtype)
+        if isinstance(shp, int):
+            shp = (shp,)
+        shp = tuple(shp)
+        count = int(numpy.prod(shp))
+        nbytes = count*dtype.itemsize
+        if self._depth == 0 or nbytes < self.min_nbytes or dtype.hasobject:
+            return numpy.zeros(shp, dtype = dtype, order = order)
+
+        size = 1 << (nbytes - 1).bit_length()
+        with self._lock:
+            free = self.buckets.get(size)
+            if free:
+                buf = free.pop()
+                self.hits += 1
+            else:
+                buf = None
+                self.misses += 1
+        if buf is None:
+            buf = numpy.empty(size, dtype = numpy.uint8)
+
+        strides = None
+        if order == 'F':
+            strides = tuple(numpy.cumprod((dtype.itemsize,) + shp[:-1]).tolist())
+
+        # the PoolBuffer is the base of data and all views of data, hence the
+        # buffer is released only when the last one of them has been collected
+        base = PoolBuffer(buf, shp, dtype, strides)
+        weakref.finalize(base, self._release, size, buf)
+        data = numpy.asarray(base)
+        data[...] = 0
+        return data
+
+    def zeros_like(self, x):
+        """
+        returns numpy.zeros_like(x) using a pooled buffer,
+        the result is Fortran ordered if x is Fortran but not C contiguous
+        """
+        order = 'F' if x.flags['F_CONTIGUOUS'] and not x.flags['C_CONTIGUOUS'] else 'C'
+        return self.zeros(x.shape, x.dtype, order = order)
+
+    def _release(self, size, buf):
+        with self._lock:
+            if self._depth > 0:
+                self.buckets.setdefault(size, []).append(buf)
+
+    def clear(self):
+        """ drops the buffers and resets the hit statistics """
+        with self._lock:
+            self.buckets = {}
+            self.hits = 0
+            self.misses = 0
+
+    def __enter__(self):
+        with self._lock:
+            self._depth += 1
+        set_memory_pools(get_memory_pools() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pools = get_memory_pools()
+        n = len(pools) - 1 - pools[::-1].index(self)
+        set_memory_pools(pools[:n] + pools[n+1:])
+        with self._lock:
+            self._depth -= 1
+            if self._depth == 0:
+                self.buckets = {}
+        return False
+
+
+class Factorization(object):
+    """
+    LU or Cholesky factors of the base point A_data[0] of a UTPM matrix,
+    one factorization per direction p.
+
+    All Taylor coefficients of solve(A, x) and inv(A) are obtained by
+    solving with A_0, so factoring once costs O(P N^3) and each further
+    degree only O(P N^2) per right hand side.
+
+    For more than max_loop_P directions, one scipy call per direction is
+    slower than the batched numpy.linalg routines. Then A_0 is inverted
+    once for all directions by numpy.linalg.inv and each solve is a single
+    numpy.matmul (kind 'inv').
+
+    Parameters
+    ----------
+
+    A_data:     numpy.ndarray
+                A_data.shape = (D,P,N,N)
+
+    assume_a:   None, 'gen' or 'pos'
+                'gen' uses scipy.linalg.lu_factor, 'pos' uses
+                scipy.linalg.cho_factor. None uses cho_factor for the
+                directions where A_0 is exactly Hermitian and positive
+                definite and lu_factor for the others, since cho_factor
+                only reads one triangle of A_0.
+    """
+
+    max_loop_P = 4
+
+    def __init__(self, A_data, assume_a=None):
+        if assume_a not in (None, 'gen', 'pos'):
+            raise ValueError("assume_a must be None, 'gen' or 'pos', got %r" % (assume_a,))
+
+        self.A_data = A_data
+        self.kinds = []
+        self.factors = []
+        self.inverse = None
+        self.trans = False
+
+        P = A_data.shape[1]
+        if _batched_linalg and P > self.max_loop_P:
+            if assume_a == 'pos':
+                # raises LinAlgError if A_0 is not positive definite
+                numpy.linalg.cholesky(A_data[0])
+            self.inverse = numpy.linalg.inv(A_data[0])
+            self.kinds = ['inv'] * P
+            return
+
+        for A0 in A_data[0]:
+            if assume_a == 'pos' or (assume_a is None and numpy.array_equal(A0, A0.conj().T)):
+                try:
+                    self.factors.append(scipy.linalg.cho_factor(A0))
+                    self.kinds.append('pos')
+                    continue
+                except numpy.linalg.LinAlgError:
+                    if assume_a == 'pos':
+                        raise
+            self.factors.append(scipy.linalg.lu_factor(A0))
+            self.kinds.append('gen')
+
+    def transpose(self):
+        """
+        returns the Factorization of A^T, which shares the factors of A
+        """
+        retval = Factorization.__new__(Factorization)
+        retval.A_data = self.A_data.transpose((0,1,3,2))
+        retval.kinds = self.kinds
+        retval.factors = self.factors
+        retval.inverse = None
+        if self.inverse is not None:
+            retval.inverse = self.inverse.transpose((0,2,1))
+        retval.trans = not self.trans
+        return retval
+
+    def solve_base(self, b_data, out=None):
+        """
+        solves A_0 y = b for all directions p, where b_data.shape = (P,N,...)
+        """
+        if out is None:
+            out = numpy.empty(b_data.shape,
+                    dtype=numpy.promote_types(self.A_data.dtype, b_data.dtype))
+
+        if self.inverse is not None:
+            out[...] = _stacked_dot(self.inverse, b_data, 2, b_data.ndim - 1)
+            return out
+
+        for p, (kind, factor) in enumerate(zip(self.kinds, self.factors)):
+            if kind == 'pos' and self.trans:
+                # A_0^T = conj(A_0) for Hermitian A_0
+                out[p] = numpy.conj(scipy.linalg.cho_solve(factor, numpy.conj(b_data[p])))
+            elif kind == 'pos':
+                out[p] = scipy.linalg.cho_solve(factor, b_data[p])
+            else:
+                out[p] = scipy.linalg.lu_solve(factor, b_data[p], trans=int(self.trans))
+        return out
+
 
 class RawAlgorithmsMixIn:
 
@@ -306,18 +668,26 @@ class RawAlgorithmsMixIn:
             else:
                 return z_data
         else:
-            # numpy.sum is careful about aliasing so we can use out=z_data
-            if out is None:
-                z_data = numpy.empty_like(x_data)
-            else:
-                z_data = out
-            for d in range(D)[::-1]:
-                numpy.sum(
-                        x_data[:d+1,:,...] * y_data[d::-1,:,...],
-                        axis=0,
-                        out = z_data[d,:,...])
-            return z_data
+            return _taylor_convolve(x_data, y_data, out=out)
+
+    @classmethod
+    def _imul(cls, z_data, x_data):
+        """
+        z *= x
 
+        works in place: the coefficients are updated from d = D-1 down to 0,
+        so that z[d] only reads the not yet overwritten z[:d]
+        """
+        if numpy.may_share_memory(z_data, x_data):
+            x_data = x_data.copy()
+        (D,P) = z_data.shape[:2]
+        tmp = numpy.empty_like(z_data[0])
+        for d in range(D-1, 0, -1):
+            _taylor_dot(z_data[:d], x_data[d:0:-1], out=tmp)
+            z_data[d] *= x_data[0]
+            z_data[d] += tmp
+        z_data[0] *= x_data[0]
+        return z_data
 
     @classmethod
     def _minimum(cls, x_data, y_data, out=None):
@@ -329,7 +699,7 @@ class RawAlgorithmsMixIn:
         ymask = 1 - xmask
         z_data = numpy.empty_like(x_data)
         for d in range(D):
-            numpy.add(xmask * x_data[d], ymask * y_data[d], out=z_data[d])
+            numpy.add(xmask * x_data[d], ymask * y_data[d], out=z_data[d, ...])
         if out is not None:
             out[...] = z_data[...]
             return out
@@ -346,7 +716,7 @@ class RawAlgorithmsMixIn:
         ymask = 1 - xmask
         z_data = numpy.empty_like(x_data)
         for d in range(D):
-            numpy.add(xmask * x_data[d], ymask * y_data[d], out=z_data[d])
+            numpy.add(xmask * x_data[d], ymask * y_data[d], out=z_data[d, ...])
         if out is not None:
             out[...] = z_data[...]
             return out
@@ -358,21 +728,32 @@ class RawAlgorithmsMixIn:
         """
         z += x*y
         """
-        z_data = out
         if out is None:
-            raise NotImplementedError
+            out = numpy.zeros(x_data.shape,
+                    dtype=numpy.promote_types(x_data.dtype, y_data.dtype))
+        z_data = out
 
-        (D,P) = z_data.shape[:2]
-        for d in range(D):
-            z_data[d,:,...] +=  numpy.sum(x_data[:d+1,:,...] * y_data[d::-1,:,...], axis=0)
+        z_data += _taylor_convolve(x_data, y_data)
+        return z_data
 
     @classmethod
     def _itruediv(cls, z_data, x_data):
+        """
+        z /= x
+
+        works in place: the coefficient d only reads z[d] and the already
+        divided z[:d], so only one (P,...) slice is allocated
+        """
+        if numpy.may_share_memory(z_data, x_data):
+            x_data = x_data.copy()
         (D,P) = z_data.shape[:2]
-        tmp_data = z_data.copy()
-        for d in range(D):
-            tmp_data[d,:,...] = 1./ x_data[0,:,...] * ( z_data[d,:,...] - numpy.sum(tmp_data[:d,:,...] * x_data[d:0:-1,:,...], axis=0))
-        z_data[...] = tmp_data[...]
+        tmp = numpy.empty_like(z_data[0])
+        for d in range(1, D):
+            z_data[d-1] /= x_data[0]
+            _taylor_dot(z_data[:d], x_data[d:0:-1], out=tmp)
+            z_data[d] -= tmp
+        z_data[D-1] /= x_data[0]
+        return z_data
 
     @classmethod
     def _truediv(cls, x_data, y_data, out = None):
@@ -380,37 +761,36 @@ class RawAlgorithmsMixIn:
         z = x/y
         """
         if out is None:
-            raise NotImplementedError
+            out = numpy.empty(x_data.shape,
+                    dtype=numpy.promote_types(x_data.dtype, y_data.dtype))
 
-        z_data = numpy.empty_like(out)
-        (D,P) = z_data.shape[:2]
-        for d in range(D):
-            z_data[d,:,...] = 1./ y_data[0,:,...] * ( x_data[d,:,...] - numpy.sum(z_data[:d,:,...] * y_data[d:0:-1,:,...], axis=0))
-
-        out[...] = z_data[...]
-        return out
+        if numpy.may_share_memory(out, y_data):
+            y_data = y_data.copy()
+        if out is not x_data:
+            out[...] = x_data
+        return cls._itruediv(out, y_data)
 
     @classmethod
     def _reciprocal(cls, y_data, out=None):
         """
         z = 1/y
         """
-        #FIXME: this function could use some attention;
-        # it was copypasted from div
-        z_data = numpy.empty_like(y_data)
+        if out is None or numpy.may_share_memory(out, y_data):
+            z_data = numpy.empty_like(y_data)
+        else:
+            z_data = out
         D = y_data.shape[0]
         if pytpcore:
             y_data_reshaped = y_data.reshape((D, -1))
             z_data_reshaped = z_data.reshape((D, -1))
             pytpcore.tp_reciprocal(y_data_reshaped, z_data_reshaped)
         else:
-            for d in range(D):
-                if d == 0:
-                    z_data[d,:,...] = 1./ y_data[0,:,...] * ( 1 - numpy.sum(z_data[:d,:,...] * y_data[d:0:-1,:,...], axis=0))
-                else:
-                    z_data[d,:,...] = 1./ y_data[0,:,...] * ( 0 - numpy.sum(z_data[:d,:,...] * y_data[d:0:-1,:,...], axis=0))
+            z_data[0] = 1. / y_data[0]
+            for d in range(1, D):
+                _taylor_dot(z_data[:d], y_data[d:0:-1], out=z_data[d, ...])
+                z_data[d] *= -z_data[0]
 
-        if out is not None:
+        if out is not None and z_data is not out:
             out[...] = z_data[...]
             return out
         else:
@@ -419,10 +799,11 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_reciprocal(cls, ybar_data, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         #FIXME: this is probably dumb
         tmp = -cls._reciprocal(cls._square(x_data))
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _floordiv(cls, x_data, y_data, out = None):
@@ -432,9 +813,10 @@ class RawAlgorithmsMixIn:
         use L'Hospital's rule when leading coefficients of y_data are zero
 
         """
-        z_data = out
         if out is None:
-            raise NotImplementedError
+            out = numpy.empty(x_data.shape,
+                    dtype=numpy.promote_types(x_data.dtype, y_data.dtype))
+        z_data = out
 
         (D,P) = z_data.shape[:2]
 
@@ -463,18 +845,17 @@ class RawAlgorithmsMixIn:
             y_data[D-1,  mask] = 0.
 
         for d in range(D):
-            z_data[d,:,...] = 1./ y_data[0,:,...] * \
-                         ( x_data[d,:,...]
-                           - numpy.sum(z_data[:d,:,...] * y_data[d:0:-1,:,...],
-                           axis=0)
-                         )
+            _taylor_dot(z_data[:d], y_data[d:0:-1], out=z_data[d, ...])
+            numpy.subtract(x_data[d], z_data[d], out=z_data[d, ...])
+            z_data[d] /= y_data[0]
+        return z_data
 
     @classmethod
     def _pow_real(cls, x_data, r, out = None):
         """ y = x**r, where r is scalar """
-        y_data = out
         if out is None:
-            raise NotImplementedError
+            out = numpy.empty_like(x_data)
+        y_data = out
         (D,P) = y_data.shape[:2]
 
         if type(r) == int and r >= 0:
@@ -494,7 +875,7 @@ class RawAlgorithmsMixIn:
                 y_data[...] = x_data[...]
                 for nr in range(r-1):
                     cls._mul(x_data, y_data, y_data)
-                return
+                return y_data
 
             else:
                 raise NotImplementedError("power to %d is not implemented" % r)
@@ -502,19 +883,27 @@ class RawAlgorithmsMixIn:
 
 
 
+        # kx_data[k] = k x_k and ky_data[k] = k y_k
+        degrees = numpy.arange(D).reshape((D,) + (1,)*(x_data.ndim-1))
+        kx_data = x_data * degrees
+        ky_data = numpy.zeros_like(y_data)
+
         y_data[0] = x_data[0]**r
         for d in range(1,D):
-            y_data[d] = r * numpy.sum([y_data[d-k] * k * x_data[k] for k in range(1,d+1)], axis = 0) - \
-                numpy.sum([ x_data[d-k] * k * y_data[k] for k in range(1,d)], axis = 0)
+            _taylor_dot(kx_data[1:d+1], y_data[d-1::-1], out=y_data[d, ...])
+            y_data[d] *= r
+            y_data[d] -= _taylor_dot(ky_data[1:d], x_data[d-1:0:-1])
 
             y_data[d] /= x_data[0]
             y_data[d] /= d
+            ky_data[d] = y_data[d] * d
+        return y_data
 
     @classmethod
     def _pb_pow_real(cls, ybar_data, x_data, r, y_data, out = None):
         """ pullback function of y = pow(x,r) """
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         (D,P) = y_data.shape[:2]
@@ -553,13 +942,14 @@ class RawAlgorithmsMixIn:
             xbar_data += tmp
 
         # print 'xbar_data=',xbar_data
+        return out
 
 
     @classmethod
     def _max(cls, x_data, axis = None, out = None):
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.empty(x_data.shape[:2], dtype=x_data.dtype)
 
         x_shp = x_data.shape
 
@@ -571,6 +961,7 @@ class RawAlgorithmsMixIn:
 
         for p in range(P):
             out[:,p] = x_data[:,p,numpy.argmax(x_data[0,p])]
+        return out
 
 
     @classmethod
@@ -597,15 +988,15 @@ class RawAlgorithmsMixIn:
             x_data_sign = numpy.sign(x_data[0])
         for d in range(D):
             if d == 0:
-                numpy.absolute(x_data[d], out=z_data[d])
+                numpy.absolute(x_data[d], out=z_data[d, ...])
             else:
-                numpy.multiply(x_data[d], x_data_sign, out=z_data[d])
+                numpy.multiply(x_data[d], x_data_sign, out=z_data[d, ...])
         return z_data
 
     @classmethod
     def _pb_absolute(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = numpy.empty_like(x_data)
         D = x_data.shape[0]
         for d in range(D):
@@ -614,6 +1005,7 @@ class RawAlgorithmsMixIn:
             else:
                 fprime_data[d].fill(0)
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _negative(cls, x_data, out=None):
@@ -625,11 +1017,12 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_negative(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = numpy.empty_like(x_data)
         fprime_data[0].fill(-1)
         fprime_data[1:].fill(0)
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _square(cls, x_data, out=None):
@@ -641,41 +1034,39 @@ class RawAlgorithmsMixIn:
             z_data = numpy.empty_like(x_data)
         else:
             z_data = out
-        tmp = numpy.zeros_like(x_data)
-        D, P = x_data.shape[:2]
-        for d in range(D):
-            d_half = (d+1) // 2
-            if d:
-                AB = x_data[:d_half, :, ...] * x_data[d:d-d_half:-1, :, ...]
-                numpy.sum(AB * 2, axis=0, out=tmp[d, :, ...])
-            if (d+1) % 2 == 1:
-                tmp[d, :, ...] += numpy.square(x_data[d_half, :, ...])
-        z_data[...] = tmp[...]
-        return z_data
+        return _taylor_convolve(x_data, x_data, out=z_data)
 
     @classmethod
     def _pb_square(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         cls._amul(ybar_data, x_data*2, out=out)
+        return out
 
     @classmethod
     def _sqrt(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
-        y_data = numpy.zeros_like(x_data)
+            out = numpy.empty_like(x_data)
+        if numpy.may_share_memory(out, x_data):
+            y_data = numpy.empty_like(x_data)
+        else:
+            y_data = out
         D,P = x_data.shape[:2]
 
         y_data[0] = numpy.sqrt(x_data[0])
         for k in range(1,D):
-            y_data[k] = 1./(2.*y_data[0]) * ( x_data[k] - numpy.sum( y_data[1:k] * y_data[k-1:0:-1], axis=0))
-        out[...] = y_data[...]
+            _taylor_dot(y_data[1:k], y_data[k-1:0:-1], out=y_data[k, ...])
+            numpy.subtract(x_data[k], y_data[k], out=y_data[k, ...])
+            y_data[k] /= 2.*y_data[0]
+
+        if y_data is not out:
+            out[...] = y_data[...]
         return out
 
     @classmethod
     def _pb_sqrt(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         tmp = xbar_data.copy()
@@ -702,16 +1093,18 @@ class RawAlgorithmsMixIn:
             for d in range(1,D):
                 xtctilde[d-1] *= d
             for d in range(1, D):
-                y_data[d] = numpy.sum(y_data[:d][::-1]*xtctilde[:d], axis=0)/d
+                _taylor_dot(y_data[d-1::-1], xtctilde[:d], out=y_data[d, ...])
+                y_data[d] /= d
         return y_data
 
     @classmethod
     def _pb_exp(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         cls._amul(ybar_data, y_data, xbar_data)
+        return out
 
     @classmethod
     def _expm1(cls, x_data, out=None):
@@ -722,9 +1115,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_expm1(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = cls._exp(x_data)
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _logit(cls, x_data, out=None):
@@ -735,9 +1129,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_logit(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = cls._reciprocal(x_data - cls._square(x_data))
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _expit(cls, x_data, out=None):
@@ -749,15 +1144,16 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_expit(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         b_data = cls._reciprocal(_plus_const(cls._exp(x_data), 1))
         fprime_data = b_data - cls._square(b_data)
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _sign(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.empty_like(x_data)
         y_data = out
         D, P = x_data.shape[:2]
         y_data[0] = numpy.sign(x_data[0])
@@ -767,10 +1163,11 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_sign(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         xbar_data = out
         tmp = numpy.zeros_like(x_data)
         cls._amul(ybar_data, tmp, xbar_data)
+        return out
 
     @classmethod
     def _botched_clip(cls, a_min, a_max, x_data, out= None):
@@ -778,8 +1175,10 @@ class RawAlgorithmsMixIn:
         In this function the args are permuted w.r.t numpy.
         """
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.empty_like(x_data)
         y_data = out
+        if y_data is not x_data:
+            y_data[...] = x_data
         D, P = x_data.shape[:2]
         y_data[0] = numpy.clip(x_data[0], a_min, a_max)
         mask = numpy.logical_and(
@@ -796,7 +1195,7 @@ class RawAlgorithmsMixIn:
         In this function the args are permuted w.r.t numpy.
         """
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         xbar_data = out
         tmp = numpy.zeros_like(x_data)
         numpy.multiply(
@@ -804,13 +1203,17 @@ class RawAlgorithmsMixIn:
                 numpy.greater_equal(x_data[0], a_min),
                 out=tmp[0])
         cls._amul(ybar_data, tmp, xbar_data)
+        return out
 
 
     @classmethod
     def _log(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
-        y_data = numpy.empty_like(x_data)
+            out = numpy.empty_like(x_data)
+        if numpy.may_share_memory(out, x_data):
+            y_data = numpy.empty_like(x_data)
+        else:
+            y_data = out
         D,P = x_data.shape[:2]
 
         # base point: d = 0
@@ -819,19 +1222,21 @@ class RawAlgorithmsMixIn:
         # higher order coefficients: d > 0
 
         for d in range(1,D):
-            y_data[d] =  (x_data[d]*d - numpy.sum(x_data[1:d][::-1] * y_data[1:d], axis=0))
+            _taylor_dot(x_data[d-1:0:-1], y_data[1:d], out=y_data[d, ...])
+            numpy.subtract(x_data[d]*d, y_data[d], out=y_data[d, ...])
             y_data[d] /= x_data[0]
 
         for d in range(1,D):
             y_data[d] /= d
 
-        out[...] = y_data[...]
+        if y_data is not out:
+            out[...] = y_data[...]
         return out
 
     @classmethod
     def _pb_log(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         xbar_data = out
         xbar_data += cls._truediv(ybar_data, x_data, numpy.empty_like(xbar_data))
         return xbar_data
@@ -845,7 +1250,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_log1p(cls, ybar_data, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         xbar_data = out
         xbar_data += cls._truediv(
                 ybar_data, _plus_const(x_data, 1), numpy.empty_like(xbar_data))
@@ -877,15 +1282,16 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_dawsn(cls, ybar_data, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = _plus_const(-2*cls._mul(x_data, cls._dawsn(x_data)), 1)
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _tansec2(cls, x_data, out = None):
         """ computes tan and sec in Taylor arithmetic"""
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         y_data, z_data = out
         D,P = x_data.shape[:2]
 
@@ -903,19 +1309,20 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_tansec(cls, ybar_data, zbar_data, x_data, y_data, z_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         cls._mul(2*zbar_data, y_data, y_data)
         y_data += ybar_data
         cls._amul(y_data, z_data, xbar_data)
+        return out
 
 
     @classmethod
     def _sincos(cls, x_data, out = None):
         """ computes sin and cos in Taylor arithmetic"""
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         s_data,c_data = out
         D,P = x_data.shape[:2]
 
@@ -933,16 +1340,17 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_sincos(cls, sbar_data, cbar_data, x_data, s_data, c_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         cls._amul(sbar_data, c_data, xbar_data)
         cls._amul(cbar_data, -s_data, xbar_data)
+        return out
 
     @classmethod
     def _arcsin(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         y_data,z_data = out
         D,P = x_data.shape[:2]
 
@@ -960,7 +1368,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _arccos(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         y_data,z_data = out
         D,P = x_data.shape[:2]
 
@@ -978,7 +1386,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _arctan(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         y_data,z_data = out
         D,P = x_data.shape[:2]
 
@@ -998,7 +1406,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _sinhcosh(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         s_data,c_data = out
         D,P = x_data.shape[:2]
 
@@ -1016,7 +1424,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _tanhsech2(cls, x_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.empty_like(x_data), numpy.empty_like(x_data))
         y_data,z_data = out
         D,P = x_data.shape[:2]
 
@@ -1040,9 +1448,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_erf(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = (2. / math.sqrt(math.pi)) * cls._exp(-cls._square(x_data))
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _erfi(cls, x_data, out=None):
@@ -1053,9 +1462,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_erfi(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         fprime_data = (2. / math.sqrt(math.pi)) * cls._exp(cls._square(x_data))
         cls._amul(ybar_data, fprime_data, out=out)
+        return out
 
     @classmethod
     def _dpm_hyp1f1(cls, a, b, x_data, out=None):
@@ -1065,9 +1475,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_dpm_hyp1f1(cls, ybar_data, a, b, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._dpm_hyp1f1(a+1., b+1., x_data) * (float(a) / float(b))
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _hyp1f1(cls, a, b, x_data, out=None):
@@ -1077,9 +1488,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_hyp1f1(cls, ybar_data, a, b, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._hyp1f1(a+1., b+1., x_data) * (float(a) / float(b))
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _hyperu(cls, a, b, x_data, out=None):
@@ -1089,9 +1501,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_hyperu(cls, ybar_data, a, b, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._hyperu(a+1., b+1., x_data) * (-a)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _dpm_hyp2f0(cls, a1, a2, x_data, out=None):
@@ -1101,9 +1514,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_dpm_hyp2f0(cls, ybar_data, a1, a2, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._dpm_hyp2f0(a1+1., a2+1., x_data) * float(a1) * float(a2)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _hyp2f0(cls, a1, a2, x_data, out=None):
@@ -1113,9 +1527,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_hyp2f0(cls, ybar_data, a1, a2, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._hyp2f0(a1+1., a2+1., x_data) * float(a1) * float(a2)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _hyp0f1(cls, b, x_data, out=None):
@@ -1125,9 +1540,10 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_hyp0f1(cls, ybar_data, b, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._hyp0f1(b+1., x_data) / float(b)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _polygamma(cls, m, x_data, out=None):
@@ -1137,35 +1553,38 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_polygamma(cls, ybar_data, m, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._polygamma(m+1, x_data)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _psi(cls, x_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.empty_like(x_data)
         return _eval_slow_generic(nthderiv.psi, x_data, out=out)
 
     @classmethod
     def _pb_psi(cls, ybar_data, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._polygamma(1, x_data)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
     @classmethod
     def _gammaln(cls, x_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.empty_like(x_data)
         return _eval_slow_generic(nthderiv.gammaln, x_data, out=out)
 
     @classmethod
     def _pb_gammaln(cls, ybar_data, x_data, y_data, out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
         tmp = cls._polygamma(0, x_data)
         cls._amul(ybar_data, tmp, out=out)
+        return out
 
 
     @classmethod
@@ -1179,14 +1598,19 @@ class RawAlgorithmsMixIn:
             out = numpy.zeros(new_shp, dtype=numpy.promote_types(x_data.dtype, y_data.dtype) )
 
         z_data = out
-        z_data[...] = 0.
-
         D,P = x_data.shape[:2]
 
-        # print 'x_data.shape=', x_data.shape
-        # print 'y_data.shape=', y_data.shape
-        # print 'z_data.shape=', z_data.shape
+        xn, yn = x_data.ndim - 2, y_data.ndim - 2
+        if (_batched_linalg and xn in (1, 2) and yn in (1, 2)
+                and z_data.shape == x_data.shape[:-1] + y_data.shape[3:]):
+            # one matmul over all (c,p) per degree d;
+            # going down in d allows out to alias x_data or y_data
+            for d in range(D)[::-1]:
+                numpy.sum(_stacked_dot(x_data[:d+1], y_data[d::-1], xn, yn),
+                        axis=0, out=z_data[d, ...])
+            return out
 
+        z_data[...] = 0.
         for d in range(D):
             for p in range(P):
                 for c in range(d+1):
@@ -1199,7 +1623,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _dot_pullback(cls, zbar_data, x_data, y_data, z_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.zeros_like(x_data), numpy.zeros_like(y_data))
 
         (xbar_data, ybar_data) = out
 
@@ -1215,9 +1639,16 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(x_data.shape[:2] + _dot_shape(x_data.shape[2:], numpy.shape(y_data)),
+                    dtype=numpy.result_type(x_data, y_data))
 
         z_data = out
+
+        xn, yn = x_data.ndim - 2, numpy.ndim(y_data)
+        if _batched_linalg and xn in (1, 2) and yn in (1, 2):
+            z_data[...] = _stacked_dot(x_data, y_data, xn, yn)
+            return out
+
         z_data[...] = 0.
 
         D,P = x_data.shape[:2]
@@ -1237,9 +1668,16 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(y_data.shape[:2] + _dot_shape(numpy.shape(x_data), y_data.shape[2:]),
+                    dtype=numpy.result_type(x_data, y_data))
 
         z_data = out
+
+        xn, yn = numpy.ndim(x_data), y_data.ndim - 2
+        if _batched_linalg and xn in (1, 2) and yn in (1, 2):
+            z_data[...] = _stacked_dot(x_data, y_data, xn, yn)
+            return out
+
         z_data[...] = 0.
 
         D,P = y_data.shape[:2]
@@ -1257,7 +1695,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(x_data.shape + y_data.shape[2:], dtype=numpy.result_type(x_data, y_data))
 
         z_data = out
         z_data[...] = 0.
@@ -1279,7 +1717,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(x_data.shape + numpy.shape(y), dtype=numpy.result_type(x_data, y))
 
         z_data = out
         z_data[...] = 0.
@@ -1301,7 +1739,8 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(y_data.shape[:2] + numpy.shape(x) + y_data.shape[2:],
+                    dtype=numpy.result_type(x, y_data))
 
         z_data = out
         z_data[...] = 0.
@@ -1319,7 +1758,7 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _outer_pullback(cls, zbar_data, x_data, y_data, z_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.zeros_like(x_data), numpy.zeros_like(y_data))
 
         (xbar_data, ybar_data) = out
 
@@ -1329,34 +1768,35 @@ class RawAlgorithmsMixIn:
         return out
 
     @classmethod
-    def _inv(cls, x_data, out = None):
+    def _inv(cls, x_data, out = None, factors = None):
         """
         computes y = inv(x)
+
+        factors is an optional Factorization of x_data
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.zeros_like(x_data),)
 
         y_data, = out
         (D,P,N,M) = y_data.shape
 
+        if factors is None:
+            factors = Factorization(x_data)
+
         # tc[0] element
-        for p in range(P):
-            y_data[0,p,:,:] = numpy.linalg.inv(x_data[0,p,:,:])
+        factors.solve_base(numpy.eye(N) * numpy.ones((P,1,1)), out = y_data[0])
 
         # tc[d] elements
         for d in range(1,D):
-            for p in range(P):
-                for c in range(1,d+1):
-                    y_data[d,p,:,:] += numpy.dot(x_data[c,p,:,:], y_data[d-c,p,:,:],)
-                y_data[d,p,:,:] =  numpy.dot(-y_data[0,p,:,:], y_data[d,p,:,:],)
+            factors.solve_base(-_matrix_taylor_sum(x_data, y_data, d), out = y_data[d])
         return y_data
 
 
     @classmethod
     def _inv_pullback(cls, ybar_data, x_data, y_data, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         xbar_data = out
         tmp1 = numpy.zeros(xbar_data.shape)
@@ -1370,17 +1810,19 @@ class RawAlgorithmsMixIn:
 
 
     @classmethod
-    def _solve_pullback(cls, ybar_data, A_data, x_data, y_data, out = None):
+    def _solve_pullback(cls, ybar_data, A_data, x_data, y_data, out = None, factors = None):
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = (numpy.zeros_like(A_data), numpy.zeros_like(x_data))
 
         Abar_data = out[0]
         xbar_data = out[1]
 
-        Tbar = numpy.zeros(xbar_data.shape)
+        Tbar = numpy.zeros(xbar_data.shape, dtype=numpy.result_type(A_data, ybar_data))
 
-        cls._solve( A_data.transpose((0,1,3,2)), ybar_data, out = Tbar)
+        if factors is not None:
+            factors = factors.transpose()
+        cls._solve( A_data.transpose((0,1,3,2)), ybar_data, out = Tbar, factors = factors)
         Tbar *= -1.
         cls._iouter(Tbar, y_data, Abar_data)
         xbar_data -= Tbar
@@ -1391,11 +1833,11 @@ class RawAlgorithmsMixIn:
     def _solve_non_UTPM_x_pullback(cls, ybar_data, A_data, x_data, y_data, out = None):
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
 
-        Tbar = numpy.zeros(xbar_data.shape)
+        Tbar = numpy.zeros(y_data.shape, dtype=numpy.result_type(A_data, ybar_data))
 
         cls._solve( A_data.transpose((0,1,3,2)), ybar_data, out = Tbar)
         Tbar *= -1.
@@ -1405,16 +1847,19 @@ class RawAlgorithmsMixIn:
 
 
     @classmethod
-    def _solve(cls, A_data, x_data, out = None):
+    def _solve(cls, A_data, x_data, out = None, factors = None):
         """
         solves the linear system of equations for y::
 
             A y = x
 
+        A_data[0] is factored once (or factors, a Factorization of A_data,
+        is used) and all higher order coefficients only need to solve with
+        these factors.
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(x_data.shape, dtype=numpy.result_type(A_data, x_data))
 
         y_data = out
 
@@ -1424,19 +1869,16 @@ class RawAlgorithmsMixIn:
 
         D,P,M,K = x_shp
 
+        if factors is None:
+            factors = Factorization(A_data)
+
         # d = 0:  base point
-        for p in range(P):
-            y_data[0,p,...] = numpy.linalg.solve(A_data[0,p,...], x_data[0,p,...])
+        factors.solve_base(x_data[0], out = y_data[0])
 
         # d = 1,...,D-1
-        dtype = numpy.promote_types(A_data.dtype, x_data.dtype)
-        tmp = numpy.zeros((M,K),dtype=dtype)
         for d in range(1, D):
-            for p in range(P):
-                tmp[:,:] = x_data[d,p,:,:]
-                for k in range(1,d+1):
-                    tmp[:,:] -= numpy.dot(A_data[k,p,:,:],y_data[d-k,p,:,:])
-                y_data[d,p,:,:] = numpy.linalg.solve(A_data[0,p,:,:],tmp)
+            tmp = x_data[d] - _matrix_taylor_sum(A_data, y_data, d)
+            factors.solve_base(tmp, out = y_data[d])
 
         return out
 
@@ -1452,7 +1894,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(x_data.shape, dtype=numpy.result_type(A_data, x_data))
 
         y_data = out
 
@@ -1463,6 +1905,13 @@ class RawAlgorithmsMixIn:
 
         assert M == N
 
+        if _batched_linalg:
+            # a single solve with the right hand sides of all (d,p) as columns
+            rhs = numpy.rollaxis(x_data, 2).reshape((M, -1))
+            y = numpy.linalg.solve(A_data, rhs).reshape((N,) + x_shp[:2] + x_shp[3:])
+            y_data[...] = numpy.rollaxis(y, 0, 3)
+            return out
+
         for d in range(D):
             for p in range(P):
                 y_data[d,p,...] = numpy.linalg.solve(A_data[:,:], x_data[d,p,...])
@@ -1470,17 +1919,20 @@ class RawAlgorithmsMixIn:
         return out
 
     @classmethod
-    def _solve_non_UTPM_x(cls, A_data, x_data, out = None):
+    def _solve_non_UTPM_x(cls, A_data, x_data, out = None, factors = None):
         """
         solves the linear system of equations for y::
 
             A y = x
 
         where x is simple (N,K) float array
+
+        factors is an optional Factorization of A_data
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros(A_data.shape[:2] + numpy.shape(x_data),
+                    dtype=numpy.result_type(A_data, x_data))
 
         y_data = out
 
@@ -1491,19 +1943,15 @@ class RawAlgorithmsMixIn:
 
         assert M==N
 
+        if factors is None:
+            factors = Factorization(A_data)
+
         # d = 0:  base point
-        for p in range(P):
-            y_data[0,p,...] = numpy.linalg.solve(A_data[0,p,...], x_data[...])
+        factors.solve_base(x_data * numpy.ones((P,1,1)), out = y_data[0])
 
         # d = 1,...,D-1
-        tmp = numpy.zeros((M,K),dtype=float)
         for d in range(1, D):
-            for p in range(P):
-                tmp[:,:] = 0.
-                for k in range(1,d+1):
-                    tmp[:,:] -= numpy.dot(A_data[k,p,:,:],y_data[d-k,p,:,:])
-                y_data[d,p,:,:] = numpy.linalg.solve(A_data[0,p,:,:],tmp)
-
+            factors.solve_base(-_matrix_taylor_sum(A_data, y_data, d), out = y_data[d])
 
         return out
 
@@ -1528,6 +1976,23 @@ class RawAlgorithmsMixIn:
                 else:
                     Proj[r,c] = 1
 
+        if _batched_linalg:
+            diag = numpy.arange(N)
+            L_data[0] = numpy.linalg.cholesky(A_data[0])
+            L0inv = numpy.linalg.inv(L_data[0])
+            L0invT = L0inv.swapaxes(-1, -2)
+            for D in range(1,DT):
+                dF = numpy.matmul(L_data[D-1:0:-1],
+                        L_data[1:D].swapaxes(-1, -2)).sum(axis=0)
+                dF -= A_data[D]
+                dF = numpy.matmul(numpy.matmul(L0inv, dF), L0invT)
+
+                # off-diagonal entries, then the diagonal entries
+                L_data[D] = - numpy.matmul(L_data[0], Proj * dF)
+                L_data[D][:, diag, diag] = -0.5 * (
+                        L_data[0][:, diag, diag] * dF[:, diag, diag])
+            return
+
         for p in range(P):
 
             # base point: d = 0
@@ -1592,7 +2057,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement this')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
 
@@ -1637,8 +2102,12 @@ class RawAlgorithmsMixIn:
     @classmethod
     def _pb_reshape(cls, ybar_data, x_data, y_data,  out=None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
+            out += numpy.reshape(ybar_data, x_data.shape)
+            return out
 
+        # in the reverse mode, the bar value of a view is a view of out
+        # (see Function.xbar_from_x), i.e., out is up to date
         return numpy.reshape(out, x_data.shape)
 
     @classmethod
@@ -1665,10 +2134,16 @@ class RawAlgorithmsMixIn:
 
     @classmethod
     def __zeros_like__(cls, data):
+        pools = get_memory_pools()
+        if pools:
+            return pools[-1].zeros_like(data)
         return numpy.zeros_like(data)
 
     @classmethod
     def __zeros__(cls, shp, dtype):
+        pools = get_memory_pools()
+        if pools:
+            return pools[-1].zeros(shp, dtype)
         return numpy.zeros(shp, dtype = dtype)
 
     @classmethod
@@ -1689,7 +2164,10 @@ class RawAlgorithmsMixIn:
 
         # check if the output array is provided
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            DT,P,M,N = numpy.shape(A_data)
+            K = min(M,N)
+            out = (numpy.zeros((DT,P,M,K), dtype=A_data.dtype),
+                   numpy.zeros((DT,P,K,N), dtype=A_data.dtype))
         Q_data = out[0]
         R_data = out[1]
 
@@ -1711,6 +2189,7 @@ class RawAlgorithmsMixIn:
 
         else:
             cls._qr_rectangular(A_data, out = (Q_data, R_data))
+        return Q_data, R_data
 
     @classmethod
     def _qr_rectangular(cls,  A_data, out = None,  work = None, epsilon = 1e-14):
@@ -1726,7 +2205,8 @@ class RawAlgorithmsMixIn:
 
         # check if the output array is provided
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = (numpy.zeros((DT,P,M,K), dtype=A_data.dtype),
+                   numpy.zeros((DT,P,K,N), dtype=A_data.dtype))
         Q_data = out[0]
         R_data = out[1]
 
@@ -1800,6 +2280,7 @@ class RawAlgorithmsMixIn:
                     Q_data[D,p,:,:] = numpy.dot(Q_data[0,p,:,:],K[p,:,:])
                 else:
                     Q_data[D,p,:,:] = numpy.dot(H[p] - numpy.dot(Q_data[0,p],R_data[D,p]), Rinv[p])
+        return Q_data, R_data
 
 
     @classmethod
@@ -1823,7 +2304,8 @@ class RawAlgorithmsMixIn:
 
         # check if the output array is provided
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = (numpy.zeros((D,P,M,M), dtype=A_data.dtype),
+                   numpy.zeros((D,P,M,N), dtype=A_data.dtype))
         Q_data = out[0]
         R_data = out[1]
 
@@ -1872,6 +2354,7 @@ class RawAlgorithmsMixIn:
                 K[...] = 0; K[...] += S;  K[...] += X
                 R_data[d,p,:,:] = numpy.dot(Q_data[0,p,:,:].T, dF) - numpy.dot(K,R_data[0,p,:,:])
                 Q_data[d,p,:,:] = numpy.dot(Q_data[0,p,:,:],K)
+        return Q_data, R_data
 
 
 
@@ -1888,7 +2371,7 @@ class RawAlgorithmsMixIn:
 
 
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
         A_shp = A_data.shape
@@ -1920,6 +2403,7 @@ class RawAlgorithmsMixIn:
         # tmp2 = cls._solve(cls._transpose(R_data[:,:,:N,:]), cls._transpose(tmp), out = numpy.zeros((D,P,M,N)))
         # tmp = cls._dot(tmp[:,:,:,:N], cls._transpose
         # print Rbar_data.shape
+        return out
 
 
 
@@ -2126,7 +2610,8 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros(numpy.shape(y_data)[:2] + numpy.broadcast(x_data, y_data[0,0]).shape,
+                    dtype=numpy.result_type(x_data, y_data))
         z_data = out
 
         D,P = numpy.shape(y_data)[:2]
@@ -2134,12 +2619,13 @@ class RawAlgorithmsMixIn:
         for d in range(D):
             for p in range(P):
                 z_data[d,p] = x_data * y_data[d,p]
+        return z_data
 
     @classmethod
     def _eigh_pullback(cls, lambar_data, Qbar_data, A_data, lam_data, Q_data, out = None):
 
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
 
@@ -2188,7 +2674,7 @@ class RawAlgorithmsMixIn:
     def _eigh1_pullback(cls, Lambar_data, Qbar_data, A_data, Lam_data, Q_data, b_list, out = None):
 
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
 
@@ -2247,7 +2733,7 @@ class RawAlgorithmsMixIn:
 
         # check if the output array is provided
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros_like(A_data)
         Abar_data = out
 
         DT,P,M,N = numpy.shape(A_data)
@@ -2272,6 +2758,7 @@ class RawAlgorithmsMixIn:
 
         else:
             cls._qr_rectangular_pullback( Qbar_data, Rbar_data, A_data, Q_data, R_data, out = out)
+        return out
 
     @classmethod
     def _qr_rectangular_pullback(cls, Qbar_data, Rbar_data, A_data, Q_data, R_data, out = None):
@@ -2280,7 +2767,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('need to implement that...')
+            out = numpy.zeros_like(A_data)
 
         Abar_data = out
 
@@ -2399,7 +2886,7 @@ class RawAlgorithmsMixIn:
         """
 
         if out is None:
-            raise NotImplementedError('should implement that')
+            out = numpy.zeros_like(x_data)
 
         if k != 0:
             raise NotImplementedError('should implement that')
@@ -7,6 +7,9 @@ from algopy.utpm.algorithms import *
 # explicitly import some of the helpers that have underscores
 from algopy.utpm.algorithms import _plus_const
 from algopy.utpm.algorithms import _taylor_polynomials_of_ode_solutions
+from algopy.utpm.algorithms import _taylor_convolve
+from algopy.utpm.algorithms import _black_f_white_fprime
+import algopy.utpm.algorithms
 
 
 class Test_Helper_Functions(TestCase):
@@ -316,6 +319,152 @@ class Test_pushforward_class_functions(TestCase):
         assert_array_almost_equal(X_data.transpose((0,1,3,2)), Y_data)
 
 
+class Test_taylor_convolution(TestCase):
+    """
+    Compare the vectorized kernels with the explicit recurrences
+    for a high degree D.
+    """
+
+    def setUp(self):
+        D, P, M, N = 9, 3, 2, 4
+        self.x = numpy.random.rand(D, P, M, N) + 0.5
+        self.y = numpy.random.rand(D, P, M, N) + 0.5
+
+    def test_taylor_convolve(self):
+        x, y = self.x, self.y
+        z = numpy.zeros_like(x)
+        for d in range(x.shape[0]):
+            for k in range(d+1):
+                z[d] += x[k] * y[d-k]
+        assert_array_almost_equal(z, _taylor_convolve(x, y))
+        assert_array_almost_equal(z, UTPM._mul(x, y))
+        assert_array_almost_equal(z, UTPM._mul(x, y, out=y))
+        assert_array_almost_equal(z, y)
+
+    def test_square(self):
+        x = self.x
+        assert_array_almost_equal(_taylor_convolve(x, x), UTPM._square(x))
+
+    def test_exp_log(self):
+        x = self.x
+        D = x.shape[0]
+        y = numpy.zeros_like(x)
+        y[0] = numpy.exp(x[0])
+        for d in range(1, D):
+            for k in range(1, d+1):
+                y[d] += k * x[k] * y[d-k]
+            y[d] /= d
+        assert_array_almost_equal(y, UTPM._exp(x))
+        assert_array_almost_equal(x, UTPM._log(y, out=numpy.empty_like(x)))
+
+    def test_sqrt(self):
+        x = self.x
+        y = UTPM._sqrt(x, out=numpy.empty_like(x))
+        assert_array_almost_equal(x, _taylor_convolve(y, y))
+
+    def test_truediv_reciprocal(self):
+        x, y = self.x, self.y
+        z = UTPM._truediv(x, y, out=numpy.empty_like(x))
+        assert_array_almost_equal(x, _taylor_convolve(z, y))
+        r = UTPM._reciprocal(y)
+        one = numpy.zeros_like(y)
+        one[0] = 1.
+        assert_array_almost_equal(one, _taylor_convolve(r, y))
+        UTPM._itruediv(x, y)
+        assert_array_almost_equal(z, x)
+
+    def test_pow_real(self):
+        x = self.x
+        y = numpy.empty_like(x)
+        UTPM._pow_real(x, 1.5, out=y)
+        x3 = _taylor_convolve(_taylor_convolve(x, x), x)
+        assert_array_almost_equal(x3, _taylor_convolve(y, y))
+
+    def test_black_f_white_fprime(self):
+        x = self.x
+        D = x.shape[0]
+        fprime = UTPM._exp(x)
+        y = numpy.zeros_like(x)
+        y[0] = numpy.exp(x[0])
+        for d in range(1, D):
+            for c in range(d):
+                y[d] += fprime[d-1-c] * x[c+1] * (c+1)
+            y[d] /= d
+        assert_array_almost_equal(y, _black_f_white_fprime(numpy.exp, fprime, x))
+        assert_array_almost_equal(fprime, UTPM._expm1(x) + (numpy.arange(D) == 0)[:,None,None,None])
+
+
+class Test_batched_linalg(TestCase):
+    """
+    Compare the kernels that broadcast over (D,P) with the loops over (d,p).
+    """
+
+    def looped(self, f, *args):
+        algopy.utpm.algorithms._batched_linalg = False
+        try:
+            return f(*args)
+        finally:
+            algopy.utpm.algorithms._batched_linalg = True
+
+    def test_dot(self):
+        D, P, N, M, K = 4, 5, 3, 4, 2
+        for x_shp, y_shp in [((N, M), (M, K)), ((N, M), (M,)),
+                             ((M,), (M, K)), ((M,), (M,))]:
+            x = numpy.random.randn(D, P, *x_shp)
+            y = numpy.random.randn(D, P, *y_shp)
+            z_shp = (D, P) + x_shp[:-1] + y_shp[1:]
+            z1 = UTPM._dot(x, y, out=numpy.empty(z_shp))
+            z2 = self.looped(UTPM._dot, x, y, numpy.empty(z_shp))
+            assert_array_almost_equal(z1, z2)
+
+            c = numpy.random.randn(*y_shp)
+            z1 = UTPM._dot_non_UTPM_y(x, c, out=numpy.empty(z_shp))
+            z2 = self.looped(UTPM._dot_non_UTPM_y, x, c, numpy.empty(z_shp))
+            assert_array_almost_equal(z1, z2)
+
+    def test_vdot(self):
+        x = numpy.random.randn(4, 5, 3, 2)
+        y = numpy.random.randn(4, 5, 2, 3)
+        assert_array_almost_equal(vdot(x, y), self.looped(vdot, x, y))
+        assert_array_almost_equal(vdot(x[0], y[0]),
+                                  self.looped(vdot, x[0], y[0]))
+
+    def test_inv_solve(self):
+        D, P, N, K = 5, 6, 4, 3
+        A = numpy.random.randn(D, P, N, N)
+        A[0] += 5 * numpy.eye(N)
+        x = numpy.random.randn(D, P, N, K)
+
+        y1 = UTPM._inv(A, out=(numpy.zeros((D, P, N, N)),))
+        y2 = self.looped(UTPM._inv, A, (numpy.zeros((D, P, N, N)),))
+        assert_array_almost_equal(y1, y2)
+
+        y1 = UTPM._solve(A, x, out=numpy.zeros((D, P, N, K)))
+        y2 = self.looped(UTPM._solve, A, x, numpy.zeros((D, P, N, K)))
+        assert_array_almost_equal(y1, y2)
+
+        y1 = UTPM._solve_non_UTPM_A(A[0, 0], x, out=numpy.zeros((D, P, N, K)))
+        y2 = self.looped(UTPM._solve_non_UTPM_A, A[0, 0], x,
+                         numpy.zeros((D, P, N, K)))
+        assert_array_almost_equal(y1, y2)
+
+        y1 = UTPM._solve_non_UTPM_x(A, x[0, 0], out=numpy.zeros((D, P, N, K)))
+        y2 = self.looped(UTPM._solve_non_UTPM_x, A, x[0, 0],
+                         numpy.zeros((D, P, N, K)))
+        assert_array_almost_equal(y1, y2)
+
+    def test_cholesky(self):
+        D, P, N = 4, 3, 5
+        B = numpy.random.randn(D, P, N, N)
+        A = UTPM._dot(B, UTPM._transpose(B))
+        A[0] += N * numpy.eye(N)
+        L1 = numpy.zeros_like(A)
+        L2 = numpy.zeros_like(A)
+        UTPM._cholesky(A, L1)
+        self.looped(UTPM._cholesky, A, L2)
+        assert_array_almost_equal(L1, L2)
+
+
 class Test_aliasing(TestCase):
 
     def test_mul_aliasing(self):
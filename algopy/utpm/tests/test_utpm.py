@@ -13,6 +13,11 @@ try:
 except ImportError:
     mpmath = None
 
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
 
 class Test_Push_Forward(TestCase):
 
@@ -1457,7 +1462,100 @@ class Test_Push_Forward(TestCase):
 
         assert_array_almost_equal(Y.data, Y2.data)
 
+    def test_solve_with_factorization(self):
+        (D,P,N,K) = 4,3,5,2
+        x = UTPM(numpy.random.rand(D,P,N,K))
+        B = UTPM(numpy.random.rand(D,P,N,N))
+        A = UTPM.dot(B, B.T)
+        for n in range(N):
+            A.data[0,:,n,n] += 1.
+
+        # symmetric positive definite A_0: Cholesky, otherwise LU
+        F = UTPM.factor(A)
+        assert_equal(['pos'] * P, F.kinds)
+        assert_equal(['gen'] * P, UTPM.factor(B).kinds)
+        assert_equal(['gen'] * P, UTPM.factor(A, assume_a='gen').kinds)
+
+        y = UTPM.solve(F, x)
+        assert_array_almost_equal(x.data, UTPM.dot(A, y).data)
+        assert_array_almost_equal(UTPM.solve(A, x).data, y.data)
+        assert_array_almost_equal(UTPM.inv(A).data, UTPM.inv(F).data)
+        assert_array_almost_equal(UTPM.solve(A, numpy.eye(N)).data,
+                                  UTPM.solve(F, numpy.eye(N)).data)
+
+        # the factors of A_0 are reused for A^T in the pullback
+        B.data[0] += N*numpy.eye(N)
+        ybar = UTPM(numpy.random.rand(*y.data.shape))
+        out1 = (numpy.zeros(A.data.shape), numpy.zeros(x.data.shape))
+        out2 = (numpy.zeros(A.data.shape), numpy.zeros(x.data.shape))
+        UTPM._solve_pullback(ybar.data, B.data, x.data, y.data, out=out1)
+        UTPM._solve_pullback(ybar.data, B.data, x.data, y.data, out=out2,
+                             factors=UTPM.factor(B))
+        assert_array_almost_equal(out1[0], out2[0])
+        assert_array_almost_equal(out1[1], out2[1])
+
+    def test_factor_complex_hermitian_pullback(self):
+        (D,P,N,K) = 3,2,3,2
+        B = numpy.random.rand(N,N) + 1j*numpy.random.rand(N,N)
+        A = UTPM(numpy.random.rand(D,P,N,N) + 1j*numpy.random.rand(D,P,N,N))
+        for p in range(P):
+            A0 = numpy.dot(B, B.conj().T) + N*numpy.eye(N)
+            A.data[0,p] = 0.5*(A0 + A0.conj().T)
+        x = UTPM(numpy.random.rand(D,P,N,K) + 1j*numpy.random.rand(D,P,N,K))
+
+        F = UTPM.factor(A)
+        assert_equal(['pos'] * P, F.kinds)
+        b = numpy.random.rand(P,N,K) + 1j*numpy.random.rand(P,N,K)
+        y = F.transpose().solve_base(b)
+        for p in range(P):
+            assert_array_almost_equal(numpy.dot(A.data[0,p].T, y[p]), b[p])
+
+        y = UTPM.solve(A, x)
+        ybar = UTPM(numpy.random.rand(*y.data.shape) + 0j)
+        out1 = (numpy.zeros(A.data.shape, dtype=complex), numpy.zeros(x.data.shape, dtype=complex))
+        out2 = (numpy.zeros(A.data.shape, dtype=complex), numpy.zeros(x.data.shape, dtype=complex))
+        UTPM._solve_pullback(ybar.data, A.data, x.data, y.data, out=out1)
+        UTPM._solve_pullback(ybar.data, A.data, x.data, y.data, out=out2, factors=F)
+        assert_array_almost_equal(out1[0], out2[0])
+        assert_array_almost_equal(out1[1], out2[1])
+
+    def test_factor_many_directions(self):
+        # many directions use one batched inverse of A_0 instead of one
+        # factorization per direction
+        (D,P,N,K) = 4,300,4,2
+        A = UTPM(numpy.random.rand(D,P,N,N))
+        A.data[0] += N*numpy.eye(N)
+        x = UTPM(numpy.random.rand(D,P,N,K))
 
+        F = UTPM.factor(A)
+        assert_equal(['inv'] * P, F.kinds)
+        y = UTPM.solve(F, x)
+        assert_array_almost_equal(x.data, UTPM.dot(A, y).data)
+        assert_array_almost_equal(numpy.eye(N), UTPM.dot(A, UTPM.inv(F)).data[0,7])
+
+        b = numpy.random.rand(P,N,K)
+        assert_array_almost_equal(b, numpy.matmul(A.data[0].transpose((0,2,1)),
+                                                  F.transpose().solve_base(b)))
+        assert_raises(numpy.linalg.LinAlgError, UTPM.factor, -A, assume_a='pos')
+
+    def test_factor_nearly_symmetric(self):
+        # A_0 is not exactly symmetric: LU, even within the tolerance of allclose
+        for A0, x0 in [(1e-9*numpy.array([[3.,1.],[0.,3.]]), numpy.array([1.,1.])),
+                       (numpy.array([[4.,1.],[1.000009,4.]]), numpy.array([1.,2.]))]:
+            A = UTPM(numpy.zeros((2,1,2,2)))
+            A.data[0,0] = A0
+            A.data[1,0] = numpy.eye(2)
+            x = UTPM(numpy.zeros((2,1,2,1)))
+            x.data[0,0,:,0] = x0
+            assert_equal(['gen'], UTPM.factor(A).kinds)
+            y = UTPM.solve(A, x)
+            assert_allclose(y.data[0,0,:,0], numpy.linalg.solve(A0, x0), rtol=1e-12)
+            assert_allclose(UTPM.dot(A, y).data, x.data, rtol=1e-10, atol=1e-12)
+
+    def test_factor_errors(self):
+        A = UTPM(numpy.random.rand(2,1,3,3) - 2.)
+        assert_raises(numpy.linalg.LinAlgError, UTPM.factor, A, assume_a='pos')
+        assert_raises(ValueError, UTPM.factor, A, assume_a='sym')
 
     def test_shape(self):
         D,P,N,M,L = 3,4,5,6,7
@@ -2689,6 +2787,225 @@ class TestFFT(TestCase):
         assert_almost_equal(v, numpy.eye(100))
 
 
+class Test_out_and_inplace(TestCase):
+
+    def test_raw_algorithms_allocate_out(self):
+        D,P,N = 4,3,2
+        x = UTPM(numpy.random.rand(D,P,N,N) + 1.)
+        y = UTPM(numpy.random.rand(D,P,N,N) + 1.)
+
+        assert_array_almost_equal(UTPM._sqrt(x.data), x.sqrt().data)
+        assert_array_almost_equal(UTPM._log(x.data), x.log().data)
+        assert_array_almost_equal(UTPM._truediv(x.data, y.data), (x/y).data)
+        assert_array_almost_equal(UTPM._dot(x.data, y.data), UTPM.dot(x, y).data)
+        assert_array_almost_equal(UTPM._inv(x.data), UTPM.inv(x).data)
+        s, c = UTPM._sincos(x.data)
+        assert_array_almost_equal(s, x.sin().data)
+        assert_array_almost_equal(c, x.cos().data)
+
+        ybar = x.zeros_like()
+        ybar.data[...] = numpy.random.rand(D,P,N,N)
+        y = x.exp()
+        xbar = UTPM._pb_exp(ybar.data, x.data, y.data)
+        assert_array_almost_equal(xbar, UTPM.pb_exp(ybar, x, y).data)
+
+    def test_functions_return_out(self):
+        D,P,N = 4,3,2
+        x = UTPM(numpy.random.rand(D,P,N) + 1.)
+        y = UTPM(numpy.random.rand(D,P,N) + 1.)
+
+        for f in [UTPM.sqrt, UTPM.exp, UTPM.log, UTPM.sin, UTPM.cos,
+                  UTPM.tan, UTPM.tanh, UTPM.reciprocal, UTPM.square,
+                  UTPM.negative, UTPM.neg]:
+            out = x.zeros_like()
+            assert f(x, out = out) is out
+            assert_array_almost_equal(out.data, f(x).data)
+
+        for f in [UTPM.add, UTPM.sub, UTPM.mul, UTPM.div]:
+            out = x.zeros_like()
+            assert f(x, y, out = out) is out
+            assert_array_almost_equal(out.data, f(x, y).data)
+
+            # out aliases the second argument
+            z = y.clone()
+            f(x, z, out = z)
+            assert_array_almost_equal(z.data, f(x, y).data)
+
+        xbar = x.zeros_like()
+        ybar = x.zeros_like()
+        ybar.data[...] = numpy.random.rand(D,P,N)
+        assert UTPM.pb_sqrt(ybar, x, x.sqrt(), out = (xbar,)) is xbar
+        assert UTPM.pb_sin(ybar, x, x.sin()) is not None
+
+    def test_max_and_view_pullbacks(self):
+        D,P,M,N = 3,2,4,5
+        x = UTPM(numpy.random.rand(D,P,N))
+        out = UTPM(numpy.zeros((D,P)))
+        assert UTPM.max(x, out = out) is out
+        assert_array_almost_equal(out.data, UTPM.max(x).data)
+
+        A = UTPM(numpy.random.rand(D,P,M,N))
+        ybar = UTPM(numpy.random.rand(D,P,N,M))
+        Abar = UTPM.pb_transpose(ybar, A, A.T)
+        assert_array_almost_equal(Abar.data, ybar.T.data)
+        assert not numpy.may_share_memory(Abar.data, ybar.data)
+
+        ybar = UTPM(numpy.random.rand(D,P,N))
+        Abar = UTPM.pb_getitem(ybar, A, (1, slice(None)), A[1,:])
+        assert_array_almost_equal(Abar.data[:,:,1], ybar.data)
+        assert_array_almost_equal(Abar.data[:,:,0], 0.)
+
+        ybar = UTPM(numpy.random.rand(D,P,M*N))
+        xbar_data = UTPM._pb_reshape(ybar.data, A.data, ybar.data)
+        assert_array_almost_equal(xbar_data, ybar.data.reshape(A.data.shape))
+        assert not numpy.may_share_memory(xbar_data, ybar.data)
+
+    def test_inplace_operators(self):
+        D,P,N = 5,3,4
+        x = UTPM(numpy.random.rand(D,P,N) + 1.)
+        y = UTPM(numpy.random.rand(D,P,N) + 1.)
+        c = numpy.random.rand(N)
+
+        z = x.clone(); z *= y
+        assert_array_almost_equal(z.data, (x*y).data)
+
+        z = x.clone(); z *= z
+        assert_array_almost_equal(z.data, (x*x).data)
+
+        z = x.clone(); z /= y
+        assert_array_almost_equal(z.data, (x/y).data)
+
+        z = x.clone(); z /= z
+        assert_array_almost_equal(z.data, (x/x).data)
+
+        z = x.clone(); z *= c
+        assert_array_almost_equal(z.data, (x*c).data)
+
+        z = x.clone(); z /= 3.
+        assert_array_almost_equal(z.data, (x/3.).data)
+
+    @decorators.skipif(tracemalloc is None)
+    def test_inplace_operators_do_not_allocate(self):
+        D,P,N = 4,2,5000
+        x = UTPM(numpy.random.rand(D,P,N) + 1.)
+        y = UTPM(numpy.random.rand(D,P,N) + 1.)
+        out = x.zeros_like()
+        nbytes = x.data.nbytes
+
+        def peak(f):
+            f()
+            tracemalloc.start()
+            try:
+                f()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        def iadd(): x.__iadd__(y)
+        def isub(): x.__isub__(y)
+        def imul(): x.__imul__(2.)
+        def itruediv(): x.__itruediv__(2.)
+        def imul_utpm(): x.__imul__(y)
+        def itruediv_utpm(): x.__itruediv__(y)
+        def add(): UTPM.add(x, y, out = out)
+        def sub(): UTPM.sub(x, y, out = out)
+        def exp(): UTPM.exp(x, out = out)
+
+        for f in [iadd, isub, imul, itruediv, add, sub]:
+            assert peak(f) < nbytes//10, f.__name__
+
+        # the Taylor recurrences need one (P,...) slice as workspace
+        for f in [imul_utpm, itruediv_utpm]:
+            assert peak(f) < nbytes//2, f.__name__
+
+        assert peak(exp) < nbytes, 'exp'
+
+
+class Test_MemoryPool(TestCase):
+
+    def test_buffers_are_reused(self):
+        x = UTPM(numpy.random.rand(3,2,64,64))
+        with MemoryPool() as pool:
+            for i in range(5):
+                y = x.zeros_like()
+                assert_array_equal(y.data, 0.)
+                y.data[...] = 1.
+                del y
+        assert_equal(pool.misses, 1)
+        assert_equal(pool.hits, 4)
+        assert_almost_equal(pool.hit_rate, 0.8)
+        assert_equal(pool.nbytes, 0)
+
+    def test_views_keep_buffer_alive(self):
+        x = UTPM(numpy.random.rand(3,2,64,64))
+        with MemoryPool() as pool:
+            y = x.zeros_like()
+            s = y.data[1]
+            del y
+            z = x.zeros_like()
+            assert not numpy.may_share_memory(s, z.data)
+            assert_equal(pool.hits, 0)
+
+    def test_small_arrays_and_inactive_pool(self):
+        x = UTPM(numpy.random.rand(3,2,4))
+        pool = MemoryPool()
+        with pool:
+            x.zeros_like()
+            assert_equal(pool.hits + pool.misses, 0)
+        assert_equal(pool.zeros((2,3), float).base, None)
+
+    def test_reverse_mode_inside_pool(self):
+        import algopy
+        x = numpy.random.rand(20000)
+        g = numpy.cos(x)*x + numpy.sin(x) + numpy.exp(x)
+        with MemoryPool() as pool:
+            cg = algopy.CGraph()
+            fx = algopy.Function(x)
+            fy = algopy.sum(algopy.sin(fx)*fx + algopy.exp(fx))
+            cg.trace_off()
+            cg.independentFunctionList = [fx]
+            cg.dependentFunctionList = [fy]
+            for i in range(3):
+                assert_array_almost_equal(cg.gradient(x), g)
+        assert pool.hits > 0
+
+        x = numpy.random.rand(200)
+        with MemoryPool(min_nbytes = 1024) as pool:
+            cg = algopy.CGraph()
+            fx = algopy.Function(x)
+            fy = algopy.sin(fx)*fx + algopy.exp(fx)
+            cg.trace_off()
+            cg.independentFunctionList = [fx]
+            cg.dependentFunctionList = [fy]
+            for i in range(3):
+                J = cg.jacobian(x)
+                assert_array_almost_equal(J, numpy.diag(numpy.cos(x)*x + numpy.sin(x) + numpy.exp(x)))
+        assert pool.hits > 0
+
+    def test_owns_data(self):
+        from algopy.tracer.tracer import nbytes_of
+        with MemoryPool(min_nbytes = 1) as pool:
+            x = UTPM(numpy.random.rand(3,2,4)).zeros_like()
+            assert x.owndata
+            assert not x[1].owndata
+            assert_equal(nbytes_of(x), x.data.nbytes)
+
+    def test_fortran_order(self):
+        x = numpy.zeros((3,2,40,50), order = 'F')
+        with MemoryPool(min_nbytes = 1) as pool:
+            assert pool.zeros_like(x).flags['F_CONTIGUOUS']
+            assert pool.zeros_like(x[::2]).flags['C_CONTIGUOUS']
+
+    def test_pool_is_thread_local(self):
+        import threading
+        x = UTPM(numpy.random.rand(3,2,64,64))
+        with MemoryPool() as pool:
+            t = threading.Thread(target = x.zeros_like)
+            t.start()
+            t.join()
+            assert_equal(pool.hits + pool.misses, 0)
+            x.zeros_like()
+            assert_equal(pool.misses, 1)
 
 
 
@@ -17,7 +17,7 @@ import scipy.linalg
 from ..base_type import Ring
 from .._npversion import NumpyVersion
 
-from .algorithms import RawAlgorithmsMixIn, broadcast_arrays_shape
+from .algorithms import RawAlgorithmsMixIn, broadcast_arrays_shape, Factorization, MemoryPool, owns_data
 
 import operator
 
@@ -164,7 +164,14 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         where A,Q,R are Function objects
         """
         if out is None:
-            raise NotImplementedError('I\'m not sure that this makes sense')
+            if isinstance(x, tuple):
+                xbar = tuple([xi.zeros_like() for xi in x])
+                tmp = list(xbar)
+                tmp[sl] += ybar
+            else:
+                xbar = x.zeros_like()
+                xbar[sl] = ybar
+            return xbar
 
         # workaround for qr and eigh
         if isinstance( out[0], tuple):
@@ -290,8 +297,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
     def __add__(self,rhs):
         if numpy.isscalar(rhs):
             dtype = numpy.promote_types(self.data.dtype, type(rhs))
-            retval = UTPM(numpy.zeros(self.data.shape, dtype=dtype))
-            retval.data[...] = self.data
+            retval = UTPM(self.data.astype(dtype))
             retval.data[0,:] += rhs
             return retval
 
@@ -311,8 +317,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
                 rhs_shape = (rhs_shape,)
             x_data, y_data = UTPM._broadcast_arrays(self.data, rhs.reshape((1,1)+rhs_shape))
             dtype = numpy.promote_types(x_data.dtype, y_data.dtype)
-            z_data = numpy.zeros(x_data.shape, dtype=dtype)
-            z_data[...] = x_data
+            z_data = x_data.astype(dtype)
             z_data[0] += y_data[0]
             return UTPM(z_data)
 
@@ -324,8 +329,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
     def __sub__(self,rhs):
         if numpy.isscalar(rhs):
             dtype = numpy.promote_types(self.data.dtype, type(rhs))
-            retval = UTPM(numpy.zeros(self.data.shape, dtype=dtype))
-            retval.data[...] = self.data
+            retval = UTPM(self.data.astype(dtype))
             retval.data[0,:] -= rhs
             return retval
 
@@ -344,8 +348,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
                 rhs_shape = (rhs_shape,)
             x_data, y_data = UTPM._broadcast_arrays(self.data, rhs.reshape((1,1)+rhs_shape))
             dtype = numpy.promote_types(x_data.dtype, y_data.dtype)
-            z_data = numpy.zeros(x_data.shape, dtype=dtype)
-            z_data[...] = x_data
+            z_data = x_data.astype(dtype)
             z_data[0] -= y_data[0]
             return UTPM(z_data)
 
@@ -489,45 +492,34 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return self
 
     def __imul__(self,rhs):
-        (D,P) = self.data.shape[:2]
-
         if isinstance(rhs,numpy.ndarray) and rhs.dtype == object:
             raise NotImplementedError('should implement that')
 
         elif numpy.isscalar(rhs) or isinstance(rhs,numpy.ndarray):
-            for d in range(D):
-                for p in range(P):
-                    self.data[d,p,...] *= rhs
-        else:
-            for d in range(D)[::-1]:
-                for p in range(P):
-                    self.data[d,p,...] *= rhs.data[0,p,...]
-                    for c in range(d):
-                        self.data[d,p,...] += self.data[c,p,...] * rhs.data[d-c,p,...]
+            self.data[...] *= rhs
+        else:
+            self._imul(self.data, rhs.data)
         return self
 
     def __itruediv__(self,rhs):
-        (D,P) = self.data.shape[:2]
         if isinstance(rhs,numpy.ndarray) and rhs.dtype == object:
             raise NotImplementedError('should implement that')
 
         elif numpy.isscalar(rhs) or isinstance(rhs,numpy.ndarray):
             self.data[...] /= rhs
         else:
-            retval = self.clone()
-            for d in range(D):
-                retval.data[d,:,...] = 1./ rhs.data[0,:,...] * ( self.data[d,:,...] - numpy.sum(retval.data[:d,:,...] * rhs.data[d:0:-1,:,...], axis=0))
-            self.data[...] = retval.data[...]
+            self._itruediv(self.data, rhs.data)
         return self
 
     __div__ = __truediv__
     __idiv__ = __itruediv__
     __rdiv__ = __rtruediv__
 
-    def sqrt(self):
-        retval = self.clone()
-        self._sqrt(self.data, out = retval.data)
-        return retval
+    def sqrt(self, out = None):
+        if out is None:
+            out = self.zeros_like()
+        self._sqrt(self.data, out = out.data)
+        return out
 
     @classmethod
     def pb_sqrt(cls, ybar, x, y, out=None):
@@ -540,14 +532,15 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         cls._pb_sqrt(ybar.data, x.data, y.data, out = xbar.data)
-        return out
+        return xbar
 
-    def exp(self):
+    def exp(self, out = None):
         """ computes y = exp(x) in UTP arithmetic"""
 
-        retval = self.clone()
-        self._exp(self.data, out = retval.data)
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        self._exp(self.data, out = out.data)
+        return out
 
     @classmethod
     def pb_exp(cls, ybar, x, y, out=None):
@@ -560,14 +553,15 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         cls._pb_exp(ybar.data, x.data, y.data, out = xbar.data)
-        return out
+        return xbar
 
-    def expm1(self):
+    def expm1(self, out = None):
         """ computes y = expm1(x) in UTP arithmetic"""
 
-        retval = self.clone()
-        self._expm1(self.data, out = retval.data)
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        self._expm1(self.data, out = out.data)
+        return out
 
     @classmethod
     def pb_expm1(cls, ybar, x, y, out=None):
@@ -580,13 +574,14 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         cls._pb_expm1(ybar.data, x.data, y.data, out = xbar.data)
-        return out
+        return xbar
 
-    def log(self):
+    def log(self, out = None):
         """ computes y = log(x) in UTP arithmetic"""
-        retval = self.clone()
-        self._log(self.data, out = retval.data)
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        self._log(self.data, out = out.data)
+        return out
 
     @classmethod
     def pb_log(cls, ybar, x, y, out=None):
@@ -601,11 +596,12 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         cls._pb_log(ybar.data, x.data, y.data, out = xbar.data)
         return xbar
 
-    def log1p(self):
+    def log1p(self, out = None):
         """ computes y = log1p(x) in UTP arithmetic"""
-        retval = self.clone()
-        self._log1p(self.data, out = retval.data)
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        self._log1p(self.data, out = out.data)
+        return out
 
     @classmethod
     def pb_log1p(cls, ybar, x, y, out=None):
@@ -618,20 +614,22 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         cls._pb_log1p(ybar.data, x.data, y.data, out = xbar.data)
-        return out
+        return xbar
 
-    def sincos(self):
+    def sincos(self, out = None):
         """ simultanteously computes s = sin(x) and c = cos(x) in UTP arithmetic"""
-        retsin = self.clone()
-        retcos = self.clone()
+        if out is None:
+            out = (self.zeros_like(), self.zeros_like())
+        retsin, retcos = out
         self._sincos(self.data, out = (retsin.data, retcos.data))
         return retsin, retcos
 
-    def sin(self):
-        retval = self.clone()
-        tmp = self.clone()
-        self._sincos(self.data, out = (retval.data, tmp.data))
-        return retval
+    def sin(self, out = None):
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._sincos(self.data, out = (out.data, tmp.data))
+        return out
 
     @classmethod
     def pb_sin(cls, sbar, x, s,  out = None):
@@ -645,13 +643,14 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         c = x.cos()
         cbar = x.zeros_like()
         cls._pb_sincos(sbar.data, cbar.data, x.data, s.data, c.data, out = xbar.data)
-        return out
+        return xbar
 
-    def cos(self):
-        retval = self.clone()
-        tmp = self.clone()
-        self._sincos(self.data, out = (tmp.data, retval.data))
-        return retval
+    def cos(self, out = None):
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._sincos(self.data, out = (tmp.data, out.data))
+        return out
 
     @classmethod
     def pb_cos(cls, cbar, x, c,  out = None):
@@ -665,21 +664,23 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         s = x.sin()
         sbar = x.zeros_like()
         cls._pb_sincos(sbar.data, cbar.data, x.data, s.data, c.data, out = xbar.data)
-        return out
+        return xbar
 
 
-    def tansec2(self):
+    def tansec2(self, out = None):
         """ computes simultaneously y = tan(x) and z = sec^2(x)  in UTP arithmetic"""
-        rettan = self.clone()
-        retsec = self.clone()
+        if out is None:
+            out = (self.zeros_like(), self.zeros_like())
+        rettan, retsec = out
         self._tansec2(self.data, out = (rettan.data, retsec.data))
-        return rettan, retset
+        return rettan, retsec
 
-    def tan(self):
-        retval = self.zeros_like()
+    def tan(self, out = None):
+        if out is None:
+            out = self.zeros_like()
         tmp = self.zeros_like()
-        self._tansec2(self.data, out = (retval.data, tmp.data))
-        return retval
+        self._tansec2(self.data, out = (out.data, tmp.data))
+        return out
 
     @classmethod
     def pb_tan(cls, ybar, x, y,  out = None):
@@ -693,15 +694,16 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         z = 1./x.cos(); z = z * z
         zbar = x.zeros_like()
         cls._pb_tansec(ybar.data, zbar.data, x.data, y.data, z.data, out = xbar.data)
-        return out
+        return xbar
 
     @classmethod
-    def dpm_hyp1f1(cls, a, b, x):
+    def dpm_hyp1f1(cls, a, b, x, out = None):
         """ computes y = hyp1f1(a, b, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._dpm_hyp1f1(a, b, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._dpm_hyp1f1(a, b, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_dpm_hyp1f1(cls, ybar, a, b, x, y, out=None):
@@ -719,12 +721,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def hyp1f1(cls, a, b, x):
+    def hyp1f1(cls, a, b, x, out = None):
         """ computes y = hyp1f1(a, b, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._hyp1f1(a, b, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._hyp1f1(a, b, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_hyp1f1(cls, ybar, a, b, x, y, out=None):
@@ -742,11 +745,12 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def hyperu(cls, a, b, x):
+    def hyperu(cls, a, b, x, out = None):
         """ computes y = hyperu(a, b, x) in UTP arithmetic"""
-        retval = x.clone()
-        cls._hyperu(a, b, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._hyperu(a, b, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_hyperu(cls, ybar, a, b, x, y, out=None):
@@ -761,11 +765,12 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def botched_clip(cls, a_min, a_max, x):
+    def botched_clip(cls, a_min, a_max, x, out = None):
         """ computes y = botched_clip(a_min, a_max, x) in UTP arithmetic"""
-        retval = x.clone()
-        cls._botched_clip(a_min, a_max, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._botched_clip(a_min, a_max, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_botched_clip(cls, ybar, a_min, a_max, x, y, out=None):
@@ -781,12 +786,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def dpm_hyp2f0(cls, a1, a2, x):
+    def dpm_hyp2f0(cls, a1, a2, x, out = None):
         """ computes y = hyp2f0(a1, a2, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._dpm_hyp2f0(a1, a2, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._dpm_hyp2f0(a1, a2, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_dpm_hyp2f0(cls, ybar, a1, a2, x, y, out=None):
@@ -804,12 +810,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def hyp2f0(cls, a1, a2, x):
+    def hyp2f0(cls, a1, a2, x, out = None):
         """ computes y = hyp2f0(a1, a2, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._hyp2f0(a1, a2, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._hyp2f0(a1, a2, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_hyp2f0(cls, ybar, a1, a2, x, y, out=None):
@@ -827,12 +834,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def hyp0f1(cls, b, x):
+    def hyp0f1(cls, b, x, out = None):
         """ computes y = hyp0f1(b, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._hyp0f1(b, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._hyp0f1(b, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_hyp0f1(cls, ybar, b, x, y, out=None):
@@ -850,12 +858,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def polygamma(cls, n, x):
+    def polygamma(cls, n, x, out = None):
         """ computes y = polygamma(n, x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._polygamma(n, x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._polygamma(n, x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_polygamma(cls, ybar, n, x, y, out=None):
@@ -873,12 +882,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def psi(cls, x):
+    def psi(cls, x, out = None):
         """ computes y = psi(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._psi(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._psi(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_psi(cls, ybar, x, y, out=None):
@@ -894,12 +904,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def reciprocal(cls, x):
+    def reciprocal(cls, x, out = None):
         """ computes y = reciprocal(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._reciprocal(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._reciprocal(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_reciprocal(cls, ybar, x, y, out=None):
@@ -915,12 +926,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def gammaln(cls, x):
+    def gammaln(cls, x, out = None):
         """ computes y = gammaln(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._gammaln(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._gammaln(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_gammaln(cls, ybar, x, y, out=None):
@@ -974,6 +986,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         xbar.data.real = ybar.data
+        return xbar
 
     @classmethod
     def imag(cls, x):
@@ -990,15 +1003,17 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             xbar, = out
 
         xbar.data.imag = ybar
+        return xbar
 
 
     @classmethod
-    def absolute(cls, x):
+    def absolute(cls, x, out = None):
         """ computes y = absolute(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._absolute(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._absolute(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_absolute(cls, ybar, x, y, out=None):
@@ -1015,12 +1030,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def negative(cls, x):
+    def negative(cls, x, out = None):
         """ computes y = negative(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._negative(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._negative(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_negative(cls, ybar, x, y, out=None):
@@ -1037,12 +1053,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def square(cls, x):
+    def square(cls, x, out = None):
         """ computes y = square(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._square(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._square(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_square(cls, ybar, x, y, out=None):
@@ -1059,12 +1076,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def erf(cls, x):
+    def erf(cls, x, out = None):
         """ computes y = erf(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._erf(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._erf(x.data, out = out.data)
+        return out
 
 
     @classmethod
@@ -1083,12 +1101,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
 
 
     @classmethod
-    def erfi(cls, x):
+    def erfi(cls, x, out = None):
         """ computes y = erfi(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._erfi(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._erfi(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_erfi(cls, ybar, x, y, out=None):
@@ -1106,12 +1125,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
 
 
     @classmethod
-    def dawsn(cls, x):
+    def dawsn(cls, x, out = None):
         """ computes y = dawsn(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._dawsn(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._dawsn(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_dawsn(cls, ybar, x, y, out=None):
@@ -1129,12 +1149,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
 
 
     @classmethod
-    def logit(cls, x):
+    def logit(cls, x, out = None):
         """ computes y = logit(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._logit(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._logit(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_logit(cls, ybar, x, y, out=None):
@@ -1151,12 +1172,13 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return xbar
 
     @classmethod
-    def expit(cls, x):
+    def expit(cls, x, out = None):
         """ computes y = expit(x) in UTP arithmetic"""
 
-        retval = x.clone()
-        cls._expit(x.data, out = retval.data)
-        return retval
+        if out is None:
+            out = x.zeros_like()
+        cls._expit(x.data, out = out.data)
+        return out
 
     @classmethod
     def pb_expit(cls, ybar, x, y, out=None):
@@ -1271,63 +1293,71 @@ class UTPM(Ring, RawAlgorithmsMixIn):
 
         cls._pb_sincos(sbar.data, cbar.data, x.data, s.data, c.data, out = xbar.data)
 
-        return out
+        return xbar
 
-    def arcsin(self):
+    def arcsin(self, out = None):
         """ computes y = arcsin(x) in UTP arithmetic"""
-        rety = self.clone()
-        retz = self.clone()
-        self._arcsin(self.data, out = (rety.data, retz.data))
-        return rety
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._arcsin(self.data, out = (out.data, tmp.data))
+        return out
 
-    def arccos(self):
+    def arccos(self, out = None):
         """ computes y = arccos(x) in UTP arithmetic"""
-        rety = self.clone()
-        retz = self.clone()
-        self._arccos(self.data, out = (rety.data, retz.data))
-        return rety
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._arccos(self.data, out = (out.data, tmp.data))
+        return out
 
-    def arctan(self):
+    def arctan(self, out = None):
         """ computes y = arctan(x) in UTP arithmetic"""
-        rety = self.clone()
-        retz = self.clone()
-        self._arctan(self.data, out = (rety.data, retz.data))
-        return rety
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._arctan(self.data, out = (out.data, tmp.data))
+        return out
 
 
-    def sinhcosh(self):
+    def sinhcosh(self, out = None):
         """ simultaneously computes s = sinh(x) and c = cosh(x) in UTP arithmetic"""
-        rets = self.clone()
-        retc = self.clone()
+        if out is None:
+            out = (self.zeros_like(), self.zeros_like())
+        rets, retc = out
         self._sinhcosh(self.data, out = (rets.data, retc.data))
         return rets, retc
 
-    def sinh(self):
+    def sinh(self, out = None):
         """ computes y = sinh(x) in UTP arithmetic """
-        retval = self.clone()
-        tmp = self.clone()
-        self._sinhcosh(self.data, out = (retval.data, tmp.data))
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._sinhcosh(self.data, out = (out.data, tmp.data))
+        return out
 
-    def cosh(self):
+    def cosh(self, out = None):
         """ computes y = cosh(x) in UTP arithmetic """
-        retval = self.clone()
-        tmp = self.clone()
-        self._sinhcosh(self.data, out = (tmp.data, retval.data))
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._sinhcosh(self.data, out = (tmp.data, out.data))
+        return out
 
-    def tanh(self):
+    def tanh(self, out = None):
         """ computes y = tanh(x) in UTP arithmetic """
-        retval = self.clone()
-        tmp = self.clone()
-        self._tanhsech2(self.data, out = (retval.data, tmp.data))
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        tmp = self.zeros_like()
+        self._tanhsech2(self.data, out = (out.data, tmp.data))
+        return out
 
-    def sign(self):
+    def sign(self, out = None):
         """ computes y = sign(x) in UTP arithmetic"""
-        retval = self.clone()
-        self._sign(self.data, out = retval.data)
-        return retval
+        if out is None:
+            out = self.zeros_like()
+        self._sign(self.data, out = out.data)
+        return out
 
     def abs(self):
         """ computes y = sign(x) in UTP arithmetic"""
@@ -1342,7 +1372,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         else:
             xbar, = out
         cls._pb_sign(ybar.data, x.data, y.data, out = xbar.data)
-        return out
+        return xbar
 
 
     def __abs__(self):
@@ -1393,41 +1423,71 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         else:
             return numpy.all(self.data[0,...] == other)
 
+    @classmethod
+    def _assign_out(cls, out, x, y):
+        """ copies x into out before an in-place operation with y,
+        returns y or a copy of y if it would be overwritten"""
+        if isinstance(y, cls) and numpy.may_share_memory(out.data, y.data):
+            y = y.clone()
+        if isinstance(x, cls):
+            out.data[...] = x.data
+        else:
+            out.data[...] = 0
+            out.data[0,...] = x
+        return y
+
     @classmethod
     def neg(cls, x, out = None):
-        return -1*x
+        if out is None:
+            return -1*x
+        numpy.negative(x.data, out = out.data)
+        return out
 
     @classmethod
     def add(cls, x, y , out = None):
-        return x + y
+        if out is None:
+            return x + y
+        y = cls._assign_out(out, x, y)
+        out += y
+        return out
 
     @classmethod
     def sub(cls, x, y , out = None):
-        return x - y
+        if out is None:
+            return x - y
+        y = cls._assign_out(out, x, y)
+        out -= y
+        return out
 
     @classmethod
     def mul(cls, x, y , out = None):
-        return x * y
+        if out is None:
+            return x * y
+        y = cls._assign_out(out, x, y)
+        out *= y
+        return out
 
     @classmethod
     def div(cls, x, y , out = None):
-        return x / y
+        if out is None:
+            return x / y
+        y = cls._assign_out(out, x, y)
+        out /= y
+        return out
 
     @classmethod
     def multiply(cls, x, y , out = None):
-        return x * y
+        return cls.mul(x, y, out = out)
 
     @classmethod
     def max(cls, a, axis = None, out = None):
-        if out is not None:
-            raise NotImplementedError('should implement that')
-
         if axis is not None:
             raise NotImplementedError('should implement that')
 
-        a_shp = a.data.shape
-        out_shp = a_shp[:2]
-        out = cls(cls.__zeros__(out_shp, dtype = a.data.dtype))
+        if out is None:
+            a_shp = a.data.shape
+            out_shp = a_shp[:2]
+            out = cls(cls.__zeros__(out_shp, dtype = a.data.dtype))
         cls._max( a.data, axis = axis, out = out.data)
         return out
 
@@ -1584,7 +1644,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return UTPM( UTPM._transpose(self.data))
 
     def get_owndata(self):
-        return self.data.flags['OWNDATA']
+        return owns_data(self.data)
 
     owndata = property(get_owndata)
 
@@ -1594,20 +1654,20 @@ class UTPM(Ring, RawAlgorithmsMixIn):
 
     @classmethod
     def zeros(cls, shape, dtype=None):
-        if not isinstance(dtype, self.__class__):
+        if not isinstance(dtype, cls):
             raise NotImplementedError('dtype must be a UTPM object')
         D,P = dtype.data.shape[:2]
 
         if isinstance(shape, int):
             shape = (shape,)
 
-        return self.__class__(numpy.zeros((D,P) + shape))
+        return cls(cls.__zeros__((D,P) + shape, dtype = float))
 
     def zeros_like(self):
-        return self.__class__(numpy.zeros_like(self.data))
+        return self.__class__(self.__zeros_like__(self.data))
 
     def ones_like(self):
-        data = numpy.zeros_like(self.data)
+        data = self.__zeros_like__(self.data)
         data[0,...] = 1.
         return self.__class__(data)
 
@@ -1973,14 +2033,32 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         return (xbar,ybar)
 
 
+    @classmethod
+    def factor(cls, A, assume_a = None):
+        """
+        factors the base point A_0 of A once per direction
+
+        The returned Factorization can be passed instead of A to
+        UTPM.solve and UTPM.inv, e.g. to solve with several right hand sides
+        without factoring A_0 again.
+
+        assume_a is None (detect symmetric positive definite A_0), 'gen' (LU)
+        or 'pos' (Cholesky).
+        """
+        return Factorization(A.data, assume_a = assume_a)
+
     @classmethod
     def inv(cls, A, out = None):
+        factors = None
+        if isinstance(A, Factorization):
+            factors, A = A, cls(A.A_data)
+
         if out is None:
             out = cls(cls.__zeros__(A.data.shape, dtype = A.data.dtype))
         else:
             raise NotImplementedError('')
 
-        cls._inv(A.data,(out.data,))
+        cls._inv(A.data,(out.data,), factors = factors)
         return out
         # # tc[0] element
         # for p in range(P):
@@ -1999,7 +2077,12 @@ class UTPM(Ring, RawAlgorithmsMixIn):
         """
         solves for y in: A y = x
 
+        A may also be a Factorization returned by UTPM.factor.
         """
+        factors = None
+        if isinstance(A, Factorization):
+            factors, A = A, cls(A.A_data)
+
         if isinstance(A, UTPM) and isinstance(x, UTPM):
             A_shp = A.data.shape
             x_shp = x.data.shape
@@ -2014,7 +2097,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
                 dtype = numpy.promote_types(A.data.dtype, x.data.dtype)
                 out = cls(cls.__zeros__((D,P,M) + x_shp[3:], dtype=dtype))
 
-            UTPM._solve(A.data, x.data, out = out.data)
+            UTPM._solve(A.data, x.data, out = out.data, factors = factors)
 
         elif not isinstance(A, UTPM) and isinstance(x, UTPM):
             A_shp = numpy.shape(A)
@@ -2031,7 +2114,7 @@ class UTPM(Ring, RawAlgorithmsMixIn):
             D,P,M = A_shp[:3]
             dtype = numpy.promote_types(A.data.dtype, x.dtype)
             out = cls(cls.__zeros__((D,P,M) + x_shp[1:], dtype=dtype))
-            cls._solve_non_UTPM_x(A.data, x, out = out.data)
+            cls._solve_non_UTPM_x(A.data, x, out = out.data, factors = factors)
 
         else:
             raise NotImplementedError('should implement that')
@@ -2597,8 +2680,12 @@ class UTPM(Ring, RawAlgorithmsMixIn):
     @classmethod
     def pb_transpose(cls, ybar, x, y, out = None):
         if out is None:
-            raise NotImplementedError('should implement that')
+            xbar = x.zeros_like()
+            xbar += cls.transpose(ybar)
+            return xbar
 
+        # in the reverse mode, the bar value of a view is a view of
+        # xbar (see Function.xbar_from_x), i.e., xbar is up to date
         xbar, = out
         xbar = cls.transpose(ybar)
         return xbar
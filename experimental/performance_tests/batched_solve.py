@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Regression benchmark for UTPM.solve and UTPM.inv with many directions P.
+
+A_0 is factored once by Factorization. For at most
+Factorization.max_loop_P directions, each direction is factored by scipy,
+for more directions A_0 is inverted by one batched numpy.linalg.inv call
+and each degree is solved by one numpy.matmul.
+
+This script measures both variants for D=4, P=300, N=4 and exits with a
+non-zero status if the batched variant is not at least `speedup` times
+faster than one scipy call per direction.
+"""
+
+import sys
+import timeit
+
+import numpy
+from algopy import UTPM
+from algopy.utpm.algorithms import Factorization
+
+D, P, N = 4, 300, 4
+repetitions = 20
+speedup = 5.
+
+A = UTPM(numpy.random.rand(D, P, N, N))
+A.data[0] += N*numpy.eye(N)
+x = UTPM(numpy.random.rand(D, P, N, 1))
+
+def runtime(f):
+    return min(timeit.repeat(f, number=repetitions, repeat=3))/repetitions
+
+max_loop_P = Factorization.max_loop_P
+times = {}
+for variant, loop_P in [('batched', max_loop_P), ('per direction', P)]:
+    Factorization.max_loop_P = loop_P
+    times[variant] = (runtime(lambda: UTPM.solve(A, x)), runtime(lambda: UTPM.inv(A)))
+Factorization.max_loop_P = max_loop_P
+
+failed = False
+print('%14s %12s %12s'%('variant', 'solve [ms]', 'inv [ms]'))
+for variant in ['batched', 'per direction']:
+    print('%14s %12.3f %12.3f'%(variant, 1e3*times[variant][0], 1e3*times[variant][1]))
+
+for n, name in enumerate(['solve', 'inv']):
+    if times['batched'][n]*speedup > times['per direction'][n]:
+        print('batched %s is less than %.0f times faster than the loop over P'%(name, speedup))
+        failed = True
+
+if failed:
+    sys.exit(1)
@@ -1,116 +1,78 @@
 #!/usr/bin/env python
-import sys
-import numpy
-import numpy.linalg
-from  time import time
-
-
-sys.path = ['..'] + sys.path
-import vector_forward_mode as vfm
-import reverse_mode as rm
-import adolc
-
-
-Ns = [2**i for i in range(10)]
-function_eval_times = []
-forward_eval_times = []
-tape_rev_eval_times = []
-tape_eval_times = []
-rev_eval_times = []
-adolc_tape_times = []
-adolc_gradient_times = []
-
-
-
-for N in Ns:
-	print(N)
-	#A = 2.3*numpy.eye(N)
-	x = numpy.ones(N)
-
-	#def f(x):
-		#return numpy.dot(x, numpy.dot(A,x))
-
-	def f(x):
-		return numpy.sum(x*x)
-
-
-	## normal function evaluation
-	start_time = time()
-	y = f(x)
-	end_time = time()
-	function_eval_times.append(end_time-start_time)
-
-
-	## vector forward evaluation
-	start_time = time()
-	g_forward = vfm.vector_gradient(f,x)
-	end_time = time()
-	forward_eval_times.append(end_time-start_time)
+"""
+Regression benchmark for the mode selection of CGraph.jacobian.
 
+For functions F: R^N --> R^M with different N and M, this script measures
+the runtime of CGraph.jacobian in the forward and in the reverse mode and
+checks that mode='auto' selects a mode that is not much slower than the
+faster one.
 
-	## taping + reverse evaluation
-	start_time = time()
-	g_reverse = rm.gradient(f,x)
-	end_time = time()
-	tape_rev_eval_times.append(end_time-start_time)
-
-
-	## taping
-	start_time = time()
-	cg = rm.tape(f,x)
-	end_time = time()
-	tape_eval_times.append(end_time-start_time)
-
-	## reverse evaluation
-	start_time = time()
-	g_reverse2 = rm.gradient_from_graph(cg)
-	end_time = time()
-	rev_eval_times.append(end_time-start_time)
-
-	## PyADOLC taping
-	start_time = time()
-	ax = numpy.array([adolc.adouble(0.) for i in range(N)])
-	adolc.trace_on(0)
-	for n in range(N):
-		ax[n].is_independent(x[n])
-	ay = f(ax)
-	adolc.depends_on(ay)
-	adolc.trace_off()
-	end_time = time()
-	adolc_tape_times.append(end_time-start_time)
-	
-	## PyADOLC gradient
-	start_time = time()
-	adolc_g = adolc.gradient(0,x)
-	end_time = time()
-	adolc_gradient_times.append(end_time-start_time)
-
-
-	### check that both derivatives give the same result
-	#print 'difference between forward and reverse gradient computation', numpy.linalg.norm(g_forward - g_reverse)
-	#print 'difference between forward and reverse gradient2 computation', numpy.linalg.norm(g_forward - g_reverse2)
-	#print 'difference between Algopy and PyAdolc', numpy.linalg.norm(adolc_g - g_reverse2)
-
-
-
-import pylab
-
-function_plot        = pylab.loglog(Ns,function_eval_times, 'r.')
-forward_plot         = pylab.loglog(Ns,forward_eval_times, 'b.')
-taperev_plot         = pylab.loglog(Ns,tape_rev_eval_times, 'r^')
-tape_plot            = pylab.loglog(Ns,tape_eval_times, 'b^')
-rev_plot             = pylab.loglog(Ns,rev_eval_times, 'cs')
-adolc_tape_plot      = pylab.loglog(Ns,adolc_tape_times, 'rd')
-adolc_gradient_plot  = pylab.loglog(Ns,adolc_gradient_times, 'bd')
-
-pylab.xlabel('number of independent variables N []')
-pylab.ylabel('runtime t [sec]')
-pylab.grid()
-
-pylab.legend((function_plot,forward_plot,taperev_plot,tape_plot,rev_plot,adolc_tape_plot,adolc_gradient_plot), ('function','forward', 'tape+rev', 'tape', 'rev','adolc tape', 'adolc gradient'), loc=2)
-pylab.savefig('runtime_comparison.eps')
-pylab.savefig('runtime_comparison.png')
-pylab.show()
+The dense model F(x, A) is cheaper in the forward mode for all sizes,
+since the pullback of A * sin(x) has to reduce over the broadcast axis.
+The model G(x) with M = 1 << N is much cheaper in the reverse mode and
+mode='auto' must select the reverse mode for it.
 
+The script exits with a non-zero status if the selected mode is more than
+`tolerance` times slower than the faster mode for any (N, M), or if the
+reverse mode is not selected for G.
+"""
 
+import sys
+from time import time
 
+import numpy
+import algopy
+
+sizes = [(2, 500), (10, 100), (50, 50), (100, 10), (500, 2)]
+reverse_sizes = [2000, 5000]
+repetitions = 3
+tolerance = 2.
+
+def F(x, A):
+    return algopy.exp(algopy.sum(A * algopy.sin(x), axis=1)*0.01)
+
+def G(x, A):
+    return algopy.sum(algopy.sin(x) * x) + algopy.sum(algopy.exp(x * 0.01))
+
+def runtime(cg, x, mode):
+    cg.jacobian(x, mode = mode)
+    start_time = time()
+    for r in range(repetitions):
+        J = cg.jacobian(x, mode = mode)
+    return (time() - start_time)/repetitions, J
+
+cases = [(F, N, M, None) for N, M in sizes] + \
+        [(G, N, 1, 'reverse') for N in reverse_sizes]
+
+failed = False
+print('%6s %6s %12s %12s %8s %10s'%('N', 'M', 'forward [s]', 'reverse [s]', 'auto', 'ratio'))
+for model, N, M, expected in cases:
+    A = numpy.random.rand(M, N)
+    x = numpy.random.rand(N)
+
+    cg = algopy.CGraph()
+    fx = algopy.Function(x)
+    fy = model(fx, A)
+    cg.trace_off()
+    cg.independentFunctionList = [fx]
+    cg.dependentFunctionList = [fy]
+
+    t_forward, J_forward = runtime(cg, x, 'forward')
+    t_reverse, J_reverse = runtime(cg, x, 'reverse')
+    mode = cg.jacobian_mode(x)
+
+    assert numpy.allclose(J_forward, J_reverse)
+    assert numpy.allclose(J_forward, cg.jacobian(x, mode = 'auto'))
+
+    t_auto = {'forward': t_forward, 'reverse': t_reverse}[mode]
+    ratio = t_auto/min(t_forward, t_reverse)
+    failed = failed or ratio > tolerance
+    if expected is not None and mode != expected:
+        print('mode=auto selected %s instead of %s for N=%d, M=%d'%(mode, expected, N, M))
+        failed = True
+    print('%6d %6d %12.3e %12.3e %8s %10.2f'%(N, M, t_forward, t_reverse, mode, ratio))
+
+if failed:
+    print('mode=auto selected a mode that is more than %.1f times slower '
+          'or not the expected mode'%tolerance)
+    sys.exit(1)
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of the per-node overhead of the reverse sweep CGraph.pullback.
+
+The pullback function of each node used to be looked up by
+constructing its name and evaluating
+
+    eval('__import__("algopy.utpm").utpm.' + cls_name + '.pb_' + func_name)
+
+on every reverse sweep. It is now looked up once per (output class, func)
+in Function.pullback_registry.
+
+This script prints the time per node of
+
+    1) the old eval-based look up (before)
+    2) the registry look up (after)
+    3) a complete reverse sweep CGraph.pullback
+
+"""
+
+from time import time
+
+import numpy
+import algopy
+from algopy import CGraph, Function, UTPM
+
+N = 2000
+repetitions = 10
+
+# trace a long chain of cheap elementwise operations
+cg = CGraph()
+x = Function(UTPM(numpy.ones((1,1))))
+y = x
+for n in range(N):
+    y = algopy.sin(y) * x + x
+cg.trace_off()
+cg.independentFunctionList = [x]
+cg.dependentFunctionList = [y]
+
+Nnodes = len(cg.functionList)
+ybar = y.x.zeros_like()
+ybar.data[0,:] = 1.
+
+# before: eval-based look up
+start_time = time()
+for r in range(repetitions):
+    for f in cg.functionList:
+        eval('__import__("algopy.utpm").utpm.' + f.x.__class__.__name__ +
+             '.pb_' + f.func.__name__)
+eval_time = (time() - start_time)/(repetitions * Nnodes)
+
+# after: registry look up
+start_time = time()
+for r in range(repetitions):
+    for f in cg.functionList:
+        Function.get_pullback(f.x.__class__, f.func)
+registry_time = (time() - start_time)/(repetitions * Nnodes)
+
+# complete reverse sweep
+cg.pullback([ybar])
+start_time = time()
+for r in range(repetitions):
+    cg.pullback([ybar])
+pullback_time = (time() - start_time)/(repetitions * Nnodes)
+
+print('number of nodes                       = %d'%Nnodes)
+print('look up of pb_func per node (eval)    = %.3e sec'%eval_time)
+print('look up of pb_func per node (registry)= %.3e sec'%registry_time)
+print('speedup of the look up                = %.1f'%(eval_time/registry_time))
+print('reverse sweep per node                = %.3e sec'%pullback_time)
+print('reverse sweep per node before (est.)  = %.3e sec'%(pullback_time + eval_time - registry_time))
@@ -0,0 +1,70 @@
+"""
+Memory per function node of a traced CGraph.
+
+Function instances use __slots__, i.e., they have no per-instance __dict__.
+CGraph.compile generates a Tape, i.e., a struct-of-arrays representation
+of the topology with an opcode array and integer argument arrays.
+
+This script traces a long chain of scalar operations and prints
+
+    1) the bytes per Function instance (with __slots__)
+    2) the bytes per instance of an equivalent class with a __dict__ (before)
+    3) the bytes per node allocated by tracing (measured with tracemalloc)
+    4) the bytes per node of the topology arrays of the Tape
+
+The sizes of 1) and 2) depend on the Python version, e.g.
+
+    Python 3.7:   104 bytes (__slots__) vs 224 bytes (__dict__)
+    Python 3.11:   88 bytes (__slots__) vs 352 bytes (__dict__)
+
+"""
+
+import sys
+import tracemalloc
+
+import algopy
+from algopy import CGraph, Function
+
+N = 100000
+
+class DictFunction(object):
+    """ function node with a __dict__, as before """
+    def __init__(self):
+        self.x = None
+        self.xbar = None
+        self.args = None
+        self.kwargs = None
+        self.func = None
+        self.ID = None
+        self.setitem = None
+
+def size_of_node(f):
+    retval = sys.getsizeof(f)
+    if hasattr(f, '__dict__'):
+        retval += sys.getsizeof(f.__dict__)
+    return retval
+
+tracemalloc.start()
+start = tracemalloc.take_snapshot()
+
+cg = CGraph()
+x = Function(1.)
+y = x
+for n in range(N):
+    y = y * 1.0001 + x
+cg.trace_off()
+cg.independentFunctionList = [x]
+cg.dependentFunctionList = [y]
+
+stop = tracemalloc.take_snapshot()
+traced = sum(stat.size_diff for stat in stop.compare_to(start, 'filename'))
+tracemalloc.stop()
+
+Nnodes = len(cg.functionList)
+cg.compile()
+
+print('number of nodes                            = %d'%Nnodes)
+print('bytes per Function instance (__slots__)    = %d'%size_of_node(cg.functionList[-1]))
+print('bytes per Function instance (__dict__)     = %d'%size_of_node(DictFunction()))
+print('bytes per node allocated by tracing        = %.1f'%(traced/float(Nnodes)))
+print('bytes per node of the Tape topology arrays = %.1f'%(cg._plan.nbytes()/float(Nnodes)))